@@ -1,85 +1,83 @@
-import time
-import threading
-import subprocess
-import platform
+import os
+import sys
+import shlex
+import argparse
+from typing import Callable
 from utils.customlogger import CustomLogger
+from utils.supervisor import ManagedProcess, Supervisor, http_probe
 
 # Setting up custom logger
 logger = CustomLogger(name="MainLogger", log_file="main.log").get_logger()
 
+# Where each child serves (readiness probes poll these)
+SURREALDB_URL = "http://127.0.0.1:8001"
+BACKEND_URL = "http://127.0.0.1:8000"
+FRONTEND_URL = "http://127.0.0.1:8080"
 
-def run_surrealdb_new_terminal() -> None:
-    """Run the SurrealDB server in a new terminal window."""
-    try:
-        logger.info("Launching SurrealDB in a new terminal...")
-        if platform.system() == "Windows":
-            # Launch in new PowerShell window
-            subprocess.Popen(
-                [
-                    "start",
-                    "powershell",
-                    "-NoExit",
-                    "-Command",
-                    "surreal start --log trace --username root --password root --bind 127.0.0.1:8001",
-                ],
-                shell=True,
-            )
-        else:
-            # macOS / Linux: open a new terminal tab/window
-            subprocess.Popen(
-                [
-                    "gnome-terminal",
-                    "--",
-                    "bash",
-                    "-c",
-                    "surreal start --log trace --username root --password root --bind 127.0.0.1:8001; exec bash",
-                ]
-            )
-    except Exception as e:
-        logger.error(f"Failed to start SurrealDB in new terminal: {e}")
+# SurrealDB launch command; PMS_SURREAL_CMD swaps in a local stand-in
+SURREALDB_COMMAND = os.getenv(
+    "PMS_SURREAL_CMD", "surreal start --log trace --username root --password root --bind 127.0.0.1:8001"
+)
 
 
-def run_backend() -> None:
-    """Run the FastAPI backend server."""
-    try:
-        logger.info("Starting FastAPI backend server...")
-        subprocess.run(["python", "-m", "src.backend.server"], check=True)
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Backend server failed: {e}")
-    except KeyboardInterrupt:
-        logger.info("Backend server stopped by user.")
+def backend_probe() -> Callable[[], bool]:
+    """
+    Backend readiness: caught up with SurrealDB while SurrealDB answers, otherwise only warm. SurrealDB
+    is optional, and without it the sync backlog just ages; that must not fail the backend's start.
+    """
+    surrealdb_up = http_probe(f"{SURREALDB_URL}/health")
+    caught_up = http_probe(f"{BACKEND_URL}/ready")
+    serving = http_probe(f"{BACKEND_URL}/ready?sync_lag=false")
 
+    def probe() -> bool:
+        return caught_up() if surrealdb_up() else serving()
+    return probe
 
-def run_frontend() -> None:
-    """Run the Flet frontend application."""
-    try:
-        time.sleep(3)  # give backend time
-        logger.info("Starting Flet frontend application...")
-        subprocess.run(["python", "-m", "src.frontend.client"], check=True)
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Frontend application failed: {e}")
-    except KeyboardInterrupt:
-        logger.info("Frontend application stopped by user.")
+
+def build_processes(args: argparse.Namespace) -> list[ManagedProcess]:
+    """Children in start order: SurrealDB (optional, the sync outbox buffers writes without it), backend, frontend."""
+    processes = []
+    if not args.no_surrealdb:
+        processes.append(ManagedProcess(
+            name="surrealdb",
+            command=shlex.split(SURREALDB_COMMAND),
+            probe=http_probe(f"{SURREALDB_URL}/health"),
+            ready_timeout=args.ready_timeout,
+            required=False,
+        ))
+    processes.append(ManagedProcess(
+        name="backend",
+        command=[sys.executable, "-m", "src.backend.server"],
+        # /ready answers once the data is loaded and (while SurrealDB is up) the sync is caught up
+        probe=backend_probe(),
+        ready_timeout=args.ready_timeout,
+        # Without SurrealDB the sync backlog only grows, which must not keep the backend from serving
+        env={"PMS_READY_MAX_SYNC_LAG_S": "0"} if args.no_surrealdb else None,
+    ))
+    processes.append(ManagedProcess(
+        name="frontend",
+        command=[sys.executable, "-m", "src.frontend.client"],
+        # Any HTTP answer means the web server is up (Flet may 404 on / until its client assets are served)
+        probe=http_probe(f"{FRONTEND_URL}/", max_status=499),
+        ready_timeout=args.ready_timeout,
+    ))
+    return processes
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the Patient Management System under a supervisor")
+    parser.add_argument("--no-surrealdb", action="store_true", help="Do not launch SurrealDB")
+    parser.add_argument("--ready-timeout", type=float, default=60.0, help="Seconds each child may take to become ready")
+    parser.add_argument("--max-restarts", type=int, default=5, help="Restarts allowed per child within a minute")
+    args = parser.parse_args()
+
     try:
         logger.info("Starting Patient Management System...")
-
-        # Start SurrealDB in a new terminal window
-        run_surrealdb_new_terminal()
-
-        # Wait a little so SurrealDB has time to boot
-        time.sleep(5)
-
-        # Start backend in a separate thread
-        backend_thread = threading.Thread(target=run_backend, daemon=True)
-        backend_thread.start()
-
-        # Start frontend in main thread
-        run_frontend()
+        supervisor = Supervisor(build_processes(args), max_restarts=args.max_restarts)
+        sys.exit(supervisor.run())
     except Exception as e:
         logger.error(f"Error occurred in main: {e}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
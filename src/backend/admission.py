@@ -0,0 +1,137 @@
+import math
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from utils import tracing
+from utils.customlogger import CustomLogger
+
+# Setting up custom logger
+logger = CustomLogger(name="AdmissionLogger", log_file="admission.log").get_logger()
+
+# Never limited: probes must answer under load, and /events streams stay open for as long as a client is connected
+EXEMPT_PATHS: frozenset[str] = frozenset({"/health", "/ready", "/events"})
+
+# Rejections of a route class are logged at most once per this many seconds
+LOG_INTERVAL_S: float = 5.0
+
+
+@dataclass
+class RouteClassLimit:
+    """Concurrency limit of one route class: `limit` requests run, up to `queue` more wait (limit 0 = unlimited)."""
+    limit: int
+    queue: int
+
+
+class RouteClassLimiter:
+    """Concurrency slots of one route class with a bounded FIFO queue of waiting requests."""
+
+    def __init__(self, name: str, limit: int, queue: int, queue_timeout_s: float) -> None:
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.queue_timeout_s = queue_timeout_s
+        self._slots = asyncio.Semaphore(limit)
+        self.in_flight: int = 0
+        self.waiting: int = 0
+        # Moving average of how long a request holds its slot
+        self.service_s: float = 0.05
+        self._logged_at: float = 0.0
+
+        # Stats
+        self.admitted: int = 0
+        self.queued: int = 0
+        self.rejected_full: int = 0
+        self.rejected_timeout: int = 0
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead of a new request has likely drained (at least 1)."""
+        return max(1, math.ceil(self.service_s * (self.waiting + 1) / self.limit))
+
+    async def acquire(self) -> Optional[int]:
+        """Take a slot; None when admitted, else the status to reject with (429 queue full, 503 timed out)."""
+        if not self._slots.locked() and not self.waiting:
+            await self._slots.acquire()
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+        if self.waiting >= self.queue:
+            self.rejected_full += 1
+            self._log_rejection("queue full")
+            return 429
+        self.waiting += 1
+        self.queued += 1
+        try:
+            with tracing.span("admission.queue", route_class=self.name, ahead=self.waiting - 1):
+                async with asyncio.timeout(self.queue_timeout_s):
+                    await self._slots.acquire()
+        except TimeoutError:
+            self.rejected_timeout += 1
+            self._log_rejection(f"waited {self.queue_timeout_s:g}s")
+            return 503
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        self.admitted += 1
+        return None
+
+    def release(self, held_s: float) -> None:
+        self.service_s += 0.1 * (held_s - self.service_s)
+        self.in_flight -= 1
+        self._slots.release()
+
+    def _log_rejection(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._logged_at >= LOG_INTERVAL_S:
+            self._logged_at = now
+            logger.warning(f"Shedding {self.name} requests ({reason}): {self.in_flight} running, {self.waiting} queued; "
+                           f"so far {self.admitted} admitted, {self.queued} had to queue, {self.rejected_full} "
+                           f"rejected on a full queue, {self.rejected_timeout} timed out")
+
+
+def route_class(scope: Scope) -> Optional[str]:
+    """read (GET/HEAD), bulk (/import) or write (other methods); None for exempt paths."""
+    path = scope["path"]
+    if path in EXEMPT_PATHS:
+        return None
+    if scope["method"] in ("GET", "HEAD"):
+        return "read"
+    return "bulk" if path == "/import" else "write"
+
+
+class AdmissionMiddleware:
+    """Admission control per route class, per worker process (429/503 with Retry-After over the limit)."""
+
+    def __init__(self, app: ASGIApp, limits: dict[str, RouteClassLimit], queue_timeout_s: float = 2.0) -> None:
+        self.app = app
+        # Separate slots per class: a burst of writes or an import cannot take the slots reads need
+        self.limiters = {
+            name: RouteClassLimiter(name, limit.limit, limit.queue, queue_timeout_s)
+            for name, limit in limits.items() if limit.limit > 0
+        }
+        logger.info("Admission control: " + ", ".join(
+            f"{name} {limiter.limit} running + {limiter.queue} queued" for name, limiter in self.limiters.items()
+        ) + f" (queue timeout {queue_timeout_s:g}s)")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = self.limiters.get(route_class(scope)) if scope["type"] == "http" else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejected = await limiter.acquire()
+        if rejected is not None:
+            detail = ("Too many concurrent requests, retry later" if rejected == 429
+                      else "Server is busy, retry later")
+            response = JSONResponse(status_code=rejected, content={"detail": detail},
+                                    headers={"Retry-After": str(limiter.retry_after())})
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
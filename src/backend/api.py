@@ -1,164 +1,576 @@
-import json
+import io
+import os
+import time
 import asyncio
-import pandas as pd
-from typing import Any
+import tempfile
+from typing import Any, AsyncIterator, Awaitable, Callable
 from pathlib import Path
 from pydantic import ValidationError
-from fastapi.responses import JSONResponse
+from utils import tracing
 from utils.customlogger import CustomLogger
-from fastapi import FastAPI, HTTPException
-from src.backend.database import SurrealDataBase
-from concurrent.futures import ThreadPoolExecutor
+from utils.startup import StartupProfiler
+from fastapi import FastAPI, HTTPException, Query, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from src.backend.orm import Patient, PatientUpdate
+from src.backend.outbox import SyncOutbox, OutboxFullError
+from src.backend.coalescer import WriteCoalescer, Mutations, Traces
+from src.backend.serialization import FastJSONResponse, FragmentCache, JSON_ENCODER, UNTRACKED, dumps
+from src.backend.result_cache import ResultCache
+from src.backend.changefeed import ChangeFeed
+from src.backend.bulk_import import BulkImporter, ImportReport, IMPORT_CONFLICT_MODES, IMPORT_FORMATS, Records, persist_chunk
+from src.backend import config
+from src.backend.storage import StorageEngine, VersionConflictError, SORTABLE_FIELDS, PROJECTABLE_FIELDS, create_storage_engine
 
 
 # Setting up custom logger
 logger = CustomLogger(name="APIClientLogger", log_file="apiclient.log").get_logger()
 
+# Import bodies are spooled to a temp file past this size, so uploads never sit in memory whole
+IMPORT_SPOOL_BYTES: int = 8 * 1024 * 1024
+
+# List responses with more rows than this are encoded on a worker thread instead of the event loop
+INLINE_ENCODE_ROWS: int = 1000
+
+# /events sends a comment line after this many idle seconds, so proxies keep the stream open
+EVENTS_KEEPALIVE_S: float = 15.0
+
 
 class APIClient:
-    def __init__(self, app: FastAPI, data_file: str | None=None) -> None:
+    def __init__(
+        self,
+        app: FastAPI,
+        data_file: str | None=None,
+        storage: str | StorageEngine=config.STORAGE_ENGINE,
+        sqlite_file: str | None=None,
+        coalesce_window_ms: float=config.COALESCE_WINDOW_MS,
+        coalesce_max_batch: int=config.COALESCE_MAX_BATCH,
+        wait_for_durability: bool=config.WAIT_FOR_DURABILITY,
+        shared: bool=config.WORKERS > 1,
+        mirror: bool=config.SURREAL_MIRROR,
+        startup: StartupProfiler | None=None,
+        max_sync_lag_s: float=config.READY_MAX_SYNC_LAG_S,
+    ) -> None:
         self.app = app
+        self.wait_for_durability = wait_for_durability
+        self.shared = shared
+        self.max_sync_lag_s = max_sync_lag_s
+        self.started_at = time.time()
+        self.startup = startup or StartupProfiler("api")
 
         # Resolve data_file relative to project root
         ROOT_DIR = Path(__file__).resolve().parents[2]
         self.data_file: Path = Path(data_file) if data_file else ROOT_DIR / "data" / "patients.json"
 
-        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1)
-        self.register_routes()
-        logger.info(f"APIClient initialized. Using data file at {self.data_file}")
+        # Storage engine picked from configuration (or injected directly)
+        with self.startup.phase("data load"):
+            if isinstance(storage, StorageEngine):
+                self.engine: StorageEngine = storage
+            else:
+                # File rewrites are deferred to the coalescer's flush (unless other workers share the store)
+                self.engine = create_storage_engine(
+                    storage, data_file=self.data_file, sqlite_file=sqlite_file, write_through=False, shared=shared,
+                    shards=config.JSON_SHARDS, shard_bounds=config.JSON_SHARD_BOUNDS, load_workers=config.JSON_LOAD_WORKERS,
+                )
+
+        # SurrealDB mirror (via a durable outbox) is only needed when SurrealDB is not already the primary store
+        self.outbox: SyncOutbox | None = None
+        if mirror and self.engine.name != "surrealdb":
+            with self.startup.phase("mirror setup"):
+                self.outbox = SyncOutbox(self.data_file.parent / "sync_outbox.db")
+                if self.outbox.created:
+                    # First run: seed the mirror with a full snapshot (UPSERTs, so replay is harmless)
+                    self.outbox.enqueue_many([("upsert", pid, record) for pid, record in self.engine.scan().items()])
+                # On the server's event loop when there is one, otherwise on the outbox's own thread
+                try:
+                    loop = asyncio.get_running_loop()
+                except RuntimeError:
+                    loop = None
+                self.outbox.start(loop)
+
+        # Live change feed: every flushed mutation is appended with a sequence number (shared by all workers)
+        self.changes = ChangeFeed(self.data_file.parent / "changes.db")
+
+        # Bursts of writes share one flush (file rewrite + outbox transaction)
+        self.coalescer = WriteCoalescer(
+            self.flush_mutations, window=coalesce_window_ms / 1000, max_batch=coalesce_max_batch
+        )
+
+        # Pre-encoded record fragments for collection responses (invalidated in persist)
+        self.fragments = FragmentCache()
+
+        # Whole /view and /sort bodies, valid until the engine's data version moves
+        self.results = ResultCache(max_entries=config.RESULT_CACHE_ENTRIES, max_bytes=config.RESULT_CACHE_MB * 1024 * 1024)
+
+        # Readiness: cleared when shutdown starts; the last verdict is kept so only transitions are logged
+        self.accepting = True
+        self._last_ready: bool | None = None
+
+        with self.startup.phase("route registration"):
+            self.register_routes()
+        logger.info(f"APIClient initialized. Using {self.engine.name} storage engine ({self.engine.capabilities}, shared={shared}), "
+                    f"{JSON_ENCODER} encoder")
 
     # ---- Helpers ----
-    def load_data(self) -> pd.DataFrame:
-        """Load patients data from JSON file into DataFrame."""
+    async def load_patient(self, patient_id: str) -> dict[str, Any] | None:
+        """Load a single patient from the storage engine."""
+        try:
+            return await self.engine.aget(patient_id)
+        except Exception as e:
+            logger.error(f"Unexpected error loading patient {patient_id}: {e}")
+            raise HTTPException(status_code=500, detail="Failed to load data")
+
+    async def load_data(
+        self,
+        sort_by: str | None=None,
+        order: str="asc",
+        filters: dict[str, Any] | None=None,
+        limit: int | None=None,
+    ) -> dict[str, dict[str, Any]]:
+        """Load patients from the storage engine, optionally filtered, sorted and limited."""
         try:
-            with open(self.data_file, "r", encoding="utf-8") as file:
-                content = json.load(file)
-            logger.info("Patient data loaded successfully.")
-            return pd.DataFrame.from_dict(content, orient="index")
-        except FileNotFoundError:
-            logger.error(f"Data file not found: {self.data_file}")
-            raise HTTPException(status_code=404, detail="Data file not found")
+            with tracing.span("load_data", engine=self.engine.name, sort_by=sort_by, limit=limit) as attributes:
+                if sort_by is not None or filters or limit is not None:
+                    content = await self.engine.aquery(filters=filters, sort_by=sort_by, order=order, limit=limit)
+                else:
+                    content = await self.engine.ascan()
+                    logger.info("Patient data loaded successfully.")
+                attributes["rows"] = len(content)
+            return content
         except Exception as e:
             logger.error(f"Unexpected error loading data: {e}")
             raise HTTPException(status_code=500, detail="Failed to load data")
 
-    def save_data_to_json(self, data: pd.DataFrame) -> None:
-        """Save DataFrame back to JSON file."""
+    async def data_version(self) -> Any:
+        """Engine data version for the result cache (None = do not cache)."""
         try:
-            data.to_json(self.data_file, orient="index", indent=4)
-            logger.info("Data successfully saved to JSON.")
+            return await self.engine.adata_version()
         except Exception as e:
-            logger.error(f"Error saving to JSON: {e}")
+            logger.error(f"Could not read the {self.engine.name} data version: {e}")
+            return None
+
+    async def list_response(
+        self,
+        endpoint: str,
+        projection: tuple[str, ...] | None,
+        sort_by: str | None=None,
+        order: str="asc",
+        filters: dict[str, Any] | None=None,
+        limit: int | None=None,
+    ) -> bytes:
+        """Encoded list body, served from the result cache while no record has changed."""
+        async def build(data_version: Any) -> bytes:
+            # Other workers' writes never reach fragments.invalidate(): fragments follow the shared store's version
+            data = await self.load_data(sort_by=sort_by, order=order, filters=filters, limit=limit)
+            return await self.encode(data, projection, data_version if self.shared else UNTRACKED)
+
+        return await self.cached((endpoint, sort_by, order, tuple(sorted((filters or {}).items())), limit, projection), build)
+
+    async def cached(self, key: tuple[Any, ...], build: Callable[[Any], Awaitable[bytes]]) -> bytes:
+        """Response body for key from the result cache; built (given the data version) and stored on a miss."""
+        with tracing.span("result_cache", endpoint=key[0]) as attributes:
+            # Taken before reading, so a write racing the read files its result under an outdated version
+            version = await self.data_version()
+            body = self.results.get(key, version)
+            attributes["hit"] = body is not None
+            if body is None:
+                body = await build(version)
+                self.results.put(key, version, body)
+            return body
+
+    def compute_analytics(self, by: tuple[str, ...], metrics: tuple[str, ...], percentiles: tuple[float, ...]) -> bytes:
+        """Grouped statistics over a column snapshot of the store, encoded (runs on a worker thread)."""
+        from src.backend.analytics import group_stats
+        started = time.perf_counter()
+        columns = self.engine.columns()
+        snapshot_ms = (time.perf_counter() - started) * 1000
+        result = group_stats(columns, by, metrics, percentiles)
+        # Time to compute, not to serve: cache hits return the body unchanged
+        result["compute_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Analytics by {list(by)} over {len(columns)} patients: snapshot {snapshot_ms:.1f} ms, "
+                    f"total {result['compute_ms']:.1f} ms")
+        return dumps(result)
+
+    def flush_mutations(self, mutations: Mutations, traces: Traces | None = None) -> None:
+        """Make a coalesced batch durable: flush the engine, queue the changes for SurrealDB, then publish them."""
+        with tracing.span("storage.flush", engine=self.engine.name):
+            self.engine.flush()
+        if self.outbox is not None:
+            with tracing.span("outbox.enqueue", mutations=len(mutations)):
+                self.outbox.enqueue_many([
+                    ("delete", patient_id, None) if record is None else ("upsert", patient_id, record)
+                    for patient_id, record in mutations.items()
+                ], traces=traces)
+        try:
+            with tracing.span("changefeed.publish"):
+                self.changes.publish(mutations)
+        except Exception as e:
+            # The write itself is durable; live clients catch up on their next reset or refetch
+            logger.error(f"Failed to publish {len(mutations)} change events: {e}")
+
+    async def encode(self, data: dict[str, dict[str, Any]], fields: tuple[str, ...] | None, data_version: Any=UNTRACKED) -> bytes:
+        """Encode a list response from cached fragments, off the event loop when it is large."""
+        with tracing.span("encode", rows=len(data)):
+            if len(data) <= INLINE_ENCODE_ROWS:
+                return self.fragments.encode(data, fields, data_version)
+            return await asyncio.to_thread(self.fragments.encode, data, fields, data_version)
+
+    async def persist(self, patient_id: str, record: dict[str, Any] | None, expected_version: int) -> int:
+        """
+        Compare-and-set one patient at expected_version (0: new patient; record None deletes it), then coalesce it.
+        Returns the new version (0 after a delete); raises 409 on a version conflict.
+        """
+        if self.outbox is not None:
+            try:
+                await self.outbox.await_capacity()
+            except OutboxFullError as e:
+                logger.error(f"Write rejected for {patient_id}: {e}")
+                raise HTTPException(status_code=503, detail="Database sync backlog is full, retry later",
+                                    headers={"Retry-After": str(e.retry_after)})
+        try:
+            with tracing.span("storage.write", engine=self.engine.name, patient_id=patient_id):
+                if record is None:
+                    await self.engine.acompare_and_delete(patient_id, expected_version)
+                    new_version = 0
+                else:
+                    new_version = await self.engine.acompare_and_set(patient_id, expected_version, record)
+                    record = {**record, "version": new_version}
+            self.fragments.invalidate([patient_id])
+            logger.info(f"Patient {patient_id} saved to {self.engine.name} storage (version {new_version}).")
+        except VersionConflictError as e:
+            logger.warning(str(e))
+            raise HTTPException(status_code=409, detail=f"Patient {patient_id} was modified concurrently "
+                                f"(expected version {e.expected_version}, current {e.current_version})",
+                                headers={"ETag": f'"{e.current_version}"'})
+        except Exception as e:
+            logger.error(f"Error saving to {self.engine.name} storage: {e}")
             raise HTTPException(status_code=500, detail="Failed to save data")
 
-    async def save_data_to_db_async(self, data: pd.DataFrame) -> None:
-        """Async method to save data to SurrealDB."""
-        patients_dict: dict[str, dict[str, Any]] = data.to_dict(orient="index")
-        db = SurrealDataBase()
+        # The coalesced flush and the later SurrealDB sync are recorded under this span
+        with tracing.span("coalesce", wait=self.wait_for_durability):
+            ticket = self.coalescer.submit(patient_id, record)
+            if self.wait_for_durability:
+                try:
+                    # Shielded: a timed-out wait must not cancel the ticket the coalescer will still resolve
+                    await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(ticket)), config.DURABILITY_TIMEOUT_S)
+                except TimeoutError:
+                    logger.error(f"Flush of {patient_id} not confirmed within {config.DURABILITY_TIMEOUT_S:g}s")
+                    raise HTTPException(status_code=500, detail="Failed to save data")
+                except Exception as e:
+                    logger.error(f"Flush failed for {patient_id}: {e}")
+                    raise HTTPException(status_code=500, detail="Failed to save data")
+        return new_version
+
+    def readiness(self, check_sync_lag: bool=True) -> tuple[bool, dict[str, Any]]:
+        """
+        Whether this instance should receive traffic, with the storage and sync state behind the verdict.
+        check_sync_lag=False leaves out the sync lag (for callers that know SurrealDB is down).
+        """
+        started = time.perf_counter()
+        reasons = [] if self.accepting else ["shutting down"]
+
         try:
-            await db.use_connection()
-            await db.import_patients(patients_dict)
-            await db.close_connection()
-            logger.info("Data successfully saved to SurrealDB.")
+            storage = self.engine.status()
         except Exception as e:
-            logger.error(f"Error saving to SurrealDB: {e}")
+            storage = {"engine": self.engine.name, "ready": False, "error": str(e)}
+        if not storage.get("ready"):
+            reasons.append(f"{self.engine.name} storage not ready")
+
+        sync = None
+        if self.outbox is not None:
+            try:
+                sync = self.outbox.status()
+            except Exception as e:
+                sync = {"error": str(e)}
+                reasons.append("sync outbox unavailable")
+            else:
+                if sync["depth"] >= sync["max_depth"]:
+                    reasons.append(f"sync backlog full ({sync['depth']} pending)")
+                if check_sync_lag and self.max_sync_lag_s > 0 and sync["lag_s"] > self.max_sync_lag_s:
+                    reasons.append(f"sync lag {sync['lag_s']:.1f}s over {self.max_sync_lag_s:g}s")
+
+        is_ready = not reasons
+        if is_ready != self._last_ready:
+            if is_ready:
+                logger.info("Instance is ready")
+            else:
+                logger.warning(f"Instance not ready: {'; '.join(reasons)}")
+            self._last_ready = is_ready
+        return is_ready, {
+            "status": "ready" if is_ready else "not ready",
+            "reasons": reasons,
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "patients": storage.get("patients"),
+            "storage": storage,
+            "sync": sync,
+            "pending_flush": self.coalescer.pending,
+            "result_cache": self.results.stats(),
+            "changes": self.changes.status(),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def apply_import(self, records: Records) -> None:
+        """Persist one validated import chunk as a single batch (bypasses the per-write coalescer)."""
+        persist_chunk(self.engine, self.outbox, records)
+        self.fragments.invalidate(records)
+
+    def import_stream(self, stream: io.TextIOBase, fmt: str, on_conflict: str = "overwrite") -> ImportReport:
+        """Import a CSV/NDJSON roster; the file is rewritten once at the end rather than per chunk."""
+        report = BulkImporter(self.apply_import, existing=self.engine.versions, on_conflict=on_conflict).run(stream, fmt)
+        self.engine.flush()
+        if report.imported:
+            # One reset instead of an event per row: live clients refetch once
+            self.changes.publish_reset()
+        return report
+
+    async def event_stream(self, since: int | None) -> AsyncIterator[bytes]:
+        """Server-sent events for the change feed: one `id`/`event`/`data` frame per event, plus keepalives."""
+        yield b"retry: 2000\n\n"
+        async for event in self.changes.subscribe(since, heartbeat=EVENTS_KEEPALIVE_S):
+            if event is None:
+                yield b": keepalive\n\n"
+            else:
+                yield b"id: %d\nevent: %s\ndata: %s\n\n" % (event["seq"], event["op"].encode(), dumps(event))
+
+    @staticmethod
+    def parse_if_match(if_match: str | None) -> int | None:
+        """Version from an If-Match header ('"3"', 'W/"3"' or '3'); None when absent or '*'."""
+        if if_match is None or if_match.strip() == "*":
+            return None
+        value = if_match.strip().removeprefix("W/").strip('"')
+        if not value.isdigit():
+            raise HTTPException(status_code=400, detail="If-Match must be a record version")
+        return int(value)
 
-    def save_data_to_db(self, data: pd.DataFrame) -> None:
-        """Non-blocking DB save using thread pool."""
-        self.executor.submit(lambda: asyncio.run(self.save_data_to_db_async(data)))
+    def check_if_match(self, patient_id: str, if_match: str | None, current_version: int) -> None:
+        """Reject with 409 when the client's If-Match version is already stale."""
+        expected = self.parse_if_match(if_match)
+        if expected is not None and expected != current_version:
+            logger.warning(f"Stale If-Match on {patient_id}: {expected} != {current_version}")
+            raise HTTPException(status_code=409, detail=f"Patient {patient_id} was modified concurrently "
+                                f"(expected version {expected}, current {current_version})",
+                                headers={"ETag": f'"{current_version}"'})
 
-    def persist(self, data: pd.DataFrame) -> None:
-        """Save to JSON and DB."""
-        self.save_data_to_json(data)
-        self.save_data_to_db(data)
+    @staticmethod
+    def build_filters(city: str | None, gender: str | None, verdict: str | None) -> dict[str, str]:
+        """Collect the equality filters that were supplied."""
+        filters = {"city": city, "gender": gender, "verdict": verdict}
+        return {field: value for field, value in filters.items() if value is not None}
+
+    @staticmethod
+    def parse_fields(fields: str | None) -> tuple[str, ...] | None:
+        """Projection from a comma-separated `fields` parameter (None = every field)."""
+        if fields is None:
+            return None
+        requested = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+        invalid = [field for field in requested if field not in PROJECTABLE_FIELDS]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Invalid fields {invalid}, select from {list(PROJECTABLE_FIELDS)}")
+        return requested
 
     # ---- Routes ----
     def register_routes(self) -> None:
         @self.app.get("/")
-        def home_page() -> JSONResponse:
-            return JSONResponse(status_code=200, content={"message": "Patient Management System API"})
+        async def home_page() -> FastJSONResponse:
+            return FastJSONResponse(status_code=200, content={"message": "Patient Management System API"})
 
         @self.app.get("/about")
-        def about_page() -> JSONResponse:
-            return JSONResponse(status_code=200, content={"message": "A fully functional Patient Management System API"})
+        async def about_page() -> FastJSONResponse:
+            return FastJSONResponse(status_code=200, content={"message": "A fully functional Patient Management System API"})
+
+        @self.app.get("/health")
+        async def health_check() -> FastJSONResponse:
+            # Liveness only
+            return FastJSONResponse(status_code=200, content={
+                "status": "ok", "pid": os.getpid(), "uptime_s": round(time.time() - self.started_at, 1)
+            })
+
+        @self.app.get("/ready")
+        async def readiness_check(sync_lag: bool = Query(default=True)) -> FastJSONResponse:
+            is_ready, report = self.readiness(check_sync_lag=sync_lag)
+            return FastJSONResponse(status_code=200 if is_ready else 503, content=report)
+
+        @self.app.get("/events")
+        async def change_events(
+            since: int | None = Query(default=None, ge=0),
+            last_event_id: str | None = Header(default=None),
+        ) -> StreamingResponse:
+            # EventSource reconnects send Last-Event-ID; an explicit ?since= wins
+            if since is None and last_event_id is not None and last_event_id.strip().isdigit():
+                since = int(last_event_id)
+            logger.info(f"Change feed subscriber connected (since={since})")
+            return StreamingResponse(self.event_stream(since), media_type="text/event-stream",
+                                     headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        @self.app.get("/traces/{trace_id}")
+        async def get_trace(trace_id: str) -> FastJSONResponse:
+            # Spans of every process sharing the spans file (frontend and all workers)
+            spans = await asyncio.to_thread(tracing.exporter.find, trace_id)
+            if not spans:
+                raise HTTPException(status_code=404, detail="Trace not found")
+            on_path = tracing.critical_path(spans)
+            return FastJSONResponse(status_code=200, content={
+                "trace_id": trace_id,
+                "duration_ms": round((max(s["start"] + s["duration_ms"] / 1000 for s in spans) - spans[0]["start"]) * 1000, 3),
+                "critical_path": [s["span_id"] for s in spans if s["span_id"] in on_path],
+                "spans": spans,
+            })
 
         @self.app.get("/view")
-        def get_patients_data() -> JSONResponse:
-            data = self.load_data()
-            return JSONResponse(status_code=200, content=data.to_dict(orient="index"))
+        async def get_patients_data(
+            city: str | None = None,
+            gender: str | None = None,
+            verdict: str | None = None,
+            limit: int | None = Query(default=None, gt=0),
+            fields: str | None = None,
+        ) -> FastJSONResponse:
+            projection = self.parse_fields(fields)
+            body = await self.list_response("view", projection, filters=self.build_filters(city, gender, verdict), limit=limit)
+            return FastJSONResponse(status_code=200, content=body)
 
         @self.app.get("/patient/{patient_id}")
-        def get_patients_by_id(patient_id: str) -> JSONResponse:
-            data = self.load_data()
-            if patient_id in data.index:
+        async def get_patients_by_id(patient_id: str) -> FastJSONResponse:
+            patient = await self.load_patient(patient_id)
+            if patient is not None:
                 logger.info(f"Patient fetched: {patient_id}")
-                return JSONResponse(status_code=200, content=data.loc[patient_id].to_dict())
+                return FastJSONResponse(status_code=200, content=patient, headers={"ETag": f'"{patient.get("version", 1)}"'})
             else:
                 logger.warning(f"Patient not found: {patient_id}")
                 raise HTTPException(status_code=404, detail="Patient not found")
 
         @self.app.get("/sort")
-        def sort_patients(sort_by: str, order: str = "asc") -> JSONResponse:
-            valid_fields = ["height", "weight", "bmi", "age"]
+        async def sort_patients(
+            sort_by: str,
+            order: str = "asc",
+            city: str | None = None,
+            gender: str | None = None,
+            verdict: str | None = None,
+            limit: int | None = Query(default=None, gt=0),
+            fields: str | None = None,
+        ) -> FastJSONResponse:
+            projection = self.parse_fields(fields)
+            valid_fields = list(SORTABLE_FIELDS)
             if sort_by not in valid_fields:
                 logger.warning(f"Invalid sort attempt: {sort_by}")
                 raise HTTPException(status_code=400, detail=f"Invalid sort column, select from {valid_fields}")
             if order not in ["asc", "desc"]:
                 raise HTTPException(status_code=400, detail="Order must be 'asc' or 'desc'")
 
-            data = self.load_data()
-            ascending = order == "asc"
-            sorted_data = data.sort_values(by=sort_by, ascending=ascending)
-            logger.info(f"Patients sorted by {sort_by} ({order}).")
-            return JSONResponse(status_code=200, content=sorted_data.to_dict(orient="index"))
+            filters = self.build_filters(city, gender, verdict)
+            body = await self.list_response("sort", projection, sort_by=sort_by, order=order, filters=filters, limit=limit)
+            pushed_down = "engine" if self.engine.capabilities.native_sort else "in-process"
+            logger.info(f"Patients sorted by {sort_by} ({order}, {pushed_down}).")
+            return FastJSONResponse(status_code=200, content=body)
+
+        @self.app.get("/analytics")
+        async def patient_analytics(
+            by: str = "city",
+            metrics: str | None = None,
+            percentiles: str | None = None,
+        ) -> FastJSONResponse:
+            # Imported on first use: NumPy would add ~50 ms to every cold start
+            from src.backend import analytics
+            try:
+                dimensions = analytics.parse_list(by, analytics.GROUP_DIMENSIONS, (), "dimensions")
+                summarized = analytics.parse_list(metrics, analytics.ANALYTICS_METRICS, analytics.ANALYTICS_METRICS, "metrics")
+                quantiles = analytics.parse_percentiles(percentiles)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+            try:
+                body = await self.cached(
+                    ("analytics", dimensions, summarized, quantiles),
+                    lambda _: asyncio.to_thread(self.compute_analytics, dimensions, summarized, quantiles),
+                )
+            except Exception as e:
+                logger.error(f"Analytics failed: {e}")
+                raise HTTPException(status_code=500, detail="Failed to compute analytics")
+            return FastJSONResponse(status_code=200, content=body)
 
         @self.app.post("/create")
-        def create_patient(patient: Patient) -> JSONResponse:
-            data = self.load_data()
-            if patient.patient_id in data.index:
+        async def create_patient(patient: Patient) -> FastJSONResponse:
+            if await self.load_patient(patient.patient_id) is not None:
                 logger.warning(f"Create failed: Patient ID already exists ({patient.patient_id})")
                 raise HTTPException(status_code=400, detail="Patient ID already exists")
-            data.loc[patient.patient_id] = patient.model_dump(exclude=["patient_id"])
-            self.persist(data)
+            version = await self.persist(patient.patient_id, patient.model_dump(exclude=["patient_id"]), expected_version=0)
             logger.info(f"Patient created: {patient.patient_id}")
-            return JSONResponse(status_code=201, content={"message": "Patient created successfully", "patient": patient.model_dump()})
+            return FastJSONResponse(status_code=201, content={"message": "Patient created successfully", "patient": {**patient.model_dump(), "version": version}},
+                                headers={"ETag": f'"{version}"'})
 
         @self.app.put("/edit/{patient_id}")
-        def update_patient(patient_id: str, patient_update: PatientUpdate) -> JSONResponse:
-            data = self.load_data()
-            if patient_id not in data.index:
+        async def update_patient(patient_id: str, patient_update: PatientUpdate, if_match: str | None = Header(default=None)) -> FastJSONResponse:
+            existing_patient_info = await self.load_patient(patient_id)
+            if existing_patient_info is None:
                 logger.warning(f"Update failed: Patient not found ({patient_id})")
                 raise HTTPException(status_code=404, detail="Patient not found")
+            current_version = existing_patient_info.pop("version", 1)
+            self.check_if_match(patient_id, if_match, current_version)
 
-            existing_patient_info = data.loc[patient_id].to_dict()
             update_patient_info = patient_update.model_dump(exclude_unset=True)
             existing_patient_info.update(update_patient_info)
             existing_patient_info["patient_id"] = patient_id
 
             try:
                 validated = Patient(**existing_patient_info)
-                data.loc[patient_id] = validated.model_dump(exclude=["patient_id"])
-                self.persist(data)
+                version = await self.persist(patient_id, validated.model_dump(exclude=["patient_id"]), expected_version=current_version)
                 logger.info(f"Patient updated: {patient_id}")
-                return JSONResponse(status_code=200, content={"message": "Patient updated successfully", "patient": validated.model_dump()})
+                return FastJSONResponse(status_code=200, content={"message": "Patient updated successfully", "patient": {**validated.model_dump(), "version": version}},
+                                    headers={"ETag": f'"{version}"'})
             except ValidationError as e:
                 logger.error(f"Validation error while updating {patient_id}: {e}")
                 raise HTTPException(status_code=400, detail=f"Validation error: {e}")
 
+        @self.app.post("/import")
+        async def import_patients(
+            request: Request,
+            fmt: str | None = Query(default=None, alias="format"),
+            on_conflict: str = Query(default="overwrite"),
+        ) -> FastJSONResponse:
+            if fmt is None:
+                fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+            if fmt not in IMPORT_FORMATS:
+                raise HTTPException(status_code=400, detail=f"Invalid format, select from {list(IMPORT_FORMATS)}")
+            if on_conflict not in IMPORT_CONFLICT_MODES:
+                raise HTTPException(status_code=400, detail=f"Invalid on_conflict, select from {list(IMPORT_CONFLICT_MODES)}")
+            with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+                async for chunk in request.stream():
+                    spool.write(chunk)
+                spool.seek(0)
+                stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+                try:
+                    # Validation and persistence block, so they run off the event loop
+                    report = await run_in_threadpool(self.import_stream, stream, fmt, on_conflict)
+                except (ValueError, UnicodeDecodeError) as e:
+                    logger.warning(f"Import rejected: {e}")
+                    raise HTTPException(status_code=400, detail=f"Invalid import file: {e}")
+                except Exception as e:
+                    logger.error(f"Import failed: {e}")
+                    raise HTTPException(status_code=500, detail="Failed to import data")
+                finally:
+                    stream.detach()
+            logger.info(f"Import finished: {report.imported} imported ({report.overwritten} overwritten), {report.rejected} rejected")
+            return FastJSONResponse(status_code=200, content=report.to_dict())
+
         @self.app.delete("/delete/{patient_id}")
-        def delete_patient(patient_id: str) -> JSONResponse:
-            data = self.load_data()
-            if patient_id in data.index:
-                data = data.drop(index=patient_id)
-                self.persist(data)
-                logger.info(f"Patient deleted: {patient_id}")
-                return JSONResponse(status_code=200, content={"message": "Patient deleted successfully", "patient_id": patient_id})
-            else:
+        async def delete_patient(patient_id: str, if_match: str | None = Header(default=None)) -> FastJSONResponse:
+            existing_patient_info = await self.load_patient(patient_id)
+            if existing_patient_info is None:
                 logger.warning(f"Delete failed: Patient not found ({patient_id})")
                 raise HTTPException(status_code=404, detail="Patient not found")
+            current_version = existing_patient_info.get("version", 1)
+            self.check_if_match(patient_id, if_match, current_version)
+
+            await self.persist(patient_id, None, expected_version=current_version)
+            logger.info(f"Patient deleted: {patient_id}")
+            return FastJSONResponse(status_code=200, content={"message": "Patient deleted successfully", "patient_id": patient_id})
 
     def shutdown(self) -> None:
-        """Cleanup method to shutdown the thread pool."""
-        logger.info("Shutting down APIClient executor...")
-        self.executor.shutdown(wait=False)
+        """Cleanup method to stop the sync dispatcher and storage engine."""
+        logger.info("Shutting down APIClient coalescer and sync outbox...")
+        self.accepting = False
+        self.coalescer.stop()
+        if self.outbox is not None:
+            self.outbox.stop()
+        self.changes.close()
+        self.engine.close()
@@ -0,0 +1,127 @@
+import gc
+import json
+import random
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable
+from src.backend.columnar import PatientTable
+from src.backend.storage import StorageEngine, STORAGE_ENGINES, create_storage_engine
+
+CITIES = ["Mumbai", "Delhi", "Pune", "Hyderabad", "Chennai", "Kolkata", "Guwahati", "Bengaluru"]
+GENDERS = ["male", "female", "others"]
+
+
+def make_patients(count: int, seed: int = 42) -> dict[str, dict[str, Any]]:
+    """Generate a synthetic patient roster."""
+    rng = random.Random(seed)
+    patients = {}
+    for i in range(count):
+        height = round(rng.uniform(1.45, 1.95), 2)
+        weight = round(rng.uniform(40, 120), 1)
+        bmi = round(weight / height ** 2, 2)
+        verdict = "Underweight" if bmi < 18.5 else "Normal" if bmi < 25 else "Overweight" if bmi < 30 else "Obese"
+        patients[f"B{i:07d}"] = {
+            "name": f"Patient {i}",
+            "city": rng.choice(CITIES),
+            "age": rng.randint(1, 119),
+            "gender": rng.choice(GENDERS),
+            "height": height,
+            "weight": weight,
+            "bmi": bmi,
+            "verdict": verdict,
+        }
+    return patients
+
+
+def time_op(fn: Callable[[], Any], repeat: int) -> float:
+    """Return mean microseconds per call."""
+    start = perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (perf_counter() - start) / repeat * 1e6
+
+
+def benchmark_engine(engine: StorageEngine, patients: dict[str, dict[str, Any]], ops: int) -> dict[str, float]:
+    """Run the standard operation mix against one engine (µs per operation)."""
+    rng = random.Random(7)
+    ids = list(patients)
+    results: dict[str, float] = {}
+
+    start = perf_counter()
+    engine.batch(upserts=patients)
+    results["batch load"] = (perf_counter() - start) * 1e6
+
+    results["get"] = time_op(lambda: engine.get(rng.choice(ids)), ops)
+    results["scan"] = time_op(engine.scan, 3)
+    results["sorted_scan"] = time_op(lambda: engine.sorted_scan("bmi", "desc"), 3)
+    results["sorted_scan top 10"] = time_op(lambda: engine.sorted_scan("age", "asc", limit=10), 10)
+
+    def upsert_one() -> None:
+        patient_id = rng.choice(ids)
+        engine.upsert(patient_id, {**patients[patient_id], "age": rng.randint(1, 119)})
+
+    results["upsert"] = time_op(upsert_one, ops)
+
+    victims = iter(ids[:ops])
+    results["delete"] = time_op(lambda: engine.delete(next(victims)), min(ops, len(ids)))
+    return results
+
+
+def measure_memory(patients: dict[str, dict[str, Any]]) -> dict[str, float]:
+    """Bytes per patient held resident as a dict of dicts vs a PatientTable, both decoded from JSON like a seed file."""
+    encoded = json.dumps(patients)
+    results: dict[str, float] = {}
+    builders: dict[str, Callable[[], Any]] = {
+        "dict of dicts": lambda: json.loads(encoded),
+        "PatientTable": lambda: PatientTable.from_records(json.loads(encoded)),
+    }
+    for label, build in builders.items():
+        gc.collect()
+        tracemalloc.start()
+        resident = build()
+        gc.collect()
+        results[label] = tracemalloc.get_traced_memory()[0] / len(patients)
+        tracemalloc.stop()
+        del resident
+    return results
+
+
+def main() -> None:
+    """Compare storage engines side by side on the same synthetic workload."""
+    parser = argparse.ArgumentParser(description="Benchmark patient storage engines")
+    parser.add_argument("--engines", default="memory,json,sqlite", help=f"Comma-separated subset of {list(STORAGE_ENGINES)}")
+    parser.add_argument("--patients", type=int, default=10_000, help="Number of synthetic patients")
+    parser.add_argument("--ops", type=int, default=200, help="Single-row operations per measurement")
+    parser.add_argument("--memory", action="store_true", help="Only compare resident bytes per patient")
+    args = parser.parse_args()
+
+    patients = make_patients(args.patients)
+    if args.memory:
+        print(f"{args.patients} patients, resident bytes per patient")
+        for label, size in measure_memory(patients).items():
+            print(f"{label:<20}{size:>16,.0f}")
+        return
+
+    table: dict[str, dict[str, float]] = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in args.engines.split(","):
+            data_file = Path(tmp_dir) / f"{name}.json"
+            engine = create_storage_engine(name, data_file=data_file, sqlite_file=str(Path(tmp_dir) / f"{name}.db"))
+            try:
+                table[name] = benchmark_engine(engine, patients, args.ops)
+            finally:
+                engine.close()
+
+    names = list(table)
+    print(f"{args.patients} patients, µs per operation")
+    print(f"{'operation':<20}" + "".join(f"{name:>16}" for name in names))
+    for op in next(iter(table.values())):
+        print(f"{op:<20}" + "".join(f"{table[name][op]:>16,.1f}" for name in names))
+
+
+if __name__ == "__main__":
+    main()
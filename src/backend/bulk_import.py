@@ -0,0 +1,281 @@
+import io
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from pathlib import Path
+from itertools import chain
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional, TextIO
+from pydantic import ValidationError
+from utils.customlogger import CustomLogger
+from src.backend.orm import Patient
+from src.backend import config
+
+if TYPE_CHECKING:
+    from src.backend.outbox import SyncOutbox
+    from src.backend.storage import StorageEngine
+
+# Setting up custom logger
+logger = CustomLogger(name="BulkImportLogger", log_file="bulk_import.log").get_logger()
+
+# Accepted input formats
+IMPORT_FORMATS: tuple[str, ...] = ("csv", "ndjson")
+
+# What happens to a row whose patient_id already exists: updated with a bumped version, or rejected
+IMPORT_CONFLICT_MODES: tuple[str, ...] = ("overwrite", "reject")
+
+# Columns a CSV roster must have (bmi and verdict are computed, extra columns are ignored)
+REQUIRED_COLUMNS: tuple[str, ...] = ("patient_id", "name", "city", "age", "gender", "height", "weight")
+
+# A chunk of raw rows: (line number, CSV fields or NDJSON line)
+RawRows = list[tuple[int, Any]]
+
+# patient_id -> validated record (every field except patient_id)
+Records = dict[str, dict[str, Any]]
+
+
+@dataclass
+class ImportReport:
+    """Outcome of one import; errors holds the first max_errors rejected rows."""
+    rows: int = 0
+    imported: int = 0
+    overwritten: int = 0
+    rejected: int = 0
+    errors: list[dict[str, Any]] = field(default_factory=list)
+    errors_truncated: bool = False
+    elapsed_s: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "rows_per_s": round(self.rows / self.elapsed_s) if self.elapsed_s else None}
+
+
+# ---- Reading ----
+def read_chunks(stream: TextIO, fmt: str, chunk_size: int) -> Iterator[tuple[Optional[list[str]], RawRows]]:
+    """
+    Yield (CSV header or None, raw rows) chunks of at most chunk_size rows.
+    Only splitting happens here; parsing and validation are left to validate_chunk.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown import format '{fmt}', select from {list(IMPORT_FORMATS)}")
+    header: Optional[list[str]] = None
+    rows: RawRows = []
+    if fmt == "csv":
+        reader = csv.reader(stream)
+        header = [column.strip() for column in next(reader, [])]
+        missing = [column for column in REQUIRED_COLUMNS if column not in header]
+        if missing:
+            raise ValueError(f"CSV header is missing columns {missing}")
+        for fields in reader:
+            if fields:
+                rows.append((reader.line_num, fields))
+                if len(rows) >= chunk_size:
+                    yield header, rows
+                    rows = []
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                rows.append((line_number, line))
+                if len(rows) >= chunk_size:
+                    yield header, rows
+                    rows = []
+    if rows:
+        yield header, rows
+
+
+# ---- Validation (runs in pool processes) ----
+def validate_chunk(
+    header: Optional[list[str]], rows: RawRows
+) -> tuple[Records, list[dict[str, Any]], dict[str, int]]:
+    """
+    Validate raw rows against Patient; returns the valid records, one error entry per rejected row
+    and the line number of each valid record.
+    """
+    valid: Records = {}
+    errors: list[dict[str, Any]] = []
+    lines: dict[str, int] = {}
+    for line_number, payload in rows:
+        raw: dict[str, Any] = {}
+        try:
+            if header is None:
+                raw = json.loads(payload)
+                if not isinstance(raw, dict):
+                    raise ValueError("expected a JSON object")
+            else:
+                if len(payload) != len(header):
+                    raise ValueError(f"expected {len(header)} columns, got {len(payload)}")
+                raw = dict(zip(header, payload))
+            patient = Patient.model_validate(raw)
+        except ValidationError as e:
+            messages = [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()]
+            errors.append({"line": line_number, "patient_id": raw.get("patient_id"), "errors": messages})
+        except ValueError as e:
+            errors.append({"line": line_number, "patient_id": None, "errors": [str(e)]})
+        else:
+            valid[patient.patient_id] = patient.model_dump(exclude={"patient_id"})
+            lines[patient.patient_id] = line_number
+    return valid, errors, lines
+
+
+# ---- Import ----
+class BulkImporter:
+    """Streams a CSV/NDJSON roster in chunks, validated in a process pool and applied in file order."""
+
+    def __init__(
+        self,
+        apply: Callable[[Records], None],
+        workers: int = config.IMPORT_WORKERS,
+        chunk_size: int = config.IMPORT_CHUNK_SIZE,
+        max_errors: int = 1000,
+        on_error: Optional[Callable[[dict[str, Any]], None]] = None,
+        existing: Optional[Callable[[list[str]], dict[str, int]]] = None,
+        on_conflict: str = "overwrite",
+    ) -> None:
+        if on_conflict not in IMPORT_CONFLICT_MODES:
+            raise ValueError(f"Unknown conflict mode '{on_conflict}', select from {list(IMPORT_CONFLICT_MODES)}")
+        self.apply = apply
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.on_error = on_error
+        # Stored versions of the given patient ids that exist: rows for them are overwritten or rejected
+        self.existing = existing
+        self.on_conflict = on_conflict
+
+    def _collect(
+        self, report: ImportReport, rows: int, valid: Records, errors: list[dict[str, Any]], lines: dict[str, int]
+    ) -> None:
+        """Apply one validated chunk and record its outcome."""
+        present = self.existing(list(valid)) if self.existing is not None and valid else {}
+        if present and self.on_conflict == "reject":
+            for patient_id in present:
+                del valid[patient_id]
+                errors.append({"line": lines[patient_id], "patient_id": patient_id, "errors": ["Patient ID already exists"]})
+            errors.sort(key=lambda error: error["line"])
+        elif present:
+            report.overwritten += len(present)
+        if valid:
+            self.apply(valid)
+        report.rows += rows
+        report.imported += len(valid)
+        report.rejected += len(errors)
+        for error in errors:
+            if self.on_error is not None:
+                self.on_error(error)
+            if len(report.errors) < self.max_errors:
+                report.errors.append(error)
+            else:
+                report.errors_truncated = True
+
+    def run(self, stream: TextIO, fmt: str) -> ImportReport:
+        started = time.perf_counter()
+        report = ImportReport()
+        chunks = read_chunks(stream, fmt, self.chunk_size)
+
+        # Single-chunk inputs (and single-core hosts) are not worth starting a pool for
+        first, second = next(chunks, None), next(chunks, None)
+        ordered = chain((chunk for chunk in (first, second) if chunk is not None), chunks)
+        if second is None or self.workers == 1:
+            for header, rows in ordered:
+                self._collect(report, len(rows), *validate_chunk(header, rows))
+        else:
+            # spawn, not fork: the server process has running threads (coalescer, outbox dispatcher)
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+                in_flight: deque[tuple[int, Future]] = deque()
+                for header, rows in ordered:
+                    # At most 2 chunks per process in flight, so memory stays bounded
+                    in_flight.append((len(rows), pool.submit(validate_chunk, header, rows)))
+                    if len(in_flight) >= 2 * self.workers:
+                        rows_count, future = in_flight.popleft()
+                        self._collect(report, rows_count, *future.result())
+                while in_flight:
+                    rows_count, future = in_flight.popleft()
+                    self._collect(report, rows_count, *future.result())
+
+        report.elapsed_s = round(time.perf_counter() - started, 3)
+        logger.info(f"Imported {report.imported} of {report.rows} rows ({report.rejected} rejected) "
+                    f"in {report.elapsed_s:.2f}s with {self.workers} validation process(es)")
+        return report
+
+
+def persist_chunk(engine: "StorageEngine", outbox: Optional["SyncOutbox"], records: Records) -> None:
+    """Batched persistence step: one engine batch and (when mirroring) one outbox transaction per chunk."""
+    engine.batch(upserts=records)
+    if outbox is not None:
+        versions = engine.versions(records)
+        outbox.enqueue_many([
+            ("upsert", patient_id, {**record, "version": versions.get(patient_id, 1)})
+            for patient_id, record in records.items()
+        ])
+
+
+def detect_format(filename: str) -> str:
+    """Import format from a file extension (.csv, otherwise NDJSON)."""
+    return "csv" if filename.lower().endswith(".csv") else "ndjson"
+
+
+# ---- CLI ----
+def main() -> None:
+    """Import a roster file straight into the configured storage engine."""
+    parser = argparse.ArgumentParser(description="Bulk-import patients from a CSV or NDJSON file")
+    parser.add_argument("file", help="CSV (with a header row) or NDJSON file, '-' for stdin")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Input format (default: from the file extension)")
+    parser.add_argument("--workers", type=int, default=config.IMPORT_WORKERS,
+                        help="Validation processes (0 = one per CPU core)")
+    parser.add_argument("--chunk-size", type=int, default=config.IMPORT_CHUNK_SIZE, help="Rows per validation chunk")
+    parser.add_argument("--errors", help="Write every rejected row to this NDJSON file")
+    parser.add_argument("--on-conflict", choices=IMPORT_CONFLICT_MODES, default="overwrite",
+                        help="Rows for existing patients: update them (bumping the version) or reject them")
+    args = parser.parse_args()
+    if args.chunk_size < 1:
+        parser.error(f"--chunk-size must be at least 1, got {args.chunk_size}")
+
+    # Imported here so pool processes (which import this module) do not load the storage stack
+    from src.backend.outbox import SyncOutbox
+    from src.backend.storage import create_storage_engine
+
+    if config.STORAGE_ENGINE == "memory":
+        parser.error("The memory storage engine keeps nothing, import into json, sqlite or surrealdb")
+    fmt = args.format or detect_format(args.file)
+    data_file = Path(__file__).resolve().parents[2] / "data" / "patients.json"
+    engine = create_storage_engine(config.STORAGE_ENGINE, data_file=data_file, write_through=False,
+                                   shards=config.JSON_SHARDS, shard_bounds=config.JSON_SHARD_BOUNDS,
+                                   load_workers=config.JSON_LOAD_WORKERS)
+    # Mirror rows are only queued here; a running backend's dispatcher applies them to SurrealDB
+    outbox = SyncOutbox(data_file.parent / "sync_outbox.db") if config.SURREAL_MIRROR and engine.name != "surrealdb" else None
+    errors_file = open(args.errors, "w", encoding="utf-8") if args.errors else None
+    try:
+        importer = BulkImporter(
+            lambda records: persist_chunk(engine, outbox, records),
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            on_error=(lambda error: errors_file.write(json.dumps(error) + "\n")) if errors_file else None,
+            existing=engine.versions,
+            on_conflict=args.on_conflict,
+        )
+        if args.file == "-":
+            report = importer.run(io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline=""), fmt)
+        else:
+            with open(args.file, "r", encoding="utf-8-sig", newline="") as stream:
+                report = importer.run(stream, fmt)
+        engine.flush()
+    finally:
+        engine.close()
+        if outbox is not None:
+            outbox.stop()
+        if errors_file is not None:
+            errors_file.close()
+
+    summary = report.to_dict()
+    summary["errors"] = summary["errors"][:10]
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+from utils.customlogger import CustomLogger
+from src.backend.coalescer import Mutations
+from src.backend import config
+
+# Setting up custom logger
+logger = CustomLogger(name="ChangeFeedLogger", log_file="changefeed.log").get_logger()
+
+# A published event: {"seq", "op", "patient_id", "patient", "at"}. op is "upsert" (patient holds the
+# record with its version), "delete", or "reset": too much changed for deltas, subscribers should refetch
+ChangeEvent = dict[str, Any]
+
+
+class ChangeFeed:
+    """Sequenced log of patient mutations in a SQLite file shared by every worker process."""
+
+    def __init__(self, feed_file: Path, retention: int = config.CHANGEFEED_RETENTION, poll_interval: float = 0.25) -> None:
+        self.feed_file = Path(feed_file)
+        self.retention = retention
+        self.poll_interval = poll_interval
+
+        self.feed_file.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.feed_file, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                op TEXT NOT NULL,
+                patient_id TEXT,
+                payload TEXT,
+                at REAL NOT NULL
+            )
+            """
+        )
+        self._lock = threading.Lock()
+
+        # One wakeup event per subscriber on the server loop: publishes from this process set them
+        # right away, other workers' publishes are noticed by polling
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiters: set[asyncio.Event] = set()
+        self._closing = False
+
+        # Stats
+        self.subscribers: int = 0
+        self.published: int = 0
+
+        logger.info(f"ChangeFeed opened at {self.feed_file} (latest seq {self.latest_seq()})")
+
+    # ---- Publishing ----
+    def publish(self, mutations: Mutations) -> int:
+        """Append one event per mutated patient in one transaction; returns the last sequence number."""
+        now = time.time()
+        rows = [
+            ("delete", patient_id, None, now) if record is None
+            else ("upsert", patient_id, json.dumps(record), now)
+            for patient_id, record in mutations.items()
+        ]
+        return self._append(rows)
+
+    def publish_reset(self) -> int:
+        """Append a reset event: too much changed for deltas, subscribers should refetch."""
+        return self._append([("reset", None, None, time.time())])
+
+    def _append(self, rows: list[tuple[Any, ...]]) -> int:
+        if not rows:
+            return self.latest_seq()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("INSERT INTO changes (op, patient_id, payload, at) VALUES (?, ?, ?, ?)", rows)
+                seq = self._conn.execute("SELECT MAX(seq) FROM changes").fetchone()[0]
+                # Prune by sequence number: a range delete on the primary key
+                self._conn.execute("DELETE FROM changes WHERE seq <= ?", (seq - self.retention,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.published += len(rows)
+        self._notify()
+        return seq
+
+    def _notify(self) -> None:
+        """Wake this process's subscribers (safe from any thread)."""
+        if self._loop is not None and self._waiters:
+            try:
+                self._loop.call_soon_threadsafe(self._wake_all)
+            except RuntimeError:  # loop already closed during shutdown
+                pass
+
+    def _wake_all(self) -> None:
+        for waiter in self._waiters:
+            waiter.set()
+
+    # ---- Reading ----
+    def latest_seq(self) -> int:
+        with self._lock:
+            # sqlite_sequence survives pruning (and an empty table), so sequence numbers never go back
+            row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        return row[0] if row else 0
+
+    def oldest_seq(self) -> int:
+        """Sequence number of the oldest retained event (latest + 1 when none are retained)."""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(seq) FROM changes").fetchone()
+        return row[0] if row[0] is not None else self.latest_seq() + 1
+
+    def read_since(self, seq: int, limit: int = 500) -> list[ChangeEvent]:
+        """Events with a sequence number above seq, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, op, patient_id, payload, at FROM changes WHERE seq > ? ORDER BY seq LIMIT ?", (seq, limit)
+            ).fetchall()
+        return [
+            {"seq": seq, "op": op, "patient_id": patient_id, "patient": json.loads(payload) if payload else None, "at": at}
+            for seq, op, patient_id, payload, at in rows
+        ]
+
+    async def subscribe(self, since: Optional[int] = None, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[ChangeEvent]]:
+        """
+        Yield events after `since` as they are published (since=None: only new events); with a heartbeat,
+        None is yielded after that many idle seconds so the caller can send keepalives.
+        """
+        self._loop = asyncio.get_running_loop()
+        latest = await asyncio.to_thread(self.latest_seq)
+        position = latest if since is None else since
+        # A pruned `since` (or one from another feed file, i.e. ahead of this one) cannot be resumed
+        if since is not None and (since > latest or since + 1 < await asyncio.to_thread(self.oldest_seq)):
+            logger.info(f"Subscriber cannot resume from seq {since}, sending reset at {latest}")
+            yield {"seq": latest, "op": "reset", "patient_id": None, "patient": None, "at": time.time()}
+            position = latest
+
+        wakeup = asyncio.Event()
+        self._waiters.add(wakeup)
+        self.subscribers += 1
+        idle_since = time.monotonic()
+        try:
+            while not self._closing:
+                # Cleared before reading, so a publish that lands after the read still wakes us
+                wakeup.clear()
+                events = await asyncio.to_thread(self.read_since, position)
+                for event in events:
+                    position = event["seq"]
+                    yield event
+                if events:
+                    idle_since = time.monotonic()
+                    continue
+                if heartbeat is not None and time.monotonic() - idle_since >= heartbeat:
+                    idle_since = time.monotonic()
+                    yield None
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.discard(wakeup)
+            self.subscribers -= 1
+
+    def end_streams(self) -> None:
+        """Make every subscription return (server shutdown); clients reconnect and resume elsewhere or later."""
+        self._closing = True
+        self._notify()
+
+    def status(self) -> dict[str, Any]:
+        return {"latest_seq": self.latest_seq(), "subscribers": self.subscribers, "published": self.published}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+        logger.info("ChangeFeed closed")
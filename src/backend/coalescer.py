@@ -0,0 +1,122 @@
+import time
+import threading
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Callable, Optional
+from utils import tracing
+from utils.customlogger import CustomLogger
+
+# Setting up custom logger
+logger = CustomLogger(name="CoalescerLogger", log_file="coalescer.log").get_logger()
+
+# patient_id -> latest record (None means the patient was deleted)
+Mutations = dict[str, Optional[dict[str, Any]]]
+
+# patient_id -> traceparent of the request that wrote the latest record
+Traces = dict[str, str]
+
+
+class WriteCoalescer:
+    """Merges writes arriving within `window` seconds (or up to `max_batch` patients) into one `flush` call."""
+
+    def __init__(self, flush: Callable[[Mutations, Traces], None], window: float = 0.005, max_batch: int = 256) -> None:
+        self.flush = flush
+        self.window = window
+        self.max_batch = max_batch
+
+        # Latest state per patient_id (a later write replaces an earlier one in the same batch)
+        self._pending: Mutations = {}
+        self._traces: Traces = {}
+        self._waiters: list[Future] = []
+        self._contexts: list[tracing.SpanContext] = []
+        self._first_at: Optional[float] = None
+        self._cond = threading.Condition()
+        self._stopping = False
+
+        # Stats
+        self.submitted: int = 0
+        self.flushes: int = 0
+
+        self._thread = threading.Thread(target=self._run, name="write-coalescer", daemon=True)
+        self._thread.start()
+
+    def submit(self, patient_id: str, record: Optional[dict[str, Any]]) -> Future:
+        """Queue the latest state of one patient; the future resolves once it has been flushed."""
+        future: Future = Future()
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("WriteCoalescer is stopped")
+            self._pending.pop(patient_id, None)
+            self._pending[patient_id] = record
+            self._waiters.append(future)
+            self._contexts.extend(tracing.current()[:1])
+            traceparent = tracing.traceparent()
+            if traceparent is not None:
+                self._traces[patient_id] = traceparent
+            else:
+                self._traces.pop(patient_id, None)
+            self.submitted += 1
+            if self._first_at is None:
+                self._first_at = time.monotonic()
+            self._cond.notify()
+        return future
+
+    @property
+    def pending(self) -> int:
+        """Number of patients waiting for the next flush."""
+        return len(self._pending)
+
+    def _take_batch(self) -> tuple[Mutations, Traces, list[Future], list[tracing.SpanContext]]:
+        """Wait for the window to close (or the batch to fill) and take everything pending."""
+        with self._cond:
+            while not self._pending and not self._stopping:
+                self._cond.wait()
+            while not self._stopping and len(self._pending) < self.max_batch:
+                remaining = self._first_at + self.window - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, traces, waiters, contexts = self._pending, self._traces, self._waiters, self._contexts
+            self._pending, self._traces, self._waiters, self._contexts, self._first_at = {}, {}, [], [], None
+            return batch, traces, waiters, contexts
+
+    def _run(self) -> None:
+        while True:
+            batch, traces, waiters, contexts = self._take_batch()
+            if batch:
+                try:
+                    # The flush span belongs to the trace of every write in the batch
+                    with tracing.span("coalescer.flush", parents=contexts or None, patients=len(batch), writes=len(waiters)):
+                        self.flush(batch, traces)
+                    self.flushes += 1
+                    if len(waiters) > 1:
+                        logger.info(f"Coalesced {len(waiters)} writes into one flush of {len(batch)} patients")
+                except Exception as e:
+                    logger.error(f"Flush of {len(batch)} patients failed: {e}")
+                    self._resolve(waiters, e)
+                else:
+                    self._resolve(waiters, None)
+            with self._cond:
+                if self._stopping and not self._pending:
+                    return
+
+    @staticmethod
+    def _resolve(waiters: list[Future], error: Optional[Exception]) -> None:
+        """Complete the waiters of a flush; a waiter that was cancelled or gave up is skipped."""
+        for future in waiters:
+            if future.done():
+                continue
+            try:
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+            except InvalidStateError:
+                # Cancelled between the check and the call
+                pass
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush whatever is pending and stop the background thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
@@ -0,0 +1,466 @@
+from array import array
+from itertools import accumulate
+from typing import Any, Callable, Collection, Iterable, Iterator, Mapping, Optional
+from utils.customlogger import CustomLogger
+
+# Setting up custom logger
+logger = CustomLogger(name="ColumnarLogger", log_file="columnar.log").get_logger()
+
+# Field order of a materialized record (matches the JSON file and the SQLite columns)
+RECORD_FIELDS: tuple[str, ...] = ("name", "city", "age", "gender", "height", "weight", "bmi", "verdict", "version")
+
+# Low-cardinality string fields stored as interned codes
+CATEGORY_FIELDS: tuple[str, ...] = ("city", "gender", "verdict")
+
+# Numeric fields stored in typed arrays (array typecode per field)
+NUMERIC_FIELDS: dict[str, str] = {"age": "H", "height": "d", "weight": "d", "bmi": "d", "version": "I"}
+
+# Position of each field in a RECORD_FIELDS-ordered tuple
+_POSITIONS: dict[str, int] = {field: position for position, field in enumerate(RECORD_FIELDS)}
+
+# Hash index slot markers
+_EMPTY = -1
+_DELETED = -2
+
+
+# ---- Columns ----
+class StringColumn:
+    """Variable-length strings packed as UTF-8 in one buffer (start offset + byte length per row)."""
+
+    __slots__ = ("_data", "_starts", "_lengths", "garbage")
+
+    def __init__(self) -> None:
+        self._data = bytearray()
+        self._starts = array("Q")
+        self._lengths = array("I")
+        self.garbage: int = 0    # bytes no longer referenced by any row
+
+    def append(self, value: str) -> None:
+        encoded = value.encode("utf-8")
+        self._starts.append(len(self._data))
+        self._lengths.append(len(encoded))
+        self._data += encoded
+
+    def extend(self, values: Iterable[str]) -> None:
+        encoded = [value.encode("utf-8") for value in values]
+        lengths = array("I", map(len, encoded))
+        self._starts.extend(list(accumulate(lengths, initial=len(self._data)))[:-1])
+        self._lengths.extend(lengths)
+        self._data += b"".join(encoded)
+
+    def set(self, row: int, value: str) -> None:
+        encoded = value.encode("utf-8")
+        if encoded == self._raw(row):
+            return
+        self.garbage += self._lengths[row]
+        self._starts[row] = len(self._data)
+        self._lengths[row] = len(encoded)
+        self._data += encoded
+
+    def _raw(self, row: int) -> bytearray:
+        start = self._starts[row]
+        return self._data[start:start + self._lengths[row]]
+
+    def get(self, row: int) -> str:
+        return self._raw(row).decode("utf-8")
+
+    def take(self, rows: list[int]) -> list[str]:
+        """Strings of many rows; large ASCII takes decode the buffer once and slice it."""
+        starts, lengths = self._starts, self._lengths
+        if len(rows) * 4 >= len(starts) and self._data.isascii():
+            text = self._data.decode("ascii")
+            return [text[starts[row]:starts[row] + lengths[row]] for row in rows]
+        data = self._data
+        return [data[starts[row]:starts[row] + lengths[row]].decode("utf-8") for row in rows]
+
+    def equals(self, row: int, encoded: bytes) -> bool:
+        return self._lengths[row] == len(encoded) and self._raw(row) == encoded
+
+    def nbytes(self) -> int:
+        return len(self._data) + self._starts.itemsize * len(self._starts) + self._lengths.itemsize * len(self._lengths)
+
+
+class CategoryColumn:
+    """Interned strings: each distinct value is stored once and rows hold a 2-byte code."""
+
+    __slots__ = ("values", "_codes", "data")
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self._codes: dict[str, int] = {}
+        self.data = array("H")
+
+    def code_of(self, value: str) -> Optional[int]:
+        """Code of an existing value, or None if no row has ever used it."""
+        return self._codes.get(value)
+
+    def intern(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            if len(self.values) > 0xFFFF:
+                raise ValueError(f"Too many distinct values ({len(self.values)}) for a category column")
+            code = len(self.values)
+            self.values.append(value)
+            self._codes[value] = code
+        return code
+
+    def extend(self, values: Iterable[str]) -> None:
+        self.data.extend([self.intern(value) for value in values])
+
+    def get(self, row: int) -> str:
+        return self.values[self.data[row]]
+
+    def take(self, rows: list[int]) -> list[str]:
+        values, data = self.values, self.data
+        return [values[data[row]] for row in rows]
+
+    def nbytes(self) -> int:
+        return self.data.itemsize * len(self.data)
+
+
+# ---- Table ----
+class PatientTable:
+    """Struct-of-arrays store for the resident patient set; records are materialized as dicts only when read."""
+
+    def __init__(self) -> None:
+        self._ids = StringColumn()
+        self._names = StringColumn()
+        self._categories: dict[str, CategoryColumn] = {field: CategoryColumn() for field in CATEGORY_FIELDS}
+        self._numbers: dict[str, array] = {field: array(code) for field, code in NUMERIC_FIELDS.items()}
+        # Rows keep insertion order; deleted rows are tombstoned here and compacted away in bulk
+        self._alive = bytearray()
+        # patient_id -> row: open-addressing hash index over an int array (no per-patient objects)
+        self._slots = array("i", [_EMPTY]) * 8
+        self._filled = 0    # slots that are not empty (live rows + deleted markers)
+        self._live = 0
+
+    @classmethod
+    def from_records(cls, records: Mapping[str, Mapping[str, Any]]) -> "PatientTable":
+        """Build a table from { patient_id: record } (records without a version count as version 1)."""
+        # Keys of a mapping are unique, so columns are filled in bulk and the index is built once
+        table = cls()
+        patient_ids = list(records)
+        rows = [table._values(patient_id, record, None) for patient_id, record in records.items()]
+        table._ids.extend(patient_ids)
+        table._names.extend(row[0] for row in rows)
+        for field, column in table._categories.items():
+            position = _POSITIONS[field]
+            column.extend(row[position] for row in rows)
+        for field, column in table._numbers.items():
+            position = _POSITIONS[field]
+            try:
+                column.extend([row[position] for row in rows])
+            except (TypeError, OverflowError) as e:
+                raise ValueError(f"Invalid value for {field}: {e}") from None
+        table._alive = bytearray(b"\x01") * len(rows)
+        table._live = len(rows)
+        table._rehash(table._capacity_for(len(rows)), patient_ids)
+        return table
+
+    @classmethod
+    def concat(cls, tables: Iterable["PatientTable"]) -> "PatientTable":
+        """
+        One table with the live rows of tables whose patient ids do not overlap (e.g. shards built in
+        other processes): buffers are appended, category codes remapped, and the index built once.
+        """
+        merged = cls()
+        for table in tables:
+            if table._live != len(table._alive):
+                table.compact()
+            for target, source in ((merged._ids, table._ids), (merged._names, table._names)):
+                base = len(target._data)
+                target._starts.extend(array("Q", (start + base for start in source._starts)))
+                target._lengths.extend(source._lengths)
+                target._data += source._data
+                target.garbage += source.garbage
+            for field, column in merged._categories.items():
+                source = table._categories[field]
+                codes = [column.intern(value) for value in source.values]
+                if codes == list(range(len(codes))):
+                    column.data.extend(source.data)
+                else:
+                    column.data.extend(array("H", map(codes.__getitem__, source.data)))
+            for field, column in merged._numbers.items():
+                column.extend(table._numbers[field])
+            merged._alive += table._alive
+            merged._live += table._live
+        rows = len(merged._alive)
+        merged._rehash(merged._capacity_for(rows), merged._ids.take(list(range(rows))))
+        return merged
+
+    @staticmethod
+    def _values(patient_id: str, record: Mapping[str, Any], version: Optional[int]) -> tuple[Any, ...]:
+        """A record as a tuple in RECORD_FIELDS order (NumPy scalars unboxed)."""
+        try:
+            values = [record[field] for field in RECORD_FIELDS[:-1]]
+        except KeyError as e:
+            raise ValueError(f"Patient {patient_id} is missing field {e}") from None
+        values.append(version if version is not None else record.get("version", 1))
+        return tuple(value.item() if hasattr(value, "item") else value for value in values)
+
+    # ---- Hash index ----
+    def _probe(self, patient_id: str) -> tuple[int, int]:
+        """(slot, row) for patient_id; row is -1 when absent and slot is where it would be inserted."""
+        encoded = patient_id.encode("utf-8")
+        slots = self._slots
+        mask = len(slots) - 1
+        slot = hash(patient_id) & mask
+        free = -1
+        while True:
+            row = slots[slot]
+            if row == _EMPTY:
+                return (free if free >= 0 else slot), -1
+            if row == _DELETED:
+                if free < 0:
+                    free = slot
+            elif self._ids.equals(row, encoded):
+                return slot, row
+            slot = (slot + 1) & mask
+
+    @staticmethod
+    def _capacity_for(rows: int) -> int:
+        """Smallest power-of-two slot count that keeps the index at most half full."""
+        capacity = 8
+        while capacity < rows * 2:
+            capacity *= 2
+        return capacity
+
+    def _rehash(self, capacity: int, patient_ids: Optional[list[str]] = None) -> None:
+        """Rebuild the index with the given number of slots (patient_ids: every row's id, if known)."""
+        slots = array("i", [_EMPTY]) * capacity
+        mask = capacity - 1
+        alive = self._alive
+        for row in range(len(alive)):
+            if not alive[row]:
+                continue
+            slot = hash(patient_ids[row] if patient_ids is not None else self._ids.get(row)) & mask
+            while slots[slot] != _EMPTY:
+                slot = (slot + 1) & mask
+            slots[slot] = row
+        self._slots = slots
+        self._filled = self._live
+
+    def _reserve_slot(self) -> None:
+        """Keep the index at most two-thirds full (counting deleted markers)."""
+        if (self._filled + 1) * 3 >= len(self._slots) * 2:
+            self._rehash(self._capacity_for(self._live + 1))
+
+    def row_of(self, patient_id: str) -> Optional[int]:
+        row = self._probe(patient_id)[1]
+        return row if row >= 0 else None
+
+    # ---- Reads ----
+    def __len__(self) -> int:
+        return self._live
+
+    def __contains__(self, patient_id: object) -> bool:
+        return isinstance(patient_id, str) and self.row_of(patient_id) is not None
+
+    def _record(self, row: int) -> dict[str, Any]:
+        numbers = self._numbers
+        categories = self._categories
+        return {
+            "name": self._names.get(row),
+            "city": categories["city"].get(row),
+            "age": numbers["age"][row],
+            "gender": categories["gender"].get(row),
+            "height": numbers["height"][row],
+            "weight": numbers["weight"][row],
+            "bmi": numbers["bmi"][row],
+            "verdict": categories["verdict"].get(row),
+            "version": numbers["version"][row],
+        }
+
+    def _materialize(self, rows: list[int]) -> Iterator[tuple[str, dict[str, Any]]]:
+        """(patient_id, record) for the given rows, gathered column by column."""
+        everything = len(rows) == len(self._alive)
+        numbers = [
+            column.tolist() if everything else [column[row] for row in rows]
+            for column in self._numbers.values()
+        ]
+        cities, genders, verdicts = (self._categories[field].take(rows) for field in CATEGORY_FIELDS)
+        columns = zip(self._ids.take(rows), self._names.take(rows), cities, genders, verdicts, *numbers)
+        for patient_id, name, city, gender, verdict, age, height, weight, bmi, version in columns:
+            yield patient_id, {
+                "name": name,
+                "city": city,
+                "age": age,
+                "gender": gender,
+                "height": height,
+                "weight": weight,
+                "bmi": bmi,
+                "verdict": verdict,
+                "version": version,
+            }
+
+    def get(self, patient_id: str) -> Optional[dict[str, Any]]:
+        """Materialize one record (a fresh dict), or None."""
+        row = self.row_of(patient_id)
+        return self._record(row) if row is not None else None
+
+    def version_of(self, patient_id: str) -> int:
+        """Stored version, or 0 if the patient does not exist."""
+        row = self.row_of(patient_id)
+        return self._numbers["version"][row] if row is not None else 0
+
+    def rows(self) -> list[int]:
+        """Live rows in insertion order."""
+        alive = self._alive
+        return [row for row in range(len(alive)) if alive[row]]
+
+    def items(self) -> Iterator[tuple[str, dict[str, Any]]]:
+        """(patient_id, record) for every live row, materialized one at a time."""
+        return self._materialize(self.rows())
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        return dict(self._materialize(self.rows()))
+
+    def column(self, field: str) -> array:
+        """Raw typed array of a numeric field (indexed by row; includes tombstoned rows)."""
+        return self._numbers[field]
+
+    def category(self, field: str) -> tuple[list[str], array]:
+        """Labels and raw per-row codes of a category field (indexed by row; includes tombstoned rows)."""
+        column = self._categories[field]
+        return column.values, column.data
+
+    def live_mask(self) -> bytearray:
+        """One byte per row: 1 for live rows, 0 for tombstoned ones."""
+        return self._alive
+
+    def partitions(self, key: Callable[[str], int], wanted: Collection[int]) -> dict[int, dict[str, dict[str, Any]]]:
+        """
+        Records grouped by key(patient_id), for the wanted keys only: one pass over the ids, and only
+        rows of a wanted group are materialized (e.g. the shards that have to be rewritten).
+        """
+        groups: dict[int, list[int]] = {part: [] for part in wanted}
+        rows = self.rows()
+        for row, patient_id in zip(rows, self._ids.take(rows)):
+            group = groups.get(key(patient_id))
+            if group is not None:
+                group.append(row)
+        return {part: dict(self._materialize(group)) for part, group in groups.items()}
+
+    def select(
+        self,
+        filters: Optional[dict[str, Any]] = None,
+        sort_by: Optional[str] = None,
+        order: str = "asc",
+        limit: Optional[int] = None,
+    ) -> dict[str, dict[str, Any]]:
+        """Filter on category codes and sort on typed columns; only the returned rows are materialized."""
+        rows = self.rows()
+        for field, value in (filters or {}).items():
+            code = self._categories[field].code_of(value)
+            if code is None:
+                return {}
+            codes = self._categories[field].data
+            rows = [row for row in rows if codes[row] == code]
+        if sort_by is not None:
+            rows.sort(key=self._numbers[sort_by].__getitem__, reverse=order == "desc")
+        if limit is not None:
+            rows = rows[:limit]
+        return dict(self._materialize(rows))
+
+    # ---- Writes ----
+    def put(self, patient_id: str, record: Mapping[str, Any], version: Optional[int] = None) -> None:
+        """Insert or overwrite a patient in place; version defaults to record['version'] (or 1)."""
+        values = self._values(patient_id, record, version)
+        codes = [column.intern(values[_POSITIONS[field]]) for field, column in self._categories.items()]
+        slot, row = self._probe(patient_id)
+
+        # Numbers are written first: a value that does not fit its array is rolled back before anything else changes
+        written: list[tuple[array, Any]] = []
+        try:
+            for field, column in self._numbers.items():
+                value = values[_POSITIONS[field]]
+                if row >= 0:
+                    written.append((column, column[row]))
+                    column[row] = value
+                else:
+                    column.append(value)
+                    written.append((column, None))
+        except (TypeError, OverflowError) as e:
+            for column, previous in written:
+                if row >= 0:
+                    column[row] = previous
+                else:
+                    column.pop()
+            raise ValueError(f"Invalid value for patient {patient_id}: {e}") from None
+
+        if row >= 0:
+            self._names.set(row, values[0])
+            for column, code in zip(self._categories.values(), codes):
+                column.data[row] = code
+            garbage = self._names.garbage
+            if garbage > 1 << 20 and garbage * 2 > len(self._names._data):
+                self.compact()
+            return
+
+        row = len(self._alive)
+        self._ids.append(patient_id)
+        self._names.append(values[0])
+        for column, code in zip(self._categories.values(), codes):
+            column.data.append(code)
+        self._alive.append(1)
+        self._live += 1
+
+        if self._slots[slot] == _EMPTY:
+            self._filled += 1
+        self._slots[slot] = row
+        self._reserve_slot()
+
+    def remove(self, patient_id: str) -> bool:
+        """Tombstone a patient; returns False if it did not exist."""
+        slot, row = self._probe(patient_id)
+        if row < 0:
+            return False
+        self._slots[slot] = _DELETED
+        self._alive[row] = 0
+        self._live -= 1
+        dead = len(self._alive) - self._live
+        if dead > 1024 and dead > self._live:
+            self.compact()
+        return True
+
+    def compact(self) -> None:
+        """Drop tombstoned rows and unreferenced string bytes, then rebuild the index."""
+        before = len(self._alive)
+        compacted = PatientTable()
+        for patient_id, record in self.items():
+            compacted.put(patient_id, record)
+        self.__dict__.update(compacted.__dict__)
+        logger.info(f"Compacted patient table from {before} to {self._live} rows")
+
+    def copy(self) -> "PatientTable":
+        """Independent snapshot (column buffers are copied, not re-encoded)."""
+        clone = PatientTable.__new__(PatientTable)
+        clone._ids = self._copy_strings(self._ids)
+        clone._names = self._copy_strings(self._names)
+        clone._categories = {}
+        for field, column in self._categories.items():
+            copied = CategoryColumn()
+            copied.values, copied._codes, copied.data = list(column.values), dict(column._codes), array("H", column.data)
+            clone._categories[field] = copied
+        clone._numbers = {field: array(column.typecode, column) for field, column in self._numbers.items()}
+        clone._alive = bytearray(self._alive)
+        clone._slots = array("i", self._slots)
+        clone._filled = self._filled
+        clone._live = self._live
+        return clone
+
+    @staticmethod
+    def _copy_strings(column: StringColumn) -> StringColumn:
+        copied = StringColumn()
+        copied._data = bytearray(column._data)
+        copied._starts = array("Q", column._starts)
+        copied._lengths = array("I", column._lengths)
+        copied.garbage = column.garbage
+        return copied
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the column buffers and the index."""
+        total = self._ids.nbytes() + self._names.nbytes() + len(self._alive)
+        total += sum(column.nbytes() for column in self._categories.values())
+        total += sum(column.itemsize * len(column) for column in self._numbers.values())
+        return total + self._slots.itemsize * len(self._slots)
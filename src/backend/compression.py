@@ -0,0 +1,111 @@
+import gzip
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.customlogger import CustomLogger
+
+# zstd: stdlib on Python 3.14+, otherwise the backport or the zstandard package (urllib3 decodes with either)
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        from backports import zstd
+    except ImportError:
+        zstd = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Setting up custom logger
+logger = CustomLogger(name="CompressionLogger", log_file="compression.log").get_logger()
+
+# Encodings we can produce, in order of preference
+SUPPORTED_ENCODINGS: tuple[str, ...] = ("zstd", "gzip") if zstd is not None or zstandard is not None else ("gzip",)
+
+# Levels chosen for throughput: JSON already compresses ~5x at these settings
+GZIP_LEVEL: int = 5
+ZSTD_LEVEL: int = 3
+
+# Bodies above this are compressed on a worker thread instead of the event loop
+OFFLOAD_BYTES: int = 256 * 1024
+
+# Content types worth compressing
+_COMPRESSIBLE_TYPES: tuple[str, ...] = ("application/json", "application/x-ndjson", "text/")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick the preferred supported encoding from an Accept-Encoding header (None if none is acceptable)."""
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        token, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        accepted[token.strip().lower()] = quality
+    for encoding in SUPPORTED_ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        if zstd is not None:
+            return zstd.compress(body, level=ZSTD_LEVEL)
+        # Compressor objects are not thread-safe, and creating one is cheap
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compresses responses of at least minimum_size bytes with zstd or gzip, as the client accepts."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        logger.info(f"Response compression enabled ({', '.join(SUPPORTED_ENCODINGS)}) from {minimum_size} bytes")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            response_start, start = start, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=response_start["headers"])
+            # Streamed responses pass through untouched, so they are never buffered
+            if (message.get("more_body") or len(body) < self.minimum_size or "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(_COMPRESSIBLE_TYPES)):
+                await send(response_start)
+                await send(message)
+                return
+            if len(body) >= OFFLOAD_BYTES:
+                compressed = await run_in_threadpool(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(response_start)
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,66 @@
+import os
+
+# Storage engine: json | memory | sqlite | surrealdb
+STORAGE_ENGINE: str = os.getenv("PMS_STORAGE", "json")
+
+# Mirror every write to SurrealDB through the sync outbox (ignored when SurrealDB is the storage engine)
+SURREAL_MIRROR: bool = os.getenv("PMS_SURREAL_MIRROR", "1") == "1"
+
+# Number of uvicorn worker processes; above 1 the storage engine runs in shared (cross-process) mode
+WORKERS: int = int(os.getenv("PMS_WORKERS", "1"))
+
+# Write coalescing: writes within the window (or until the batch is full) share one flush
+COALESCE_WINDOW_MS: float = float(os.getenv("PMS_COALESCE_WINDOW_MS", "5"))
+COALESCE_MAX_BATCH: int = int(os.getenv("PMS_COALESCE_MAX_BATCH", "256"))
+
+# JSON store sharding: patients are split by patient_id into this many hash-partitioned files in data/patients.shards
+# (or range-partitioned at the comma-separated bounds, e.g. "P250,P500,P750" makes 4 shards); a write rewrites only
+# its shard. Shards are loaded by up to this many processes (0 = one per CPU core)
+JSON_SHARDS: int = int(os.getenv("PMS_JSON_SHARDS", "1"))
+JSON_SHARD_BOUNDS: tuple[str, ...] = tuple(b.strip() for b in os.getenv("PMS_JSON_SHARD_BOUNDS", "").split(",") if b.strip())
+JSON_LOAD_WORKERS: int = int(os.getenv("PMS_JSON_LOAD_WORKERS", "0"))
+
+# Whether write routes wait until their change has been flushed before responding
+WAIT_FOR_DURABILITY: bool = os.getenv("PMS_WAIT_FOR_DURABILITY", "1") == "1"
+DURABILITY_TIMEOUT_S: float = float(os.getenv("PMS_DURABILITY_TIMEOUT_S", "10"))
+
+# /ready reports not-ready while the oldest unsynced SurrealDB mutation is older than this (0 disables the check)
+READY_MAX_SYNC_LAG_S: float = float(os.getenv("PMS_READY_MAX_SYNC_LAG_S", "60"))
+
+# Bulk import: rows per validation chunk and validation processes (0 = one per CPU core)
+IMPORT_CHUNK_SIZE: int = int(os.getenv("PMS_IMPORT_CHUNK_SIZE", "5000"))
+IMPORT_WORKERS: int = int(os.getenv("PMS_IMPORT_WORKERS", "0"))
+
+# SurrealDB bulk writes (seeding, imports): records per INSERT statement (one transaction each) and statements in flight
+SURREAL_IMPORT_CHUNK: int = int(os.getenv("PMS_SURREAL_IMPORT_CHUNK", "1000"))
+SURREAL_IMPORT_CONCURRENCY: int = int(os.getenv("PMS_SURREAL_IMPORT_CONCURRENCY", "4"))
+
+# Responses of at least this many bytes are gzip/zstd-compressed when the client accepts it
+COMPRESS_MIN_BYTES: int = int(os.getenv("PMS_COMPRESS_MIN_BYTES", "1024"))
+
+# /view and /sort response bodies cached per dataset version (entries, total MB); 0 entries disables the cache
+RESULT_CACHE_ENTRIES: int = int(os.getenv("PMS_RESULT_CACHE_ENTRIES", "256"))
+RESULT_CACHE_MB: int = int(os.getenv("PMS_RESULT_CACHE_MB", "64"))
+
+# Live change feed (/events): number of most recent mutation events kept for resuming subscribers
+CHANGEFEED_RETENTION: int = int(os.getenv("PMS_CHANGEFEED_RETENTION", "10000"))
+
+# Request profiling: requests carrying this token (X-Profile header or ?profile=) are profiled, plus a random
+# fraction of all requests; with neither set the middleware is not installed at all
+PROFILE_TOKEN: str = os.getenv("PMS_PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE: float = float(os.getenv("PMS_PROFILE_SAMPLE_RATE", "0"))
+# Stack sampling interval and number of profiles kept in logs/profiles
+PROFILE_INTERVAL_MS: float = float(os.getenv("PMS_PROFILE_INTERVAL_MS", "1"))
+PROFILE_KEEP: int = int(os.getenv("PMS_PROFILE_KEEP", "50"))
+
+# Admission control per route class (per worker): requests running at once and waiting beyond that (limit 0 = no
+# limit); a full queue is answered 429, a wait longer than the queue timeout 503, both with Retry-After.
+# Reads have their own slots, so write storms and imports cannot starve them
+ADMISSION: bool = os.getenv("PMS_ADMISSION", "1") == "1"
+ADMIT_READ_LIMIT: int = int(os.getenv("PMS_ADMIT_READ_LIMIT", "128"))
+ADMIT_READ_QUEUE: int = int(os.getenv("PMS_ADMIT_READ_QUEUE", "512"))
+ADMIT_WRITE_LIMIT: int = int(os.getenv("PMS_ADMIT_WRITE_LIMIT", "64"))
+ADMIT_WRITE_QUEUE: int = int(os.getenv("PMS_ADMIT_WRITE_QUEUE", "256"))
+ADMIT_BULK_LIMIT: int = int(os.getenv("PMS_ADMIT_BULK_LIMIT", "1"))
+ADMIT_BULK_QUEUE: int = int(os.getenv("PMS_ADMIT_BULK_QUEUE", "1"))
+ADMIT_QUEUE_TIMEOUT_S: float = float(os.getenv("PMS_ADMIT_QUEUE_TIMEOUT_S", "2"))
@@ -1,10 +1,45 @@
-import json
-from surrealdb import AsyncSurreal
+import time
+import asyncio
+from typing import Any, AsyncIterator, Optional
+from contextlib import asynccontextmanager
 from utils.customlogger import CustomLogger
+from src.backend import config
 
 # Setting up custom logger
 logger = CustomLogger(name="DataBaseLogger", log_file="database.log").get_logger()
 
+# Fields stored for every patient (besides patient_id and version)
+PATIENT_FIELDS: tuple[str, ...] = ("name", "city", "age", "gender", "height", "weight", "bmi", "verdict")
+
+# SET clause assigning every patient field from $data
+_SET_FIELDS: str = ", ".join(["patient_id = $patient_id"] + [f"{field} = $data.{field}" for field in PATIENT_FIELDS])
+
+# Bulk insert of a $rows array; a patient that already exists takes the inserted fields and a new version
+_BULK_INSERT: str = (
+    "INSERT INTO patient $rows ON DUPLICATE KEY UPDATE "
+    + ", ".join(f"{field} = $input.{field}" for field in PATIENT_FIELDS)
+    + ", version += 1 RETURN NONE;"
+)
+
+# Fields that get a DEFINE INDEX (filter + sort fields)
+INDEXED_FIELDS: tuple[str, ...] = ("city", "gender", "verdict", "age", "bmi", "height", "weight")
+
+# Fields that may appear in WHERE / ORDER BY (identifiers cannot be bound as parameters)
+FILTERABLE_FIELDS: tuple[str, ...] = ("city", "gender", "verdict")
+SORTABLE_FIELDS: tuple[str, ...] = ("height", "weight", "bmi", "age")
+
+
+class BulkInsertError(Exception):
+    """A chunked import stopped at a failed chunk; patient ids are split by what happened to their chunk."""
+
+    def __init__(self, message: str, committed: list[str], not_written: list[str], uncertain: list[str]) -> None:
+        super().__init__(message)
+        self.committed = committed
+        # Failed or never sent
+        self.not_written = not_written
+        # In flight when the import was cancelled, so SurrealDB may still have committed them
+        self.uncertain = uncertain
+
 
 class SurrealDataBase:
     def __init__(self,
@@ -19,7 +54,10 @@ class SurrealDataBase:
         self.password = password
         self.namespace = namespace
         self.database = database
+        # Imported on first use: the SDK pulls in aiohttp/websockets, which would slow every cold start
+        from surrealdb import AsyncSurreal
         self.client = AsyncSurreal(self.url)
+        self.ready = False
 
     async def use_connection(self) -> None:
         """Connect to SurrealDB and select namespace + database"""
@@ -36,41 +74,249 @@ class SurrealDataBase:
             # Then use namespace and database
             await self.client.use(namespace=self.namespace, database=self.database)
             logger.info(f"Using namespace: {self.namespace}, database: {self.database}")
+            self.ready = True
             
         except Exception as e:
             logger.error(f"Connection error: {e}")
             raise
 
-    async def import_patients(self, patients_dict: dict) -> None:
+    async def import_patients(
+        self,
+        patients_dict: dict,
+        chunk_size: int = config.SURREAL_IMPORT_CHUNK,
+        concurrency: int = config.SURREAL_IMPORT_CONCURRENCY,
+    ) -> None:
         """
-        Dump patients dictionary into SurrealDB exactly as in JSON file.
+        Bulk-write patients as one INSERT per chunk of chunk_size records, up to `concurrency` chunks at a time.
         patients_dict format: { patient_id: {name: ..., age: ...}, ... }
         """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+        rows = [
+            {"id": patient_id, "patient_id": patient_id, **patient_data, "version": patient_data.get("version", 1)}
+            for patient_id, patient_data in patients_dict.items()
+        ]
+        chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        slots = asyncio.Semaphore(max(concurrency, 1))
+        sent: set[int] = set()
+        committed: set[int] = set()
+        failed: dict[int, Exception] = {}
+
+        async def insert(index: int) -> None:
+            async with slots:
+                sent.add(index)
+                # Each INSERT is its own transaction: committed chunks stay written and a re-run is harmless
+                try:
+                    response = await self.client.query_raw(_BULK_INSERT, {"rows": chunks[index]})
+                    if response.get("error") is not None:
+                        raise Exception(response["error"])
+                    errors = [r for r in response.get("result", []) if r.get("status") != "OK"]
+                    if errors:
+                        raise Exception(f"Insert of {len(chunks[index])} patients failed: {errors[0].get('result')}")
+                except Exception as e:
+                    failed[index] = e
+                    raise
+            committed.add(index)
+
+        def ids(indexes: set[int]) -> list[str]:
+            return [row["patient_id"] for index in sorted(indexes) for row in chunks[index]]
+
+        started = time.perf_counter()
         try:
-            # Start a transaction to ensure all data is committed
-            transaction_queries = []
-            
-            for patient_id, patient_data in patients_dict.items():
-                # Create the patient record with the exact structure from JSON
-                # Use the patient_id as part of the record ID for easy reference
-                record_data = {
-                    "patient_id": patient_id,  # Keep the original ID as a field
-                    **patient_data  # Include all the patient data exactly as in JSON
-                }
-                
-                # Add to transaction
-                transaction_queries.append(f"""
-                    CREATE patient:{patient_id} CONTENT {json.dumps(record_data)};
-                """)
-            
-            # Execute all queries in a transaction to ensure atomic commit
-            if transaction_queries:
-                transaction_query = "BEGIN TRANSACTION;\n" + "\n".join(transaction_queries) + "\nCOMMIT;"
-                result = await self.client.query(transaction_query)
-                logger.info(f"Transaction completed: {len(patients_dict)} patients imported")
-                
+            # The first failure cancels the other chunks and waits for them, so nothing is written after we return
+            async with asyncio.TaskGroup() as group:
+                for index in range(len(chunks)):
+                    group.create_task(insert(index))
+        except ExceptionGroup:
+            uncertain = sent - committed - failed.keys()
+            first = min(failed)
+            error = BulkInsertError(
+                f"Import stopped at chunk {first + 1} of {len(chunks)} ({chunks[first][0]['patient_id']}.."
+                f"{chunks[first][-1]['patient_id']}): {failed[first]}; {len(committed)} chunks committed, "
+                f"{len(chunks) - len(committed) - len(uncertain)} not written, {len(uncertain)} cancelled in flight",
+                committed=ids(committed),
+                not_written=ids(set(range(len(chunks))) - committed - uncertain),
+                uncertain=ids(uncertain),
+            )
+            logger.error(f"Error importing patients: {error}")
+            raise error from failed[first]
+        logger.info(f"Imported {len(rows)} patients in chunks of {chunk_size} ({concurrency} in flight) "
+                    f"in {time.perf_counter() - started:.2f}s")
+
+    async def select_patient(self, patient_id: str) -> dict | None:
+        """Fetch one patient record by ID."""
+        try:
+            result = await self.client.query(
+                "SELECT * OMIT id FROM type::thing('patient', $patient_id);",
+                {"patient_id": patient_id},
+            )
+            if not result:
+                return None
+            record = dict(result[0])
+            record.pop("patient_id", None)
+            return record
+        except Exception as e:
+            logger.error(f"Error selecting patient {patient_id}: {e}")
+            raise
+
+    async def define_indexes(self) -> None:
+        """Define the patient table and indexes on the filter and sort fields (idempotent)."""
+        try:
+            statements = [
+                "DEFINE TABLE IF NOT EXISTS patient SCHEMALESS;",
+                "DEFINE INDEX IF NOT EXISTS patient_patient_id ON TABLE patient FIELDS patient_id UNIQUE;",
+            ]
+            statements += [
+                f"DEFINE INDEX IF NOT EXISTS patient_{field} ON TABLE patient FIELDS {field};"
+                for field in INDEXED_FIELDS
+            ]
+            await self.client.query("\n".join(statements))
+            logger.info(f"Indexes defined on patient: {', '.join(INDEXED_FIELDS)}")
+        except Exception as e:
+            logger.error(f"Error defining indexes: {e}")
+            raise
+
+    async def select_patients(
+        self,
+        filters: Optional[dict] = None,
+        sort_by: Optional[str] = None,
+        order: str = "asc",
+        limit: Optional[int] = None,
+    ) -> dict:
+        """
+        Fetch patients as { patient_id: {name: ..., age: ...}, ... }.
+        Filtering, ordering and limiting are pushed down into SurrealQL; values are bound parameters.
+        """
+        query = "SELECT * OMIT id FROM patient"
+        params: dict = {}
+
+        if filters:
+            clauses = []
+            for field, value in filters.items():
+                if field not in FILTERABLE_FIELDS:
+                    raise ValueError(f"Cannot filter on field '{field}', select from {list(FILTERABLE_FIELDS)}")
+                clauses.append(f"{field} = ${field}")
+                params[field] = value
+            query += " WHERE " + " AND ".join(clauses)
+
+        if sort_by is not None:
+            if sort_by not in SORTABLE_FIELDS:
+                raise ValueError(f"Cannot sort on field '{sort_by}', select from {list(SORTABLE_FIELDS)}")
+            query += f" ORDER BY {sort_by} {'DESC' if order == 'desc' else 'ASC'}"
+        else:
+            query += " ORDER BY patient_id ASC"
+
+        if limit is not None:
+            query += " LIMIT $limit"
+            params["limit"] = int(limit)
+
+        try:
+            result = await self.client.query(query + ";", params)
+            patients = {}
+            for row in result or []:
+                record = dict(row)
+                patients[record.pop("patient_id")] = record
+            return patients
+        except Exception as e:
+            logger.error(f"Error selecting patients: {e}")
+            raise
+
+    async def count_patients(self) -> int:
+        """Return the number of patient records."""
+        try:
+            result = await self.client.query("SELECT count() FROM patient GROUP ALL;")
+            return int(result[0]["count"]) if result else 0
+        except Exception as e:
+            logger.error(f"Error counting patients: {e}")
+            raise
+
+    async def upsert_patient(self, patient_id: str, patient_data: dict) -> None:
+        """Create or replace one patient record, bumping its version."""
+        try:
+            await self.client.query(
+                f"UPSERT type::thing('patient', $patient_id) SET {_SET_FIELDS}, version += 1 RETURN NONE;",
+                {"patient_id": patient_id, "data": patient_data},
+            )
+        except Exception as e:
+            logger.error(f"Error upserting patient {patient_id}: {e}")
+            raise
+
+    async def compare_and_set(self, patient_id: str, expected_version: int, patient_data: dict) -> bool:
+        """
+        Write one patient only if its stored version equals expected_version (0 = must not exist).
+        Returns False if the version did not match.
+        """
+        if expected_version == 0:
+            query = f"CREATE type::thing('patient', $patient_id) SET {_SET_FIELDS}, version = 1;"
+        else:
+            query = (
+                f"UPDATE type::thing('patient', $patient_id) SET {_SET_FIELDS}, version += 1 "
+                "WHERE version = $expected RETURN AFTER;"
+            )
+        try:
+            response = await self.client.query_raw(
+                query, {"patient_id": patient_id, "data": patient_data, "expected": expected_version}
+            )
+            if response.get("error") is not None:
+                raise Exception(response["error"])
+            statement = response["result"][0]
+            # CREATE on an existing record fails the statement; UPDATE ... WHERE returns nothing on mismatch
+            return statement.get("status") == "OK" and bool(statement.get("result"))
+        except Exception as e:
+            logger.error(f"Error in compare-and-set for patient {patient_id}: {e}")
+            raise
+
+    async def compare_and_delete(self, patient_id: str, expected_version: int) -> bool:
+        """Delete one patient only if its stored version equals expected_version."""
+        try:
+            result = await self.client.query(
+                "DELETE type::thing('patient', $patient_id) WHERE version = $expected RETURN BEFORE;",
+                {"patient_id": patient_id, "expected": expected_version},
+            )
+            return bool(result)
         except Exception as e:
-            logger.error(f"Error importing patients: {e}")
+            logger.error(f"Error in compare-and-delete for patient {patient_id}: {e}")
+            raise
+
+    async def delete_patient(self, patient_id: str) -> bool:
+        """Delete one patient record; returns False if it did not exist."""
+        try:
+            result = await self.client.query(
+                "DELETE type::thing('patient', $patient_id) RETURN BEFORE;",
+                {"patient_id": patient_id},
+            )
+            return bool(result)
+        except Exception as e:
+            logger.error(f"Error deleting patient {patient_id}: {e}")
+            raise
+
+    async def apply_mutations(self, mutations: list[dict]) -> None:
+        """
+        Apply outbox mutations in one transaction (idempotent by record ID, so a batch can be replayed).
+        mutations format: [{"op": "upsert" | "delete", "patient_id": ..., "data": {...}}, ...]
+        """
+        if not mutations:
+            return
+        try:
+            statements = ["BEGIN TRANSACTION;"]
+            params: dict = {}
+            for i, mutation in enumerate(mutations):
+                params[f"id{i}"] = mutation["patient_id"]
+                if mutation["op"] == "delete":
+                    statements.append(f"DELETE type::thing('patient', $id{i});")
+                else:
+                    params[f"data{i}"] = {"patient_id": mutation["patient_id"], **mutation["data"]}
+                    statements.append(f"UPSERT type::thing('patient', $id{i}) CONTENT $data{i} RETURN NONE;")
+            statements.append("COMMIT TRANSACTION;")
+            response = await self.client.query_raw("\n".join(statements), params)
+            if response.get("error") is not None:
+                raise Exception(response["error"])
+            failed = [r for r in response.get("result", []) if r.get("status") != "OK"]
+            if failed:
+                raise Exception(f"Transaction failed: {failed[0].get('result')}")
+            logger.info(f"Transaction completed: {len(mutations)} mutations applied")
+        except Exception as e:
+            logger.error(f"Error applying mutations: {e}")
             raise
 
     async def close_connection(self) -> None:
@@ -79,4 +325,72 @@ class SurrealDataBase:
             await self.client.close()
             logger.info("Database connection closed")
         except Exception as e:
-            logger.error(f"Error closing connection: {e}")
\ No newline at end of file
+            logger.error(f"Error closing connection: {e}")
+
+
+class SurrealConnectionPool:
+    """Fixed-size pool of signed-in SurrealDB connections, bound to the event loop that opened it."""
+
+    def __init__(self, size: int = 4, **db_options) -> None:
+        self.size = size
+        self.db_options = db_options
+        self._idle: Optional[asyncio.Queue] = None
+        self._connections: list[SurrealDataBase] = []
+
+    async def _new_connection(self) -> SurrealDataBase:
+        db = SurrealDataBase(**self.db_options)
+        await db.use_connection()
+        return db
+
+    async def open(self) -> None:
+        """Open every connection in the pool."""
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            db = await self._new_connection()
+            self._connections.append(db)
+            self._idle.put_nowait(db)
+        logger.info(f"Connection pool opened with {self.size} connections")
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[SurrealDataBase]:
+        """
+        Borrow a connection; one that failed or was cancelled mid-query is swapped for a fresh one
+        that signs in on next borrow.
+        """
+        if self._idle is None:
+            raise RuntimeError("Connection pool is not open")
+        db = await self._idle.get()
+        try:
+            if not db.ready:
+                await db.use_connection()
+            yield db
+        except ValueError:
+            raise
+        except BaseException:
+            # A reply may still be in flight on this connection, so it is never handed out again
+            self._connections.remove(db)
+            broken, db = db, SurrealDataBase(**self.db_options)
+            self._connections.append(db)
+            await broken.close_connection()
+            raise
+        finally:
+            self._idle.put_nowait(db)
+
+    def status(self) -> dict[str, Any]:
+        """Pool state for health checks (no round trips; safe to call from any thread)."""
+        idle = self._idle.qsize() if self._idle is not None else 0
+        return {
+            "open": self._idle is not None,
+            "size": self.size,
+            "idle": idle,
+            "in_use": len(self._connections) - idle if self._idle is not None else 0,
+            "signed_in": sum(1 for db in self._connections if db.ready),
+        }
+
+    async def close(self) -> None:
+        """Close every pooled connection."""
+        for db in self._connections:
+            await db.close_connection()
+        self._connections.clear()
+        self._idle = None
+        logger.info("Connection pool closed")
@@ -0,0 +1,368 @@
+import json
+import time
+import random
+import asyncio
+import contextlib
+import concurrent.futures
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional
+from utils import tracing
+from utils.filelock import FileLock
+from utils.customlogger import CustomLogger
+from src.backend.database import SurrealDataBase
+
+# Setting up custom logger
+logger = CustomLogger(name="OutboxLogger", log_file="outbox.log").get_logger()
+
+
+class OutboxFullError(Exception):
+    """Raised when the outbox stays above its depth limit for the whole backpressure timeout."""
+
+    def __init__(self, depth: int, retry_after: int) -> None:
+        super().__init__(f"Sync outbox is full ({depth} pending mutations)")
+        self.depth = depth
+        self.retry_after = retry_after
+
+
+class SyncOutbox:
+    """Durable queue of pending SurrealDB mutations in a local SQLite file, drained by a background dispatcher."""
+
+    def __init__(
+        self,
+        outbox_file: Path,
+        db_factory: Callable[[], SurrealDataBase] = SurrealDataBase,
+        batch_size: int = 200,
+        max_depth: int = 10_000,
+        backpressure_timeout: float = 5.0,
+        base_delay: float = 0.5,
+        max_delay: float = 60.0,
+        poll_interval: float = 1.0,
+        isolate_after: int = 3,
+        max_attempts: int = 10,
+    ) -> None:
+        self.outbox_file = Path(outbox_file)
+        self.db_factory = db_factory
+        self.batch_size = batch_size
+        self.max_depth = max_depth
+        self.backpressure_timeout = backpressure_timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.isolate_after = isolate_after
+        self.max_attempts = max_attempts
+
+        # True when the outbox file did not exist yet (caller may want to enqueue a full snapshot)
+        self.created: bool = not self.outbox_file.exists()
+
+        self.outbox_file.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.outbox_file, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                op TEXT NOT NULL,
+                patient_id TEXT NOT NULL,
+                payload TEXT,
+                enqueued_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                trace TEXT
+            )
+            """
+        )
+        # Entries SurrealDB rejected max_attempts times, kept for inspection and manual replay
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox_dead (
+                seq INTEGER PRIMARY KEY,
+                op TEXT NOT NULL,
+                patient_id TEXT NOT NULL,
+                payload TEXT,
+                enqueued_at REAL NOT NULL,
+                attempts INTEGER NOT NULL,
+                last_error TEXT,
+                trace TEXT,
+                failed_at REAL NOT NULL
+            )
+            """
+        )
+        # Outbox files from before tracing lack the trace column
+        if "trace" not in {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}:
+            try:
+                self._conn.execute("ALTER TABLE outbox ADD COLUMN trace TEXT")
+            except sqlite3.OperationalError:
+                pass  # another worker added it first
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._leader_lock = FileLock(self.outbox_file.with_suffix(self.outbox_file.suffix + ".leader"))
+        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[concurrent.futures.Future] = None
+
+        # Dispatcher stats
+        self.last_success_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.dead_lettered: int = 0
+
+        logger.info(f"SyncOutbox opened at {self.outbox_file} with {self.depth} pending mutations")
+
+    # ---- Producer side ----
+    @property
+    def depth(self) -> int:
+        """Number of mutations waiting to be applied (read from the file, so it covers every worker)."""
+        with self._lock:
+            # Applied entries are always deleted as a prefix, so the seq span is the queue length
+            return self._conn.execute("SELECT COALESCE(MAX(seq) - MIN(seq) + 1, 0) FROM outbox").fetchone()[0]
+
+    def status(self) -> dict[str, Any]:
+        """
+        Queue depth, sync lag and dispatcher state for health checks (indexed lookups, no scans of the
+        queue; the dead-letter count scans outbox_dead, which stays small).
+        """
+        with self._lock:
+            depth, oldest_at, attempts, dead = self._conn.execute(
+                "SELECT COALESCE(MAX(seq) - MIN(seq) + 1, 0), "
+                "(SELECT enqueued_at FROM outbox ORDER BY seq LIMIT 1), "
+                "(SELECT attempts FROM outbox ORDER BY seq LIMIT 1), "
+                "(SELECT COUNT(*) FROM outbox_dead) FROM outbox"
+            ).fetchone()
+        return {
+            "depth": depth,
+            "max_depth": self.max_depth,
+            # Age of the oldest mutation SurrealDB has not applied yet (0 when caught up)
+            "lag_s": round(time.time() - oldest_at, 3) if oldest_at is not None else 0.0,
+            "head_attempts": attempts or 0,
+            # Entries given up on (see the outbox_dead table)
+            "dead_letters": dead,
+            "dispatcher": (self._thread is not None and self._thread.is_alive())
+                          or (self._task is not None and not self._task.done()),
+            "leader": self._leader_lock.held,
+            "last_success_at": self.last_success_at,
+            "last_error": self.last_error,
+        }
+
+    def wait_for_capacity(self) -> None:
+        """Block while the outbox is over max_depth; raise OutboxFullError after backpressure_timeout."""
+        depth = self.depth
+        if depth < self.max_depth:
+            return
+        logger.warning(f"Outbox at depth {depth}, applying backpressure")
+        deadline = time.monotonic() + self.backpressure_timeout
+        while depth >= self.max_depth:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise OutboxFullError(depth, retry_after=max(1, int(self.backpressure_timeout)))
+            # Woken early by our own dispatcher; polls when another worker is the leader
+            with self._not_full:
+                self._not_full.wait(min(remaining, 0.05))
+            depth = self.depth
+
+    async def await_capacity(self) -> None:
+        """wait_for_capacity for the event loop: sleeps between checks instead of blocking the thread."""
+        depth = self.depth
+        if depth < self.max_depth:
+            return
+        logger.warning(f"Outbox at depth {depth}, applying backpressure")
+        deadline = time.monotonic() + self.backpressure_timeout
+        while depth >= self.max_depth:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise OutboxFullError(depth, retry_after=max(1, int(self.backpressure_timeout)))
+            await asyncio.sleep(min(remaining, 0.05))
+            depth = self.depth
+
+    def enqueue(self, op: str, patient_id: str, data: Optional[dict[str, Any]] = None) -> None:
+        """Durably record one mutation ("upsert" or "delete")."""
+        self.enqueue_many([(op, patient_id, data)])
+
+    def enqueue_many(self, mutations: list[tuple[str, str, Optional[dict[str, Any]]]],
+                     traces: Optional[dict[str, str]] = None) -> None:
+        """
+        Durably record several mutations in one local transaction. traces maps patient ids to the
+        traceparent of the write, so the later SurrealDB sync is recorded in the same trace.
+        """
+        if not mutations:
+            return
+        now = time.time()
+        traces = traces or {}
+        rows = [
+            (op, patient_id, json.dumps(data) if data is not None else None, now, traces.get(patient_id))
+            for op, patient_id, data in mutations
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO outbox (op, patient_id, payload, enqueued_at, trace) VALUES (?, ?, ?, ?, ?)", rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._wakeup.set()
+
+    # ---- Dispatcher ----
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """
+        Start the dispatcher (replays anything left over from a previous run): as a task on `loop`
+        (the server's event loop) when given, otherwise on a thread with its own loop.
+        """
+        if self._thread is not None or self._task is not None:
+            return
+        if loop is not None:
+            self._task = asyncio.run_coroutine_threadsafe(self._dispatch_loop(), loop)
+            return
+        self._thread = threading.Thread(target=self._run_dispatcher, name="sync-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the dispatcher; pending mutations stay on disk for the next start.
+        Must not be called from the event loop running the dispatcher task.
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._task is not None:
+            try:
+                self._task.result(timeout)
+            except Exception as e:
+                logger.error(f"Dispatcher task did not stop cleanly: {e}")
+            self._task = None
+        logger.info(f"SyncOutbox stopped with {self.depth} pending mutations")
+        self._leader_lock.release()
+        with self._lock:
+            self._conn.close()
+
+    def _next_batch(self) -> tuple[list[tuple[int, str, str, Optional[str], int, Optional[str]]], float]:
+        """Oldest entries in sequence order, or ([], seconds to wait) while the head is backing off."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, op, patient_id, payload, attempts, trace, next_attempt_at FROM outbox ORDER BY seq LIMIT ?",
+                (self.batch_size,),
+            ).fetchall()
+        if not rows:
+            return [], self.poll_interval
+        # The head blocks the queue, so mutations for one patient are never applied out of order
+        wait = rows[0][6] - time.time()
+        if wait > 0:
+            return [], min(wait, self.poll_interval)
+        # A head that keeps failing is sent alone, so a rejected entry is told apart from its batch
+        if rows[0][4] >= self.isolate_after:
+            rows = rows[:1]
+        return [row[:6] for row in rows], 0.0
+
+    @staticmethod
+    def _collapse(batch: list[tuple[int, str, str, Optional[str], int, Optional[str]]]) -> list[dict[str, Any]]:
+        """Keep only the latest mutation per patient within a batch."""
+        latest: dict[str, dict[str, Any]] = {}
+        for _, op, patient_id, payload, *_ in batch:
+            latest.pop(patient_id, None)
+            latest[patient_id] = {"op": op, "patient_id": patient_id, "data": json.loads(payload) if payload else None}
+        return list(latest.values())
+
+    def _ack(self, seqs: list[int]) -> None:
+        """Drop an applied batch (always a prefix of the queue) and wake blocked producers."""
+        with self._not_full:
+            self._conn.execute("DELETE FROM outbox WHERE seq <= ?", (max(seqs),))
+            self._not_full.notify_all()
+
+    def _retry_later(self, batch: list[tuple[int, str, str, Optional[str], int, Optional[str]]], error: str) -> float:
+        """Bump attempts and schedule the batch with exponential backoff plus jitter; returns the delay."""
+        attempts = max(row[4] for row in batch) + 1
+        delay = self._backoff(attempts)
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE seq = ?",
+                ((attempts, time.time() + delay, error, row[0]) for row in batch),
+            )
+        return delay
+
+    def _dead_letter(self, entry: tuple[int, str, str, Optional[str], int, Optional[str]], error: str) -> None:
+        """Move a rejected head entry to outbox_dead (one transaction) so the queue behind it can proceed."""
+        seq, op, patient_id, payload, attempts, trace = entry
+        with self._not_full:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO outbox_dead (seq, op, patient_id, payload, enqueued_at, attempts, last_error, trace, failed_at) "
+                    "SELECT seq, op, patient_id, payload, enqueued_at, ?, ?, trace, ? FROM outbox WHERE seq = ?",
+                    (attempts + 1, error, time.time(), seq),
+                )
+                self._conn.execute("DELETE FROM outbox WHERE seq = ?", (seq,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._not_full.notify_all()
+        self.dead_lettered += 1
+        logger.error(f"Giving up on outbox entry {seq} ({op} {patient_id}) after {attempts + 1} attempts, "
+                     f"moved to outbox_dead: {error}")
+
+    def _backoff(self, attempts: int) -> float:
+        """Exponential backoff with jitter for the given number of failed attempts."""
+        return min(self.max_delay, self.base_delay * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+
+    def _run_dispatcher(self) -> None:
+        asyncio.run(self._dispatch_loop())
+
+    async def _dispatch_loop(self) -> None:
+        # Local SQLite work goes to a worker thread so a shared (server) event loop is never blocked on it
+        db: Optional[SurrealDataBase] = None
+        # Failed connects back off here and do not count as attempts: only a rejection by SurrealDB
+        # can send an entry to outbox_dead, never an outage
+        connect_failures = 0
+        while not self._stopping.is_set():
+            # Only one process dispatches; the others keep trying so they can take over
+            if not self._leader_lock.held and not self._leader_lock.acquire(blocking=False):
+                await asyncio.to_thread(self._stopping.wait, self.poll_interval)
+                continue
+            batch, wait = await asyncio.to_thread(self._next_batch)
+            if not batch:
+                self._wakeup.clear()
+                await asyncio.to_thread(self._wakeup.wait, wait)
+                continue
+            if db is None:
+                try:
+                    db = self.db_factory()
+                    await db.use_connection()
+                except Exception as e:
+                    self.last_error = str(e)
+                    connect_failures += 1
+                    delay = self._backoff(connect_failures)
+                    logger.error(f"Cannot connect to SurrealDB to sync {len(batch)} mutations, retrying in {delay:.1f}s: {e}")
+                    if db is not None:
+                        await db.close_connection()
+                        db = None
+                    await asyncio.to_thread(self._stopping.wait, delay)
+                    continue
+                connect_failures = 0
+            try:
+                # Recorded in the trace of every write in the batch (each attempt, including failures)
+                parents = {context for context in map(tracing.parse_traceparent, (row[5] for row in batch)) if context}
+                with tracing.span("surrealdb.sync", parents=parents, mutations=len(batch),
+                                  attempt=batch[0][4] + 1) if parents else contextlib.nullcontext():
+                    await db.apply_mutations(self._collapse(batch))
+                await asyncio.to_thread(self._ack, [row[0] for row in batch])
+                self.last_success_at = time.time()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                if len(batch) == 1 and batch[0][4] + 1 >= self.max_attempts:
+                    await asyncio.to_thread(self._dead_letter, batch[0], str(e))
+                else:
+                    delay = await asyncio.to_thread(self._retry_later, batch, str(e))
+                    logger.error(f"Sync batch of {len(batch)} failed, retrying in {delay:.1f}s: {e}")
+                await db.close_connection()
+                db = None
+        if db is not None:
+            await db.close_connection()
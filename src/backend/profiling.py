@@ -0,0 +1,214 @@
+import os
+import sys
+import hmac
+import time
+import random
+import asyncio
+import threading
+from collections import Counter
+from pathlib import Path
+from types import CodeType
+from typing import Optional
+from urllib.parse import parse_qs
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.customlogger import CustomLogger
+
+# Setting up custom logger
+logger = CustomLogger(name="ProfilingLogger", log_file="profiling.log").get_logger()
+
+PROFILES_DIR: Path = Path("./logs/profiles")
+
+# A profile is cut off after this long (e.g. a sampled /events stream)
+MAX_PROFILE_S: float = 30.0
+
+# Areas reported separately: a sample counts towards an area when any frame of its stack matches
+# (file suffix, function name or "*"); a suffix ending in "/" matches a whole package
+PROFILE_AREAS: dict[str, tuple[tuple[str, str], ...]] = {
+    "load_data": (("src/backend/api.py", "load_data"), ("src/backend/storage.py", "*"),
+                  ("src/backend/sqlite_database.py", "*"), ("src/backend/columnar.py", "*"),
+                  ("src/backend/database.py", "*")),
+    "serialization": (("src/backend/serialization.py", "*"), ("src/backend/api.py", "encode"), ("json/", "*")),
+    "compression": (("src/backend/compression.py", "compress"), ("gzip.py", "*")),
+    "validation": (("pydantic/", "*"), ("src/backend/orm.py", "*")),
+    "analytics": (("src/backend/analytics.py", "*"), ("numpy/", "*")),
+    "pandas": (("pandas/", "*"),),
+}
+
+# Innermost frames of a thread that is parked (waiting for work or I/O), not busy
+_IDLE_FRAMES: frozenset[tuple[str, str]] = frozenset({
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("selectors.py", "select"),
+    ("queue.py", "get"), ("thread.py", "_worker"),
+})
+
+
+# Modules whose frames wrap every request (entry point and middlewares), left out of the inclusive list
+_WRAPPER_MODULES: tuple[str, ...] = ("src/backend/server.py", "src/backend/profiling.py", "src/backend/compression.py:__call__")
+
+
+def _label(code: CodeType) -> str:
+    path = code.co_filename.replace("\\", "/")
+    marker = path.find("/src/")
+    short = path[marker + 1:] if marker >= 0 else "/".join(path.rsplit("/", 2)[-2:])
+    return f"{short}:{code.co_name}:{code.co_firstlineno}"
+
+
+def _matches(code: CodeType, rules: tuple[tuple[str, str], ...]) -> bool:
+    path = code.co_filename.replace("\\", "/")
+    for suffix, function in rules:
+        found = f"/{suffix}" in path if suffix.endswith("/") else path.endswith(suffix)
+        if found and function in ("*", code.co_name):
+            return True
+    return False
+
+
+class StackSampler:
+    """Statistical profiler sampling the Python stacks of every busy thread of the process."""
+
+    def __init__(self, interval_s: float) -> None:
+        self.interval_s = interval_s
+        self.samples: Counter[tuple[CodeType, ...]] = Counter()
+        self.ticks: int = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            self.ticks += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                # Threads parked in a wait or select are idle, not busy
+                leaf = stack[0]
+                if (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_FRAMES:
+                    continue
+                self.samples[tuple(reversed(stack))] += 1
+
+    def report(self, top: int = 25) -> str:
+        """Busy samples by area, the top functions (inclusive and self) and folded stacks."""
+        total = sum(self.samples.values())
+        inclusive: Counter[CodeType] = Counter()
+        own: Counter[CodeType] = Counter()
+        areas: Counter[str] = Counter()
+        for stack, count in self.samples.items():
+            for code in set(stack):
+                inclusive[code] += count
+            own[stack[-1]] += count
+            for area, rules in PROFILE_AREAS.items():
+                if any(_matches(code, rules) for code in stack):
+                    areas[area] += count
+
+        def share(count: int) -> str:
+            return f"{count:>7} {count / total:6.1%}" if total else f"{count:>7}"
+
+        lines = ["## Busy samples by area (a sample counts for every area on its stack)"]
+        lines += [f"{area:<16}{share(areas[area])}" for area in PROFILE_AREAS if areas[area]]
+        # Inclusive counts only for the app's own functions: framework frames wrap every sample
+        app_code = [(code, count) for code, count in inclusive.most_common()
+                    if _label(code).startswith("src/") and not _label(code).startswith(_WRAPPER_MODULES)]
+        lines += ["", "## Top application functions by inclusive samples"]
+        lines += [f"{share(count)}  {_label(code)}" for code, count in app_code[:top]]
+        lines += ["", "## Top functions by self samples"]
+        lines += [f"{share(count)}  {_label(code)}" for code, count in own.most_common(top)]
+        lines += ["", "## Folded stacks (flamegraph.pl / speedscope input)"]
+        lines += [f"{';'.join(_label(code) for code in stack)} {count}" for stack, count in self.samples.most_common()]
+        return "\n".join(lines) + "\n"
+
+
+class ProfilingMiddleware:
+    """Profiles requests that carry the operator token and a random sample_rate fraction of the rest."""
+
+    def __init__(self, app: ASGIApp, token: str = "", sample_rate: float = 0.0, interval_ms: float = 1.0,
+                 keep: int = 50, profiles_dir: Path = PROFILES_DIR) -> None:
+        self.app = app
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval_s = interval_ms / 1000
+        self.keep = max(keep, 1)
+        self.profiles_dir = Path(profiles_dir)
+        self.profiles_dir.mkdir(parents=True, exist_ok=True)
+        self._slot = threading.Lock()
+        logger.info(f"Request profiling enabled (token {'set' if token else 'unset'}, sample rate {sample_rate}, "
+                    f"every {interval_ms} ms, keeping {keep} profiles in {self.profiles_dir})")
+
+    def requested(self, scope: Scope) -> bool:
+        """Whether this request should be profiled (operator token or random sample)."""
+        if self.token:
+            supplied = Headers(scope=scope).get("x-profile")
+            if supplied is None and b"profile=" in scope.get("query_string", b""):
+                supplied = parse_qs(scope["query_string"].decode("latin-1")).get("profile", [None])[0]
+            if supplied is not None and hmac.compare_digest(supplied.encode(), self.token.encode()):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # One request is profiled at a time (samples cover the whole process)
+        if scope["type"] != "http" or not self.requested(scope) or not self._slot.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        now = time.time()
+        # Timestamp first, so names sort oldest first for retention
+        name = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1e6) % 1_000_000:06d}-" \
+               f"{os.getpid()}-{scope['method']}-{scope['path'].strip('/').replace('/', '_') or 'root'}.txt"
+        sampler = StackSampler(self.interval_s)
+        status: Optional[int] = None
+        finished = False
+
+        def finish(reason: str) -> None:
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            sampler.stop()
+            self._slot.release()
+            self.write(name, scope, status, (time.perf_counter() - started) * 1000, sampler, reason)
+
+        async def send_profiled(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-File", name)
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                finish("response sent")
+
+        sampler.start()
+        cutoff = asyncio.get_running_loop().call_later(MAX_PROFILE_S, finish, f"cut off after {MAX_PROFILE_S:g} s")
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            cutoff.cancel()
+            finish("request ended")
+
+    def write(self, name: str, scope: Scope, status: Optional[int], elapsed_ms: float,
+              sampler: StackSampler, reason: str) -> None:
+        """Write one profile and drop the oldest beyond the retention count."""
+        query = scope.get("query_string", b"").decode("latin-1")
+        header = (
+            f"# {scope['method']} {scope['path']}{'?' + query if query else ''}\n"
+            f"status {status}, {elapsed_ms:.1f} ms wall ({reason}), {sampler.ticks} ticks every "
+            f"{sampler.interval_s * 1000:g} ms, pid {os.getpid()}\n"
+            "Samples cover every busy thread of this worker, including concurrent requests.\n\n"
+        )
+        try:
+            (self.profiles_dir / name).write_text(header + sampler.report(), encoding="utf-8")
+            for stale in sorted(self.profiles_dir.glob("*.txt"))[:-self.keep or None]:
+                stale.unlink(missing_ok=True)
+            logger.info(f"Profiled {scope['method']} {scope['path']} ({elapsed_ms:.1f} ms, "
+                        f"{sum(sampler.samples.values())} busy samples) -> {name}")
+        except OSError as e:
+            logger.error(f"Failed to write profile {name}: {e}")
@@ -0,0 +1,98 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from utils.customlogger import CustomLogger
+
+# Setting up custom logger
+logger = CustomLogger(name="ResultCacheLogger", log_file="result_cache.log").get_logger()
+
+
+class ResultCache:
+    """Bounded LRU of encoded response bodies keyed by (endpoint, normalized parameters), for one data version."""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024) -> None:
+        # max_entries=0 disables caching
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, bytes] = OrderedDict()
+        # StorageEngine data version the entries belong to; when it moves every entry is dropped at once
+        self._version: Optional[Hashable] = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.invalidations: int = 0
+
+        if max_entries:
+            logger.info(f"Result cache enabled: up to {max_entries} entries / {max_bytes // (1024 * 1024)} MB")
+        else:
+            logger.info("Result cache disabled")
+
+    def _sync_version(self, version: Hashable) -> None:
+        """Drop every entry when the dataset version has moved (caller holds the lock)."""
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+                self._bytes = 0
+            self._version = version
+
+    def get(self, key: Hashable, version: Optional[Hashable]) -> Optional[bytes]:
+        """Cached body for key at this dataset version (None on a miss, or when version is None)."""
+        if version is None or not self.max_entries:
+            return None
+        with self._lock:
+            self._sync_version(version)
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Hashable, version: Optional[Hashable], body: bytes) -> None:
+        """
+        Store a body built from data read at `version` (taken, and looked up with get(), before the data
+        was read). Dropped when the version has moved since: it would be outdated already.
+        """
+        if version is None or not self.max_entries or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = body
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = None
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
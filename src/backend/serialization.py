@@ -0,0 +1,139 @@
+import json
+import threading
+from typing import Any, Hashable, Iterable, Optional
+from fastapi.responses import Response
+from utils.customlogger import CustomLogger
+
+try:
+    import orjson
+except ImportError:  # optional dependency, fall back to the stdlib encoder
+    orjson = None
+
+# Setting up custom logger
+logger = CustomLogger(name="SerializationLogger", log_file="serialization.log").get_logger()
+
+# Encoder in use, reported at startup
+JSON_ENCODER: str = "orjson" if orjson is not None else "json"
+
+# orjson options: unbox NumPy scalars/arrays natively, accept non-str dict keys like the stdlib does
+_ORJSON_OPTIONS: int = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+# ---- Encoding ----
+def _default(value: Any) -> Any:
+    """Stdlib fallback for NumPy scalars/arrays."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize straight to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False, default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSONResponse that encodes with dumps() (orjson when available)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            # Already-encoded body (e.g. assembled from cached fragments)
+            return content
+        return dumps(content)
+
+
+# ---- Per-record fragment cache ----
+# data_version for stores only this process writes: invalidate() alone keeps fragments exact
+UNTRACKED: Any = object()
+
+
+class FragmentCache:
+    """Pre-encoded `"patient_id":{...}` fragments keyed by patient_id, record version and field projection."""
+
+    def __init__(self, max_entries: int = 100_000) -> None:
+        self.max_entries = max_entries
+        # patient_id -> (version, {projected fields (None = all): fragment})
+        self._fragments: dict[str, tuple[int, dict[Optional[tuple[str, ...]], bytes]]] = {}
+        self._lock = threading.Lock()
+        # Store data version the fragments belong to (shared stores only): writes by other workers bypass
+        # invalidate(), and a patient they delete and recreate is back at version 1
+        self._data_version: Any = UNTRACKED
+
+        # Stats
+        self.hits: int = 0
+        self.misses: int = 0
+        self.resets: int = 0
+
+    def sync(self, data_version: Optional[Hashable]) -> None:
+        """Drop every fragment if the store's data version has moved since the fragments were encoded."""
+        with self._lock:
+            if data_version != self._data_version:
+                if self._fragments:
+                    self.resets += 1
+                self._fragments.clear()
+                self._data_version = data_version
+
+    def fragment(self, patient_id: str, record: dict[str, Any], fields: Optional[tuple[str, ...]] = None,
+                 data_version: Any = UNTRACKED) -> bytes:
+        """
+        Encoded fragment for one record (only `fields` when given), reused while its version is unchanged.
+        Given a data_version, fragments are only reused and stored while the cache belongs to it (None: never).
+        """
+        version = record.get("version")
+        usable = version is not None and (
+            data_version is UNTRACKED or (data_version is not None and data_version == self._data_version)
+        )
+        cached = self._fragments.get(patient_id) if usable else None
+        if cached is not None and cached[0] == version:
+            encoded = cached[1].get(fields)
+            if encoded is not None:
+                self.hits += 1
+                return encoded
+        self.misses += 1
+        projected = record if fields is None else {field: record[field] for field in fields if field in record}
+        encoded = dumps(patient_id) + b":" + dumps(projected)
+        if usable:
+            with self._lock:
+                if data_version is not UNTRACKED and data_version != self._data_version:
+                    # The store moved on while this response was being encoded
+                    return encoded
+                cached = self._fragments.get(patient_id)
+                if cached is not None and cached[0] == version:
+                    cached[1][fields] = encoded
+                    return encoded
+                if len(self._fragments) >= self.max_entries and patient_id not in self._fragments:
+                    # Crude bound: start over rather than track recency per record
+                    logger.info(f"Fragment cache reached {self.max_entries} entries, clearing")
+                    self._fragments.clear()
+                self._fragments[patient_id] = (version, {fields: encoded})
+        return encoded
+
+    def encode(self, records: dict[str, dict[str, Any]], fields: Optional[tuple[str, ...]] = None,
+               data_version: Any = UNTRACKED) -> bytes:
+        """
+        Encode a patient_id -> record mapping (order preserved, projected to `fields`) from fragments.
+        data_version is the store's version taken before `records` were read, for stores other processes write.
+        """
+        if data_version is not UNTRACKED:
+            self.sync(data_version)
+        return b"{" + b",".join(
+            self.fragment(patient_id, record, fields, data_version) for patient_id, record in records.items()
+        ) + b"}"
+
+    def invalidate(self, patient_ids: Iterable[str]) -> None:
+        """Drop the fragments of records that were written or deleted."""
+        with self._lock:
+            for patient_id in patient_ids:
+                self._fragments.pop(patient_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._fragments.clear()
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
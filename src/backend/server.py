@@ -1,15 +1,57 @@
+import sys
+import time
+# Imports are timed from when this file first started loading (worker processes re-import it under its package name)
+_IMPORTS_STARTED: float = getattr(sys.modules.get("__main__"), "_IMPORTS_STARTED", None) or time.perf_counter()
+
+import os
+import signal
+import argparse
+import threading
 import uvicorn
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from src.backend import config
 from src.backend.api import APIClient
+from src.backend.admission import AdmissionMiddleware, RouteClassLimit
+from src.backend.compression import CompressionMiddleware
+from src.backend.tracing import TracingMiddleware
+from utils import tracing
 from utils.customlogger import CustomLogger
+from utils.startup import StartupProfiler, dump_import_breakdown
 
 # Setting up custom logger
 logger = CustomLogger(name="ServerLogger", log_file="server.log").get_logger()
 
+# Startup phases of this worker (imports are timed from the top of this module)
+startup = StartupProfiler("backend", started_at=_IMPORTS_STARTED)
+startup.record("imports", since=_IMPORTS_STARTED)
+
 # Global variable to hold api_client
 api_client = None
 
+# Seconds uvicorn waits for open connections before closing them on shutdown
+SHUTDOWN_GRACE_S: float = 3.0
+
+
+def end_streams_on_exit_signal(client: APIClient) -> None:
+    """Chain onto uvicorn's SIGINT/SIGTERM handlers so open /events streams end as soon as shutdown starts."""
+    # uvicorn waits for open connections before the lifespan shutdown; signal handlers can only be set
+    # from the main thread, so elsewhere (a test client) streams end on the graceful-shutdown timeout
+    if threading.current_thread() is not threading.main_thread():
+        logger.info("Lifespan is not on the main thread; /events streams will not end on exit signals")
+        return
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum: int, frame: object, previous=previous) -> None:
+            client.changes.end_streams()
+            previous(signum, frame)
+
+        signal.signal(sig, handler)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -17,15 +59,20 @@ async def lifespan(app: FastAPI):
     global api_client
     
     # Startup
-    logger.info("FastAPI application startup initiated.")
-    api_client = APIClient(app)
+    logger.info(f"FastAPI application startup initiated (worker pid {os.getpid()}).")
+    api_client = APIClient(app, startup=startup)
+    with startup.phase("engine open"):
+        await api_client.engine.aopen()
+    end_streams_on_exit_signal(api_client)
+    startup.write_report()
     logger.info("FastAPI application startup complete.")
     
     yield
     
     # Shutdown
     if api_client:
-        api_client.shutdown()
+        # Blocking joins and the final flush run on a thread; the loop stays free for the dispatcher task to exit
+        await run_in_threadpool(api_client.shutdown)
     logger.info("FastAPI application shutdown complete.")
 
 
@@ -34,21 +81,55 @@ app = FastAPI(
     title="Patient Management System",
     lifespan=lifespan
 )
+app.add_middleware(CompressionMiddleware, minimum_size=config.COMPRESS_MIN_BYTES)
+if config.PROFILE_TOKEN or config.PROFILE_SAMPLE_RATE > 0:
+    # Outside compression, so compression is part of the profile
+    from src.backend.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware, token=config.PROFILE_TOKEN, sample_rate=config.PROFILE_SAMPLE_RATE,
+                       interval_ms=config.PROFILE_INTERVAL_MS, keep=config.PROFILE_KEEP)
+if config.ADMISSION:
+    # Outside compression and profiling, so shed requests cost neither
+    app.add_middleware(AdmissionMiddleware, queue_timeout_s=config.ADMIT_QUEUE_TIMEOUT_S, limits={
+        "read": RouteClassLimit(config.ADMIT_READ_LIMIT, config.ADMIT_READ_QUEUE),
+        "write": RouteClassLimit(config.ADMIT_WRITE_LIMIT, config.ADMIT_WRITE_QUEUE),
+        "bulk": RouteClassLimit(config.ADMIT_BULK_LIMIT, config.ADMIT_BULK_QUEUE),
+    })
+if tracing.TRACING_ENABLED:
+    # Outermost: the request span covers profiling and compression too
+    app.add_middleware(TracingMiddleware)
 
 
 def main() -> None:
     """Entry point for running FastAPI with uvicorn."""
+    parser = argparse.ArgumentParser(description="Patient Management System backend")
+    parser.add_argument("--workers", type=int, default=config.WORKERS,
+                        help="Number of worker processes (>1 shares the store across processes)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print an import-time breakdown of the backend before starting")
+    args = parser.parse_args()
+
     try:
-        logger.info("Starting FastAPI server on http://127.0.0.1:8080 ...")
+        if args.profile_startup:
+            dump_import_breakdown("src.backend.server")
+        if args.workers > 1 and config.STORAGE_ENGINE == "memory":
+            raise ValueError("The memory storage engine cannot be used with more than one worker")
+        # Workers are fresh processes that read their settings from the environment
+        os.environ["PMS_WORKERS"] = str(args.workers)
+
+        logger.info(f"Starting FastAPI server on http://127.0.0.1:8000 with {args.workers} worker(s)...")
         uvicorn.run(
-            "src.backend.server:app",  # Correct module path for uvicorn
+            # Workers import the app by path; a single process serves this module's app (no re-import)
+            "src.backend.server:app" if args.workers > 1 else app,
             host="127.0.0.1",
             port=8000,
-            reload=False
+            reload=False,
+            workers=args.workers,
+            # Fallback for /events streams that do not end on the exit signal
+            timeout_graceful_shutdown=SHUTDOWN_GRACE_S,
         )
     except Exception as e:
         logger.error(f"Error occurred while running server: {e}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,105 @@
+import os
+import json
+import zlib
+import bisect
+import multiprocessing
+from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional, Sequence
+from utils.customlogger import CustomLogger
+from src.backend.columnar import PatientTable
+
+# Setting up custom logger
+logger = CustomLogger(name="ShardsLogger", log_file="shards.log").get_logger()
+
+# Describes the layout of a shard directory; written after its shard files
+MANIFEST_FILE: str = "manifest.json"
+
+# Below this many bytes of shard files, loading in this process beats starting a process pool
+PARALLEL_LOAD_MIN_BYTES: int = 32 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ShardLayout:
+    """How patients are partitioned into shard files by patient_id ("hash" or "range" scheme)."""
+    scheme: str
+    count: int
+    bounds: tuple[str, ...] = ()
+
+    @classmethod
+    def from_config(cls, shards: int, bounds: Sequence[str] = ()) -> "ShardLayout":
+        """Range layout when bounds are given (len(bounds) + 1 shards), otherwise hash layout over `shards`."""
+        if bounds:
+            if list(bounds) != sorted(set(bounds)):
+                raise ValueError(f"Shard bounds must be distinct and in ascending order, got {list(bounds)}")
+            return cls("range", len(bounds) + 1, tuple(bounds))
+        if shards < 1:
+            raise ValueError(f"Shard count must be at least 1, got {shards}")
+        return cls("hash", shards)
+
+    def shard_of(self, patient_id: str) -> int:
+        # Range: ids below bounds[0] go to shard 0, ids from bounds[0] below bounds[1] to shard 1, ...
+        if self.scheme == "range":
+            return bisect.bisect_right(self.bounds, patient_id)
+        # CRC-32 rather than hash(): stable across processes and runs
+        return zlib.crc32(patient_id.encode("utf-8")) % self.count
+
+    def to_manifest(self) -> dict[str, Any]:
+        return {"scheme": self.scheme, "count": self.count, "bounds": list(self.bounds)}
+
+    @classmethod
+    def from_manifest(cls, manifest: dict[str, Any]) -> "ShardLayout":
+        return cls(manifest["scheme"], manifest["count"], tuple(manifest.get("bounds", ())))
+
+
+def shard_dir_of(data_file: Path) -> Path:
+    """Directory holding the shards of a data file (data/patients.json -> data/patients.shards)."""
+    return data_file.with_suffix(".shards")
+
+
+def shard_file(shard_dir: Path, shard: int) -> Path:
+    return shard_dir / f"shard-{shard:03d}.json"
+
+
+def read_layout(shard_dir: Path) -> Optional[ShardLayout]:
+    """Layout recorded in a shard directory (None when there is none or it is incomplete)."""
+    try:
+        with open(shard_dir / MANIFEST_FILE, "r", encoding="utf-8") as file:
+            return ShardLayout.from_manifest(json.load(file))
+    except FileNotFoundError:
+        return None
+
+
+def write_layout(shard_dir: Path, layout: ShardLayout) -> None:
+    tmp_file = shard_dir / f"{MANIFEST_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as file:
+        json.dump(layout.to_manifest(), file, indent=4)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_file, shard_dir / MANIFEST_FILE)
+
+
+# ---- Loading ----
+def load_table(path: Path) -> PatientTable:
+    """Parse one shard file into a PatientTable (runs in a pool process; a missing shard is empty)."""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return PatientTable.from_records(json.load(file))
+    except FileNotFoundError:
+        return PatientTable()
+
+
+def load_tables(paths: Sequence[Path], workers: int = 0) -> PatientTable:
+    """Load shard files into one table, parsing shards in a process pool when there is enough data."""
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    size = sum(path.stat().st_size for path in paths if path.exists())
+    if workers <= 1 or size < PARALLEL_LOAD_MIN_BYTES:
+        tables = [load_table(path) for path in paths]
+    else:
+        # spawn, not fork: the server process has running threads (see bulk_import)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            tables = list(pool.map(load_table, paths))
+        logger.info(f"Loaded {len(paths)} shards ({size / 2**20:.1f} MB) with {workers} processes")
+    return tables[0] if len(tables) == 1 else PatientTable.concat(tables)
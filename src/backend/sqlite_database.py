@@ -0,0 +1,292 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Optional
+from utils.customlogger import CustomLogger
+
+# Setting up custom logger
+logger = CustomLogger(name="SQLiteDataBaseLogger", log_file="sqlite_database.log").get_logger()
+
+# Columns stored for every patient (patient_id is the primary key)
+PATIENT_COLUMNS: tuple[str, ...] = ("name", "city", "age", "gender", "height", "weight", "bmi", "verdict")
+
+# Columns that get a secondary index (filter + sort fields)
+INDEXED_COLUMNS: tuple[str, ...] = ("city", "gender", "verdict", "age", "bmi")
+
+# Columns that may be used in ORDER BY
+SORTABLE_COLUMNS: tuple[str, ...] = ("height", "weight", "bmi", "age")
+
+
+class SQLiteDataBase:
+    """Embedded SQLite store for patients (WAL mode, one connection per thread)."""
+
+    def __init__(self, db_file: str | None = None, busy_timeout_ms: int = 5000) -> None:
+        # Resolve db_file relative to project root
+        ROOT_DIR = Path(__file__).resolve().parents[2]
+        self.db_file: Path = Path(db_file) if db_file else ROOT_DIR / "data" / "patients.db"
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Never writes, so its PRAGMA data_version moves on every commit (this process and others)
+        self._probe: Optional[sqlite3.Connection] = None
+        self._probe_lock = threading.Lock()
+
+        # Statements are built once; sqlite3 keeps them prepared in its per-connection cache
+        columns = ", ".join(PATIENT_COLUMNS)
+        placeholders = ", ".join("?" for _ in PATIENT_COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in PATIENT_COLUMNS)
+        assignments = ", ".join(f"{c} = ?" for c in PATIENT_COLUMNS)
+        self._insert_sql = f"INSERT INTO patients (patient_id, {columns}, version) VALUES (?, {placeholders}, 1)"
+        self._upsert_sql = (
+            f"{self._insert_sql} "
+            f"ON CONFLICT(patient_id) DO UPDATE SET {updates}, version = patients.version + 1"
+        )
+        # Compare-and-set: parameters are (*columns, patient_id, expected_version)
+        self._cas_update_sql = (
+            f"UPDATE patients SET {assignments}, version = version + 1 WHERE patient_id = ? AND version = ?"
+        )
+        self._select_sql = f"SELECT patient_id, {columns}, version FROM patients"
+
+        self.create_schema()
+        logger.info(f"SQLiteDataBase initialized. Using database file at {self.db_file}")
+
+    # ---- Connections ----
+    def get_connection(self) -> sqlite3.Connection:
+        """Return the connection owned by the calling thread, opening it on first use."""
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            # isolation_level=None -> autocommit; multi-row writes open explicit transactions.
+            # Only the owning thread uses it, but close_connections closes it from the shutdown thread
+            conn = sqlite3.connect(self.db_file, isolation_level=None, cached_statements=256, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+            logger.info(f"Opened SQLite connection for thread {threading.current_thread().name}")
+        return conn
+
+    def connection_count(self) -> int:
+        """Number of open per-thread connections."""
+        with self._connections_lock:
+            return len(self._connections)
+
+    def close_connections(self) -> None:
+        """Close every connection opened by this instance."""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception as e:
+                    logger.error(f"Error closing SQLite connection: {e}")
+            self._connections.clear()
+        with self._probe_lock:
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
+        self._local = threading.local()
+        logger.info("SQLite connections closed")
+
+    # ---- Schema ----
+    def create_schema(self) -> None:
+        """Create the patients table and its secondary indexes if missing."""
+        conn = self.get_connection()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS patients (
+                patient_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                city TEXT NOT NULL,
+                age INTEGER NOT NULL,
+                gender TEXT NOT NULL,
+                height REAL NOT NULL,
+                weight REAL NOT NULL,
+                bmi REAL NOT NULL,
+                verdict TEXT NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1
+            )
+            """
+        )
+        # Databases created before record versioning lack the column
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(patients)")}
+        if "version" not in existing:
+            conn.execute("ALTER TABLE patients ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        for column in INDEXED_COLUMNS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_patients_{column} ON patients ({column})")
+
+    # ---- Helpers ----
+    @staticmethod
+    def _to_params(patient_id: str, patient_data: dict[str, Any]) -> tuple[Any, ...]:
+        """Flatten a patient dict into statement parameters (NumPy scalars are unboxed)."""
+        values = []
+        for column in PATIENT_COLUMNS:
+            value = patient_data.get(column)
+            values.append(value.item() if hasattr(value, "item") else value)
+        return (patient_id, *values)
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> dict[str, Any]:
+        record = {column: row[column] for column in PATIENT_COLUMNS}
+        record["version"] = row["version"]
+        return record
+
+    # ---- Reads ----
+    def get_patient(self, patient_id: str) -> Optional[dict[str, Any]]:
+        """Fetch one patient by primary key."""
+        row = self.get_connection().execute(f"{self._select_sql} WHERE patient_id = ?", (patient_id,)).fetchone()
+        return self._to_record(row) if row else None
+
+    def get_patients(
+        self,
+        filters: Optional[dict[str, Any]] = None,
+        sort_by: Optional[str] = None,
+        order: str = "asc",
+        limit: Optional[int] = None,
+    ) -> dict[str, dict[str, Any]]:
+        """Fetch patients, optionally filtered on indexed columns and sorted."""
+        sql = self._select_sql
+        params: list[Any] = []
+
+        if filters:
+            clauses = []
+            for column, value in filters.items():
+                if column not in INDEXED_COLUMNS:
+                    raise ValueError(f"Cannot filter on column '{column}', select from {list(INDEXED_COLUMNS)}")
+                clauses.append(f"{column} = ?")
+                params.append(value)
+            sql += " WHERE " + " AND ".join(clauses)
+
+        if sort_by is not None:
+            if sort_by not in SORTABLE_COLUMNS:
+                raise ValueError(f"Cannot sort on column '{sort_by}', select from {list(SORTABLE_COLUMNS)}")
+            direction = "DESC" if order == "desc" else "ASC"
+            sql += f" ORDER BY {sort_by} {direction}"
+        else:
+            sql += " ORDER BY patient_id"
+
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        rows = self.get_connection().execute(sql, params).fetchall()
+        return {row["patient_id"]: self._to_record(row) for row in rows}
+
+    def data_version(self) -> int:
+        """PRAGMA data_version of a shared read-only probe connection: moves whenever any connection commits."""
+        with self._probe_lock:
+            if self._probe is None:
+                self.db_file.parent.mkdir(parents=True, exist_ok=True)
+                self._probe = sqlite3.connect(self.db_file, isolation_level=None, check_same_thread=False)
+            return self._probe.execute("PRAGMA data_version").fetchone()[0]
+
+    def get_columns(self, columns: tuple[str, ...]) -> list[tuple[Any, ...]]:
+        """Selected columns of every patient as plain tuples (no row objects or dicts)."""
+        invalid = [column for column in columns if column not in PATIENT_COLUMNS]
+        if invalid:
+            raise ValueError(f"Unknown columns {invalid}")
+        cursor = self.get_connection().cursor()
+        cursor.row_factory = None
+        return cursor.execute(f"SELECT {', '.join(columns)} FROM patients").fetchall()
+
+    def count_patients(self) -> int:
+        """Return the number of stored patients."""
+        return self.get_connection().execute("SELECT COUNT(*) FROM patients").fetchone()[0]
+
+    # ---- Writes ----
+    def upsert_patient(self, patient_id: str, patient_data: dict[str, Any]) -> None:
+        """Insert or replace a single patient."""
+        self.get_connection().execute(self._upsert_sql, self._to_params(patient_id, patient_data))
+
+    def upsert_patients(self, patients_dict: dict[str, dict[str, Any]]) -> None:
+        """Insert or replace many patients in one transaction."""
+        self.apply_batch(upserts=patients_dict)
+
+    def apply_batch(self, upserts: dict[str, dict[str, Any]], deletes: Optional[list[str]] = None) -> None:
+        """Apply upserts and deletes in one transaction."""
+        conn = self.get_connection()
+        deletes = deletes or []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                self._upsert_sql,
+                (self._to_params(patient_id, data) for patient_id, data in upserts.items()),
+            )
+            conn.executemany("DELETE FROM patients WHERE patient_id = ?", ((patient_id,) for patient_id in deletes))
+            conn.execute("COMMIT")
+            logger.info(f"Transaction completed: {len(upserts)} patients upserted, {len(deletes)} deleted")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            logger.error(f"Error applying batch: {e}")
+            raise
+
+    def delete_patient(self, patient_id: str) -> bool:
+        """Delete a patient; returns False if it did not exist."""
+        cursor = self.get_connection().execute("DELETE FROM patients WHERE patient_id = ?", (patient_id,))
+        return cursor.rowcount > 0
+
+    def get_version(self, patient_id: str) -> int:
+        """Current version of a patient (0 if it does not exist)."""
+        row = self.get_connection().execute("SELECT version FROM patients WHERE patient_id = ?", (patient_id,)).fetchone()
+        return row[0] if row else 0
+
+    def get_versions(self, patient_ids: list[str], chunk_size: int = 500) -> dict[str, int]:
+        """Current versions of the given patients that exist (one IN query per chunk of ids)."""
+        conn = self.get_connection()
+        versions: dict[str, int] = {}
+        for start in range(0, len(patient_ids), chunk_size):
+            chunk = patient_ids[start:start + chunk_size]
+            placeholders = ", ".join("?" for _ in chunk)
+            versions.update(conn.execute(
+                f"SELECT patient_id, version FROM patients WHERE patient_id IN ({placeholders})", chunk
+            ).fetchall())
+        return versions
+
+    def compare_and_set(self, patient_id: str, expected_version: int, patient_data: dict[str, Any]) -> Optional[int]:
+        """
+        Write a patient only if its stored version equals expected_version (0 = must not exist).
+        Returns the new version, or None if the version did not match.
+        """
+        conn = self.get_connection()
+        params = self._to_params(patient_id, patient_data)
+        if expected_version == 0:
+            cursor = conn.execute(f"{self._insert_sql} ON CONFLICT(patient_id) DO NOTHING", params)
+        else:
+            cursor = conn.execute(self._cas_update_sql, (*params[1:], patient_id, expected_version))
+        return expected_version + 1 if cursor.rowcount == 1 else None
+
+    def compare_and_delete(self, patient_id: str, expected_version: int) -> bool:
+        """Delete a patient only if its stored version equals expected_version."""
+        cursor = self.get_connection().execute(
+            "DELETE FROM patients WHERE patient_id = ? AND version = ?", (patient_id, expected_version)
+        )
+        return cursor.rowcount == 1
+
+    def import_from_json(self, json_file: Path) -> int:
+        """
+        Seed the table from a patients JSON file; rows that already exist are left alone, so
+        several workers seeding at once do not clobber each other. Returns the number of rows inserted.
+        """
+        with open(json_file, "r", encoding="utf-8") as file:
+            content: dict[str, dict[str, Any]] = json.load(file)
+        conn = self.get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany(
+                f"{self._insert_sql} ON CONFLICT(patient_id) DO NOTHING",
+                (self._to_params(patient_id, data) for patient_id, data in content.items()),
+            )
+            inserted = conn.total_changes - before
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            logger.error(f"Error importing {json_file}: {e}")
+            raise
+        logger.info(f"Imported {inserted} patients from {json_file}")
+        return inserted
@@ -0,0 +1,962 @@
+import os
+import json
+import shutil
+import asyncio
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from dataclasses import dataclass
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Callable, Coroutine, Hashable, Iterable, Iterator, Mapping, Optional
+from utils import tracing
+from utils.filelock import FileLock
+from utils.customlogger import CustomLogger
+from src.backend import config
+from src.backend.database import SurrealConnectionPool, INDEXED_FIELDS as SURREAL_INDEXED_FIELDS
+from src.backend.columnar import PatientTable
+from src.backend.shards import (
+    MANIFEST_FILE, ShardLayout, shard_dir_of, shard_file, read_layout, write_layout, load_tables
+)
+from src.backend.sqlite_database import SQLiteDataBase, INDEXED_COLUMNS
+
+if TYPE_CHECKING:
+    from src.backend.analytics import PatientColumns
+
+# Setting up custom logger
+logger = CustomLogger(name="StorageLogger", log_file="storage.log").get_logger()
+
+# A stored patient: every field except patient_id, which is the key
+PatientRecord = dict[str, Any]
+
+# Fields accepted by sorted_scan / query
+SORTABLE_FIELDS: tuple[str, ...] = ("height", "weight", "bmi", "age")
+
+# Fields accepted as equality filters by query
+FILTERABLE_FIELDS: tuple[str, ...] = ("city", "gender", "verdict")
+
+# Fields a list response can be projected to (patient_id is always the key)
+PROJECTABLE_FIELDS: tuple[str, ...] = ("name", "city", "age", "gender", "height", "weight", "bmi", "verdict", "version")
+
+
+class VersionConflictError(Exception):
+    """Raised when a compare-and-set finds a different version than the caller expected."""
+
+    def __init__(self, patient_id: str, expected_version: int, current_version: int) -> None:
+        super().__init__(
+            f"Version conflict on {patient_id}: expected {expected_version}, current {current_version}"
+        )
+        self.patient_id = patient_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+@dataclass(frozen=True)
+class EngineCapabilities:
+    """What an engine can do natively, so callers can push work down to it."""
+    native_sort: bool = False               # sorted_scan is answered by the engine itself
+    native_filter: bool = False             # query filters are answered by the engine itself
+    indexed_fields: tuple[str, ...] = ()    # fields backed by a secondary index
+    durable: bool = False                   # writes survive a process restart
+    atomic_batch: bool = False              # batch() is applied as one transaction
+
+
+class StorageEngine(ABC):
+    """Common interface for patient storage backends."""
+
+    name: str = "base"
+    capabilities: EngineCapabilities = EngineCapabilities()
+
+    @abstractmethod
+    def get(self, patient_id: str) -> Optional[PatientRecord]:
+        """Return one patient, or None if it does not exist."""
+
+    @abstractmethod
+    def scan(self) -> dict[str, PatientRecord]:
+        """Return every patient keyed by patient_id."""
+
+    def sorted_scan(self, sort_by: str, order: str = "asc", limit: Optional[int] = None) -> dict[str, PatientRecord]:
+        """Return patients ordered by a field."""
+        return self.query(sort_by=sort_by, order=order, limit=limit)
+
+    def query(
+        self,
+        filters: Optional[dict[str, Any]] = None,
+        sort_by: Optional[str] = None,
+        order: str = "asc",
+        limit: Optional[int] = None,
+    ) -> dict[str, PatientRecord]:
+        """Filter, sort and limit patients in-process. Engines with native_sort/native_filter override this."""
+        validate_query(filters, sort_by)
+        items = list(self.scan().items())
+        if filters:
+            items = [item for item in items if all(item[1].get(f) == v for f, v in filters.items())]
+        if sort_by is not None:
+            items.sort(key=lambda item: item[1][sort_by], reverse=order == "desc")
+        if limit is not None:
+            items = items[:limit]
+        return dict(items)
+
+    @abstractmethod
+    def upsert(self, patient_id: str, record: PatientRecord) -> None:
+        """Insert or replace one patient."""
+
+    @abstractmethod
+    def delete(self, patient_id: str) -> bool:
+        """Delete one patient; returns False if it did not exist."""
+
+    @abstractmethod
+    def compare_and_set(self, patient_id: str, expected_version: int, record: PatientRecord) -> int:
+        """
+        Atomically write one patient if its stored version equals expected_version
+        (0 = must not exist yet). Returns the new version; raises VersionConflictError otherwise.
+        """
+
+    @abstractmethod
+    def compare_and_delete(self, patient_id: str, expected_version: int) -> None:
+        """Atomically delete one patient if its stored version equals expected_version."""
+
+    def batch(self, upserts: Optional[dict[str, PatientRecord]] = None, deletes: Iterable[str] = ()) -> None:
+        """Apply many writes. Engines with atomic_batch override this with a transaction."""
+        for patient_id, record in (upserts or {}).items():
+            self.upsert(patient_id, record)
+        for patient_id in deletes:
+            self.delete(patient_id)
+
+    def count(self) -> int:
+        """Return the number of stored patients."""
+        return len(self.scan())
+
+    def versions(self, patient_ids: Iterable[str]) -> dict[str, int]:
+        """Current version of each given patient that exists."""
+        versions = {}
+        for patient_id in patient_ids:
+            record = self.get(patient_id)
+            if record is not None:
+                versions[patient_id] = record.get("version", 1)
+        return versions
+
+    def flush(self) -> None:
+        """Make buffered writes durable. Write-through engines have nothing to do."""
+
+    def close(self) -> None:
+        """Release resources held by the engine."""
+
+    def columns(self) -> "PatientColumns":
+        """Column snapshot of every patient for analytics (default: built from a full scan)."""
+        from src.backend.analytics import PatientColumns  # NumPy is only loaded on first use
+        return PatientColumns.from_records(self.scan())
+
+    def data_version(self) -> Optional[Hashable]:
+        """
+        Token that changes whenever any record changes, including writes by other processes sharing
+        the store. Must be cheap (no scans). None means the engine cannot tell, which disables result caching.
+        """
+        return None
+
+    def status(self) -> dict[str, Any]:
+        """
+        Cheap state snapshot for health checks: must not scan records or make network round trips.
+        "ready" is False while the engine cannot serve requests.
+        """
+        return {"engine": self.name, "ready": True}
+
+    # ---- Async API (used by the async routes) ----
+    # Defaults run the sync method on a worker thread; engines override what they can do without blocking.
+    async def aopen(self) -> None:
+        """Called once on the server's event loop before requests are served."""
+
+    async def aget(self, patient_id: str) -> Optional[PatientRecord]:
+        return await asyncio.to_thread(self.get, patient_id)
+
+    async def ascan(self) -> dict[str, PatientRecord]:
+        return await asyncio.to_thread(self.scan)
+
+    async def aquery(
+        self,
+        filters: Optional[dict[str, Any]] = None,
+        sort_by: Optional[str] = None,
+        order: str = "asc",
+        limit: Optional[int] = None,
+    ) -> dict[str, PatientRecord]:
+        return await asyncio.to_thread(self.query, filters, sort_by, order, limit)
+
+    async def acompare_and_set(self, patient_id: str, expected_version: int, record: PatientRecord) -> int:
+        return await asyncio.to_thread(self.compare_and_set, patient_id, expected_version, record)
+
+    async def acompare_and_delete(self, patient_id: str, expected_version: int) -> None:
+        await asyncio.to_thread(self.compare_and_delete, patient_id, expected_version)
+
+    async def adata_version(self) -> Optional[Hashable]:
+        return await asyncio.to_thread(self.data_version)
+
+
+def validate_query(filters: Optional[dict[str, Any]], sort_by: Optional[str]) -> None:
+    """Reject filter and sort fields that query() does not support."""
+    for field in filters or {}:
+        if field not in FILTERABLE_FIELDS:
+            raise ValueError(f"Cannot filter on field '{field}', select from {list(FILTERABLE_FIELDS)}")
+    if sort_by is not None and sort_by not in SORTABLE_FIELDS:
+        raise ValueError(f"Cannot sort on field '{sort_by}', select from {list(SORTABLE_FIELDS)}")
+
+
+def read_json_file(data_file: Path) -> dict[str, PatientRecord]:
+    """Read a patients JSON file ({ patient_id: {...}, ... })."""
+    with open(data_file, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def file_generation(data_file: Path) -> Optional[tuple[int, int, int]]:
+    """(inode, size, mtime) of a file, which changes whenever it is replaced (None when missing)."""
+    try:
+        stat = os.stat(data_file)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def write_json_file(data_file: Path, records: Mapping[str, PatientRecord] | PatientTable) -> None:
+    """Atomically replace a patients JSON file with the given records (streamed one record at a time)."""
+    # Per-process temp name so workers never write into each other's temp file
+    tmp_file = data_file.with_suffix(f"{data_file.suffix}.{os.getpid()}.tmp")
+    data_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(tmp_file, "w", encoding="utf-8") as file:
+        # Same layout as json.dump(..., indent=4) without materializing every record at once
+        file.write("{")
+        for i, (patient_id, record) in enumerate(records.items()):
+            body = json.dumps(record, indent=4).replace("\n", "\n    ")
+            file.write(f'{"," if i else ""}\n    {json.dumps(patient_id)}: {body}')
+        file.write("\n}" if len(records) else "}")
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_file, data_file)
+
+
+# ---- In-memory ----
+class MemoryEngine(StorageEngine):
+    """Process-local columnar store (see PatientTable); nothing is written to disk."""
+
+    name = "memory"
+    capabilities = EngineCapabilities()
+
+    def __init__(self, seed_file: Optional[Path] = None) -> None:
+        self._records = PatientTable()
+        self._lock = threading.RLock()
+        self._writes = 0    # bumped on every mutation (and reload), see data_version()
+        if seed_file is not None and Path(seed_file).exists():
+            self._records = self._read_records(Path(seed_file))
+            logger.info(f"{self.name} engine seeded with {len(self._records)} patients from {seed_file}")
+
+    @staticmethod
+    def _read_records(data_file: Path) -> PatientTable:
+        """Read a patients file, treating records written before versioning as version 1."""
+        return PatientTable.from_records(read_json_file(data_file))
+
+    def get(self, patient_id: str) -> Optional[PatientRecord]:
+        with self._lock:
+            return self._records.get(patient_id)
+
+    def scan(self) -> dict[str, PatientRecord]:
+        with self._lock:
+            return self._records.to_dict()
+
+    def query(
+        self,
+        filters: Optional[dict[str, Any]] = None,
+        sort_by: Optional[str] = None,
+        order: str = "asc",
+        limit: Optional[int] = None,
+    ) -> dict[str, PatientRecord]:
+        # Filters and sorts run on the columns; only the rows returned are materialized
+        validate_query(filters, sort_by)
+        with self._lock:
+            return self._records.select(filters=filters, sort_by=sort_by, order=order, limit=limit)
+
+    def _version_of(self, patient_id: str) -> int:
+        """Stored version (0 = missing)."""
+        return self._records.version_of(patient_id)
+
+    def upsert(self, patient_id: str, record: PatientRecord) -> None:
+        with self._lock:
+            self._records.put(patient_id, record, version=self._version_of(patient_id) + 1)
+            self._after_write()
+
+    def delete(self, patient_id: str) -> bool:
+        with self._lock:
+            if not self._records.remove(patient_id):
+                return False
+            self._after_write()
+            return True
+
+    def compare_and_set(self, patient_id: str, expected_version: int, record: PatientRecord) -> int:
+        # The lock only covers the version check and the dict update, never validation or disk I/O
+        with self._lock:
+            current_version = self._version_of(patient_id)
+            if current_version != expected_version:
+                raise VersionConflictError(patient_id, expected_version, current_version)
+            self._records.put(patient_id, record, version=current_version + 1)
+            self._after_write()
+            return current_version + 1
+
+    def compare_and_delete(self, patient_id: str, expected_version: int) -> None:
+        with self._lock:
+            current_version = self._version_of(patient_id)
+            if current_version == 0 or current_version != expected_version:
+                raise VersionConflictError(patient_id, expected_version, current_version)
+            self._records.remove(patient_id)
+            self._after_write()
+
+    def batch(self, upserts: Optional[dict[str, PatientRecord]] = None, deletes: Iterable[str] = ()) -> None:
+        with self._lock:
+            for patient_id, record in (upserts or {}).items():
+                self._records.put(patient_id, record, version=self._version_of(patient_id) + 1)
+            for patient_id in deletes:
+                self._records.remove(patient_id)
+            self._after_write()
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def versions(self, patient_ids: Iterable[str]) -> dict[str, int]:
+        with self._lock:
+            versions = {patient_id: self._version_of(patient_id) for patient_id in patient_ids}
+        return {patient_id: version for patient_id, version in versions.items() if version}
+
+    def _after_write(self) -> None:
+        """Hook run (under the lock) after every mutation."""
+        self._writes += 1
+
+    def data_version(self) -> Optional[Hashable]:
+        return self._writes
+
+    def columns(self) -> "PatientColumns":
+        # Copies the typed arrays directly (no records are materialized)
+        from src.backend.analytics import PatientColumns
+        with self._lock:
+            return PatientColumns.from_table(self._records)
+
+    def status(self) -> dict[str, Any]:
+        return {**super().status(), "patients": len(self._records), "resident_bytes": self._records.nbytes()}
+
+    # Point reads and writes only touch memory, so they run inline on the event loop;
+    # scans and queries materialize many rows and stay on a worker thread.
+    async def aget(self, patient_id: str) -> Optional[PatientRecord]:
+        return self.get(patient_id)
+
+    async def acompare_and_set(self, patient_id: str, expected_version: int, record: PatientRecord) -> int:
+        return self.compare_and_set(patient_id, expected_version, record)
+
+    async def acompare_and_delete(self, patient_id: str, expected_version: int) -> None:
+        self.compare_and_delete(patient_id, expected_version)
+
+    async def adata_version(self) -> Optional[Hashable]:
+        # A counter (and a stat() when shared)
+        return self.data_version()
+
+
+# ---- JSON file ----
+class JSONFileEngine(MemoryEngine):
+    """Serves reads from memory and rewrites the JSON file after writes (or on flush() without write_through)."""
+
+    name = "json"
+    capabilities = EngineCapabilities(durable=True)
+
+    def __init__(self, data_file: Path, write_through: bool = True, shared: bool = False) -> None:
+        self.data_file = Path(data_file)
+        # Shared by several processes: writes take a cross-process lock and reload a replaced file first,
+        # reads reload when the file's generation (inode, size, mtime) has moved
+        self.shared = shared
+        # Deferred writes would let workers diverge, so shared mode always writes through
+        self.write_through = write_through or shared
+        self._dirty = False
+        self._flush_lock = threading.Lock()
+        self._file_lock = FileLock(self.data_file.with_suffix(self.data_file.suffix + ".lock"))
+        self._generation: Optional[tuple[int, int, int]] = None
+        super().__init__(seed_file=self.data_file)
+        self._generation = self._file_generation()
+        if not self.data_file.exists():
+            logger.warning(f"Data file not found, starting empty: {self.data_file}")
+
+    # ---- Cross-process coordination ----
+    def _file_generation(self) -> Optional[tuple[int, int, int]]:
+        return file_generation(self.data_file)
+
+    def _refresh(self) -> None:
+        """Reload the file if another process has replaced it since we last read or wrote it."""
+        generation = self._file_generation()
+        if generation == self._generation:
+            return
+        with self._lock:
+            if generation == self._generation or generation is None:
+                return
+            self._records = self._read_records(self.data_file)
+            self._generation = generation
+            self._writes += 1
+            logger.info(f"Reloaded {len(self._records)} patients written by another worker")
+
+    def _locked_write(self, method: Callable[..., Any], *args: Any) -> Any:
+        """Run a MemoryEngine mutation under the cross-process lock (shared mode only)."""
+        if not self.shared:
+            return method(*args)
+        with self._file_lock:
+            self._refresh()
+            return method(*args)
+
+    # ---- Reads ----
+    def get(self, patient_id: str) -> Optional[PatientRecord]:
+        if self.shared:
+            self._refresh()
+        return super().get(patient_id)
+
+    def scan(self) -> dict[str, PatientRecord]:
+        if self.shared:
+            self._refresh()
+        return super().scan()
+
+    def query(
+        self,
+        filters: Optional[dict[str, Any]] = None,
+        sort_by: Optional[str] = None,
+        order: str = "asc",
+        limit: Optional[int] = None,
+    ) -> dict[str, PatientRecord]:
+        if self.shared:
+            self._refresh()
+        return super().query(filters=filters, sort_by=sort_by, order=order, limit=limit)
+
+    def count(self) -> int:
+        if self.shared:
+            self._refresh()
+        return super().count()
+
+    def columns(self) -> "PatientColumns":
+        if self.shared:
+            self._refresh()
+        return super().columns()
+
+    # ---- Writes ----
+    def upsert(self, patient_id: str, record: PatientRecord) -> None:
+        self._locked_write(super().upsert, patient_id, record)
+
+    def delete(self, patient_id: str) -> bool:
+        return self._locked_write(super().delete, patient_id)
+
+    def compare_and_set(self, patient_id: str, expected_version: int, record: PatientRecord) -> int:
+        return self._locked_write(super().compare_and_set, patient_id, expected_version, record)
+
+    def compare_and_delete(self, patient_id: str, expected_version: int) -> None:
+        self._locked_write(super().compare_and_delete, patient_id, expected_version)
+
+    def batch(self, upserts: Optional[dict[str, PatientRecord]] = None, deletes: Iterable[str] = ()) -> None:
+        self._locked_write(super().batch, upserts, deletes)
+
+    def _after_write(self) -> None:
+        super()._after_write()
+        if self.write_through:
+            self.write_file(self._records)
+            self._generation = self._file_generation()
+        else:
+            self._dirty = True
+
+    def flush(self) -> None:
+        # Snapshot under the record lock, write outside it so reads are not blocked by disk I/O
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = self._records.copy()
+                self._dirty = False
+            try:
+                self.write_file(snapshot)
+                self._generation = self._file_generation()
+            except Exception:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def close(self) -> None:
+        self.flush()
+
+    # ---- Async API ----
+    async def aget(self, patient_id: str) -> Optional[PatientRecord]:
+        # A stat() decides inline; only an actual reload goes to a worker thread
+        if self.shared and self._file_generation() != self._generation:
+            await asyncio.to_thread(self._refresh)
+        return self.get(patient_id)
+
+    async def acompare_and_set(self, patient_id: str, expected_version: int, record: PatientRecord) -> int:
+        if self.write_through:  # cross-process lock and a file rewrite per write
+            return await asyncio.to_thread(self.compare_and_set, patient_id, expected_version, record)
+        return self.compare_and_set(patient_id, expected_version, record)
+
+    async def acompare_and_delete(self, patient_id: str, expected_version: int) -> None:
+        if self.write_through:
+            await asyncio.to_thread(self.compare_and_delete, patient_id, expected_version)
+        else:
+            self.compare_and_delete(patient_id, expected_version)
+
+    def data_version(self) -> Optional[Hashable]:
+        # Shared: another worker's rewrite shows up as a new file generation before we reload it
+        if self.shared:
+            return (self._writes, self._file_generation())
+        return self._writes
+
+    def status(self) -> dict[str, Any]:
+        # One stat() call: tells whether another worker has replaced the file since we last loaded it
+        return {
+            **super().status(),
+            "data_file": str(self.data_file),
+            "shared": self.shared,
+            "unflushed_writes": self._dirty,
+            "stale": self._file_generation() != self._generation,
+        }
+
+    def write_file(self, records: PatientTable) -> None:
+        """Atomically replace the JSON file with the given records."""
+        write_json_file(self.data_file, records)
+        logger.info(f"Wrote {len(records)} patients to {self.data_file}")
+
+
+# ---- Sharded JSON files ----
+class ShardedJSONFileEngine(JSONFileEngine):
+    """JSONFileEngine over shard files partitioned by patient_id (data/patients.shards/shard-NNN.json)."""
+
+    def __init__(self, data_file: Path, layout: ShardLayout, write_through: bool = True, shared: bool = False,
+                 load_workers: int = 0) -> None:
+        self.source_file = Path(data_file)
+        self.layout = layout
+        self.load_workers = load_workers
+        shard_dir = shard_dir_of(self.source_file)
+        self.shard_files = [shard_file(shard_dir, shard) for shard in range(layout.count)]
+        self._dirty_shards: set[int] = set()
+        # Shards changed by the write running on this thread, for _after_write
+        self._touched = threading.local()
+        # Same lock file as the engine's cross-process lock (taken before the engine exists)
+        with FileLock(shard_dir.with_name(shard_dir.name + ".lock")):
+            self._prepare(shard_dir)
+        super().__init__(shard_dir, write_through=write_through, shared=shared)
+
+    # ---- Layout ----
+    def _prepare(self, shard_dir: Path) -> None:
+        """Create the shard directory for self.layout from the data file, or reshard it from an older layout."""
+        staging = shard_dir.with_name(shard_dir.name + ".new")
+        previous = shard_dir.with_name(shard_dir.name + ".old")
+        # A reshard interrupted between its two renames left the complete old directory aside
+        if not shard_dir.exists() and previous.exists():
+            previous.rename(shard_dir)
+        current = read_layout(shard_dir)
+        if current == self.layout:
+            return
+        if current is None and shard_dir.exists():
+            raise ValueError(f"{shard_dir} exists but has no {MANIFEST_FILE}, refusing to overwrite it")
+
+        records: dict[str, PatientRecord] = {}
+        if current is not None:
+            for path in (shard_file(shard_dir, shard) for shard in range(current.count)):
+                if path.exists():
+                    records.update(read_json_file(path))
+        elif self.source_file.exists():
+            records = read_json_file(self.source_file)
+        parts: list[dict[str, PatientRecord]] = [{} for _ in range(self.layout.count)]
+        for patient_id, record in records.items():
+            parts[self.layout.shard_of(patient_id)][patient_id] = record
+
+        # Written aside and swapped in with renames, so a crash never leaves a half-written layout in place
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for shard, part in enumerate(parts):
+            write_json_file(shard_file(staging, shard), part)
+        write_layout(staging, self.layout)
+        if shard_dir.exists():
+            shard_dir.rename(previous)
+        staging.rename(shard_dir)
+        shutil.rmtree(previous, ignore_errors=True)
+        if current is None and self.source_file.exists():
+            self.source_file.rename(self.source_file.with_name(self.source_file.name + ".pre-shard"))
+        logger.info(f"Wrote {len(records)} patients into {self.layout.count} {self.layout.scheme} shards in {shard_dir} "
+                    f"(from {f'{current.count} {current.scheme} shards' if current else self.source_file})")
+
+    def _read_records(self, shard_dir: Path) -> PatientTable:
+        return load_tables(self.shard_files, self.load_workers)
+
+    # ---- Cross-process coordination ----
+    def _file_generation(self) -> tuple[Optional[tuple[int, int, int]], ...]:
+        return tuple(file_generation(path) for path in self.shard_files)
+
+    def _refresh(self) -> None:
+        """Re-read the shards another process has replaced since we last read or wrote them."""
+        if self._file_generation() == self._generation:
+            return
+        with self._lock:
+            generation = self._file_generation()
+            changed = {shard for shard, (seen, now) in enumerate(zip(self._generation, generation))
+                       if seen != now and now is not None}
+            if not changed:
+                return
+            stale = self._records.partitions(self.layout.shard_of, changed)
+            for shard in changed:
+                for patient_id in stale[shard]:
+                    self._records.remove(patient_id)
+                for patient_id, record in read_json_file(self.shard_files[shard]).items():
+                    self._records.put(patient_id, record)
+            self._generation = generation
+            self._writes += 1
+            logger.info(f"Reloaded shard(s) {sorted(changed)} written by another worker")
+
+    # ---- Writes ----
+    @contextmanager
+    def _touching(self, patient_ids: Iterable[str]) -> Iterator[None]:
+        self._touched.shards = {self.layout.shard_of(patient_id) for patient_id in patient_ids}
+        try:
+            yield
+        finally:
+            self._touched.shards = set()
+
+    def upsert(self, patient_id: str, record: PatientRecord) -> None:
+        with self._touching((patient_id,)):
+            super().upsert(patient_id, record)
+
+    def delete(self, patient_id: str) -> bool:
+        with self._touching((patient_id,)):
+            return super().delete(patient_id)
+
+    def compare_and_set(self, patient_id: str, expected_version: int, record: PatientRecord) -> int:
+        with self._touching((patient_id,)):
+            return super().compare_and_set(patient_id, expected_version, record)
+
+    def compare_and_delete(self, patient_id: str, expected_version: int) -> None:
+        with self._touching((patient_id,)):
+            super().compare_and_delete(patient_id, expected_version)
+
+    def batch(self, upserts: Optional[dict[str, PatientRecord]] = None, deletes: Iterable[str] = ()) -> None:
+        deletes = list(deletes)
+        with self._touching([*(upserts or {}), *deletes]):
+            super().batch(upserts, deletes)
+
+    def _after_write(self) -> None:
+        self._dirty_shards.update(getattr(self._touched, "shards", ()))
+        super()._after_write()
+
+    def write_file(self, records: PatientTable) -> None:
+        """Rewrite the dirty shards (write-through, under the lock)."""
+        shards, self._dirty_shards = self._dirty_shards, set()
+        try:
+            self.write_shards(records, shards)
+        except Exception:
+            self._dirty_shards |= shards
+            raise
+
+    def write_shards(self, records: PatientTable, shards: set[int]) -> None:
+        """Atomically replace the given shard files with their records from `records`."""
+        for shard, part in records.partitions(self.layout.shard_of, shards).items():
+            write_json_file(self.shard_files[shard], part)
+        logger.info(f"Rewrote {len(shards)} of {self.layout.count} shards ({sorted(shards)})")
+
+    def flush(self) -> None:
+        # Snapshot under the record lock (a buffer copy), find and write the shards outside it
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty_shards:
+                    return
+                shards, self._dirty_shards = self._dirty_shards, set()
+                snapshot = self._records.copy()
+            try:
+                self.write_shards(snapshot, shards)
+                self._generation = self._file_generation()
+            except Exception:
+                with self._lock:
+                    self._dirty_shards |= shards
+                raise
+
+    def status(self) -> dict[str, Any]:
+        return {
+            **super().status(),
+            "shards": self.layout.count,
+            "shard_scheme": self.layout.scheme,
+            "unflushed_writes": bool(self._dirty_shards),
+        }
+
+
+# ---- SQLite ----
+class SQLiteEngine(StorageEngine):
+    """Embedded SQLite store (see SQLiteDataBase)."""
+
+    name = "sqlite"
+    capabilities = EngineCapabilities(
+        native_sort=True, native_filter=True, indexed_fields=INDEXED_COLUMNS, durable=True, atomic_batch=True
+    )
+
+    def __init__(self, db_file: Optional[str] = None, seed_file: Optional[Path] = None) -> None:
+        self.db = SQLiteDataBase(db_file)
+        self._writes = 0    # this process's commits, counted as soon as they return
+        if seed_file is not None and Path(seed_file).exists() and self.db.count_patients() == 0:
+            self.db.import_from_json(Path(seed_file))
+
+    def get(self, patient_id: str) -> Optional[PatientRecord]:
+        return self.db.get_patient(patient_id)
+
+    def scan(self) -> dict[str, PatientRecord]:
+        return self.db.get_patients()
+
+    def query(
+        self,
+        filters: Optional[dict[str, Any]] = None,
+        sort_by: Optional[str] = None,
+        order: str = "asc",
+        limit: Optional[int] = None,
+    ) -> dict[str, PatientRecord]:
+        return self.db.get_patients(filters=filters, sort_by=sort_by, order=order, limit=limit)
+
+    def upsert(self, patient_id: str, record: PatientRecord) -> None:
+        self.db.upsert_patient(patient_id, record)
+        self._writes += 1
+
+    def delete(self, patient_id: str) -> bool:
+        deleted = self.db.delete_patient(patient_id)
+        if deleted:
+            self._writes += 1
+        return deleted
+
+    def compare_and_set(self, patient_id: str, expected_version: int, record: PatientRecord) -> int:
+        new_version = self.db.compare_and_set(patient_id, expected_version, record)
+        if new_version is None:
+            raise VersionConflictError(patient_id, expected_version, self.db.get_version(patient_id))
+        self._writes += 1
+        return new_version
+
+    def compare_and_delete(self, patient_id: str, expected_version: int) -> None:
+        if not self.db.compare_and_delete(patient_id, expected_version):
+            raise VersionConflictError(patient_id, expected_version, self.db.get_version(patient_id))
+        self._writes += 1
+
+    def batch(self, upserts: Optional[dict[str, PatientRecord]] = None, deletes: Iterable[str] = ()) -> None:
+        self.db.apply_batch(upserts or {}, list(deletes))
+        self._writes += 1
+
+    def count(self) -> int:
+        return self.db.count_patients()
+
+    def versions(self, patient_ids: Iterable[str]) -> dict[str, int]:
+        return self.db.get_versions(list(patient_ids))
+
+    def columns(self) -> "PatientColumns":
+        from src.backend.analytics import PatientColumns
+        return PatientColumns.from_rows(self.db.get_columns(("city", "gender", "verdict", "age", "bmi", "weight", "height")))
+
+    def close(self) -> None:
+        self.db.close_connections()
+
+    def data_version(self) -> Optional[Hashable]:
+        # The same value from every thread; other workers' commits show up through the probe connection
+        return (self._writes, self.db.data_version())
+
+    def status(self) -> dict[str, Any]:
+        # COUNT(*) walks the smallest index (~0.25 ms per 200k patients), which is still cheap enough here
+        return {
+            **super().status(),
+            "patients": self.count(),
+            "db_file": str(self.db.db_file),
+            "connections": self.db.connection_count(),
+        }
+
+
+# ---- SurrealDB ----
+class SurrealDBEngine(StorageEngine):
+    """SurrealDB as the primary store; reads are pushed down as SurrealQL over a connection pool."""
+
+    name = "surrealdb"
+    capabilities = EngineCapabilities(
+        native_sort=True, native_filter=True, indexed_fields=SURREAL_INDEXED_FIELDS, durable=True
+    )
+
+    def __init__(self, seed_file: Optional[Path] = None, pool_size: int = 4, timeout: float = 10.0) -> None:
+        self.timeout = timeout
+        self.pool = SurrealConnectionPool(size=pool_size)
+        # Last known dataset size (refreshed by count(), adjusted by creates and deletes) for status()
+        self._count: Optional[int] = None
+
+        # The pool lives on a dedicated loop until aopen(); sync callers on any thread submit coroutines to it
+        self._loop = asyncio.new_event_loop()
+        self._owns_loop = True
+        self._thread = threading.Thread(target=self._loop.run_forever, name="surrealdb-engine", daemon=True)
+        self._thread.start()
+        self._run(self.pool.open())
+        self._call("define_indexes")
+
+        if seed_file is not None and Path(seed_file).exists() and self.count() == 0:
+            self.batch(upserts=read_json_file(Path(seed_file)))
+            self.count()  # refresh the size reported by status()
+
+    def _run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the engine loop and wait for its result (never from that loop itself)."""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            coro.close()
+            raise RuntimeError("Blocking SurrealDB call on the event loop that owns the pool, use the async API")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout or self.timeout)
+
+    async def _on_pool(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        # Runs on the pool's loop, in a copy of the caller's context: the span joins the request's trace
+        with tracing.span(f"surrealdb.{method}"):
+            async with self.pool.connection() as db:
+                return await getattr(db, method)(*args, **kwargs)
+
+    def _call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """Call a SurrealDataBase method on a pooled connection."""
+        return self._run(self._on_pool(method, *args, **kwargs))
+
+    async def _acall(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """Await a SurrealDataBase method on a pooled connection without blocking any thread."""
+        coro = self._on_pool(method, *args, **kwargs)
+        if asyncio.get_running_loop() is self._loop:
+            return await asyncio.wait_for(coro, self.timeout)
+        return await asyncio.wait_for(asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop)), self.timeout)
+
+    def get(self, patient_id: str) -> Optional[PatientRecord]:
+        return self._call("select_patient", patient_id)
+
+    def scan(self) -> dict[str, PatientRecord]:
+        return self._call("select_patients")
+
+    def query(
+        self,
+        filters: Optional[dict[str, Any]] = None,
+        sort_by: Optional[str] = None,
+        order: str = "asc",
+        limit: Optional[int] = None,
+    ) -> dict[str, PatientRecord]:
+        return self._call("select_patients", filters=filters, sort_by=sort_by, order=order, limit=limit)
+
+    def upsert(self, patient_id: str, record: PatientRecord) -> None:
+        self._call("upsert_patient", patient_id, record)
+
+    def delete(self, patient_id: str) -> bool:
+        return self._call("delete_patient", patient_id)
+
+    def batch(self, upserts: Optional[dict[str, PatientRecord]] = None, deletes: Iterable[str] = ()) -> None:
+        # Upserts (seeding, bulk imports) go through the chunked bulk INSERT; each chunk gets the usual call timeout
+        if upserts:
+            chunks = -(-len(upserts) // config.SURREAL_IMPORT_CHUNK)
+            self._run(self._on_pool("import_patients", upserts), timeout=self.timeout * chunks)
+        for patient_id in deletes:
+            self.delete(patient_id)
+
+    def _current_version(self, patient_id: str) -> int:
+        record = self.get(patient_id)
+        return 0 if record is None else record.get("version", 1)
+
+    def compare_and_set(self, patient_id: str, expected_version: int, record: PatientRecord) -> int:
+        if not self._call("compare_and_set", patient_id, expected_version, record):
+            raise VersionConflictError(patient_id, expected_version, self._current_version(patient_id))
+        if expected_version == 0 and self._count is not None:
+            self._count += 1
+        return expected_version + 1
+
+    def compare_and_delete(self, patient_id: str, expected_version: int) -> None:
+        if not self._call("compare_and_delete", patient_id, expected_version):
+            raise VersionConflictError(patient_id, expected_version, self._current_version(patient_id))
+        if self._count is not None:
+            self._count -= 1
+
+    def status(self) -> dict[str, Any]:
+        pool = self.pool.status()
+        return {**super().status(), "ready": pool["open"], "patients": self._count, "pool": pool}
+
+    def count(self) -> int:
+        self._count = self._call("count_patients")
+        return self._count
+
+    def close(self) -> None:
+        try:
+            self._run(self.pool.close())
+        finally:
+            if self._owns_loop:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # ---- Async API ----
+    async def aopen(self) -> None:
+        """Reopen the pool on the running (server) loop and stop the private loop thread."""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        private_loop = self._loop
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self.pool.close(), private_loop))
+        self.pool = SurrealConnectionPool(size=self.pool.size)
+        await self.pool.open()
+        self._loop, self._owns_loop = loop, False
+        private_loop.call_soon_threadsafe(private_loop.stop)
+        logger.info("SurrealDB connection pool moved onto the server event loop")
+
+    async def aget(self, patient_id: str) -> Optional[PatientRecord]:
+        return await self._acall("select_patient", patient_id)
+
+    async def ascan(self) -> dict[str, PatientRecord]:
+        return await self._acall("select_patients")
+
+    async def aquery(
+        self,
+        filters: Optional[dict[str, Any]] = None,
+        sort_by: Optional[str] = None,
+        order: str = "asc",
+        limit: Optional[int] = None,
+    ) -> dict[str, PatientRecord]:
+        return await self._acall("select_patients", filters=filters, sort_by=sort_by, order=order, limit=limit)
+
+    async def _acurrent_version(self, patient_id: str) -> int:
+        record = await self.aget(patient_id)
+        return 0 if record is None else record.get("version", 1)
+
+    async def acompare_and_set(self, patient_id: str, expected_version: int, record: PatientRecord) -> int:
+        if not await self._acall("compare_and_set", patient_id, expected_version, record):
+            raise VersionConflictError(patient_id, expected_version, await self._acurrent_version(patient_id))
+        if expected_version == 0 and self._count is not None:
+            self._count += 1
+        return expected_version + 1
+
+    async def acompare_and_delete(self, patient_id: str, expected_version: int) -> None:
+        if not await self._acall("compare_and_delete", patient_id, expected_version):
+            raise VersionConflictError(patient_id, expected_version, await self._acurrent_version(patient_id))
+        if self._count is not None:
+            self._count -= 1
+
+    async def adata_version(self) -> Optional[Hashable]:
+        return None
+
+
+# ---- Factory ----
+STORAGE_ENGINES: tuple[str, ...] = ("json", "memory", "sqlite", "surrealdb")
+
+
+def create_storage_engine(
+    name: str,
+    data_file: Path,
+    sqlite_file: Optional[str] = None,
+    write_through: bool = True,
+    shared: bool = False,
+    shards: int = 1,
+    shard_bounds: Iterable[str] = (),
+    load_workers: int = 0,
+) -> StorageEngine:
+    """
+    Build the engine selected by configuration (non-JSON engines are seeded from data_file when empty).
+    write_through=False defers disk writes to flush(); shared=True: several worker processes use the store.
+    """
+    if name == "json":
+        # Once a store is sharded it stays sharded (shards=1 then means a single shard file)
+        shard_bounds = tuple(shard_bounds)
+        if shards > 1 or shard_bounds or shard_dir_of(Path(data_file)).exists():
+            return ShardedJSONFileEngine(data_file, ShardLayout.from_config(shards, shard_bounds),
+                                         write_through=write_through, shared=shared, load_workers=load_workers)
+        return JSONFileEngine(data_file, write_through=write_through, shared=shared)
+    if name == "memory":
+        if shared:
+            raise ValueError("The memory engine cannot be shared between workers, use json, sqlite or surrealdb")
+        return MemoryEngine(seed_file=data_file)
+    if name == "sqlite":
+        return SQLiteEngine(sqlite_file, seed_file=data_file)
+    if name == "surrealdb":
+        return SurrealDBEngine(seed_file=data_file)
+    raise ValueError(f"Unknown storage engine '{name}', select from {list(STORAGE_ENGINES)}")
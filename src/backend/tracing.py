@@ -0,0 +1,38 @@
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils import tracing
+from utils.customlogger import CustomLogger
+
+# Setting up custom logger
+logger = CustomLogger(name="TracingLogger", log_file="tracing.log").get_logger()
+
+
+class TracingMiddleware:
+    """Opens a server span per request (continuing the caller's W3C traceparent) and returns X-Trace-Id."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        tracing.configure("backend")
+        logger.info(f"Request tracing enabled, spans in {tracing.exporter.path}")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        parent = tracing.parse_traceparent(Headers(scope=scope).get("traceparent"))
+        with tracing.span(f"{scope['method']} {scope['path']}", parents=[parent] if parent else None) as attributes:
+            trace_id = tracing.current()[0].trace_id
+            status: Optional[int] = None
+
+            async def send_traced(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    MutableHeaders(scope=message).append("X-Trace-Id", trace_id)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_traced)
+            finally:
+                attributes["status"] = status
@@ -1,21 +1,46 @@
+import time
+_IMPORTS_STARTED = time.perf_counter()
+
+import argparse
+import importlib
 import flet as ft
 from flet import app
-from typing import Dict, Any
+from typing import Callable, Dict, Any
+from utils import tracing
 from utils.customlogger import CustomLogger
+from utils.startup import StartupProfiler, dump_import_breakdown
 from src.frontend.components.navigation import Navigation
-
-# Pages
-from src.frontend.pages.home_page import HomePage
-from src.frontend.pages.about_page import AboutPage
-from src.frontend.pages.patients_page import PatientsPage
-from src.frontend.pages.patient_form_page import PatientFormPage
-from src.frontend.pages.patient_detail_page import PatientDetailPage
 from src.frontend.frontend_utils.constants import BASE_URL
+from src.frontend.frontend_utils.change_feed import change_feed
 
 
 # Setting up custom logger
 logger = CustomLogger(name="AppLogger", log_file="app.log").get_logger()
 
+# Startup phases (the report is written once, after the first session has rendered)
+startup = StartupProfiler("frontend", started_at=_IMPORTS_STARTED)
+startup.record("imports", since=_IMPORTS_STARTED)
+_startup_reported = False
+
+# Pages: name -> (module, class); a page module is imported the first time it is navigated to
+PAGES: Dict[str, tuple[str, str]] = {
+    "home": ("src.frontend.pages.home_page", "HomePage"),
+    "about": ("src.frontend.pages.about_page", "AboutPage"),
+    "patients": ("src.frontend.pages.patients_page", "PatientsPage"),
+    "patient_form": ("src.frontend.pages.patient_form_page", "PatientFormPage"),
+    "patient_detail": ("src.frontend.pages.patient_detail_page", "PatientDetailPage"),
+}
+
+
+def page_factory(page: ft.Page, nav: Navigation, module_name: str, class_name: str) -> Callable[[], Any]:
+    """Build a page object on demand, importing its module on first use."""
+    def build() -> Any:
+        with startup.phase(f"page {class_name}"):
+            page_class = getattr(importlib.import_module(module_name), class_name)
+            return page_class(page, nav)
+    return build
+
+
 def main(page: ft.Page) -> None:
     """Initialize the Patient Management System frontend."""
 
@@ -37,33 +62,46 @@ def main(page: ft.Page) -> None:
     nav: Navigation = Navigation(page)
 
     # -------------------------------
-    # Pages Registration
+    # Pages Registration (built lazily)
     # -------------------------------
-    pages: Dict[str, Any] = {
-        "home": HomePage(page, nav),
-        "about": AboutPage(page, nav),
-        "patients": PatientsPage(page, nav),
-        "patient_form": PatientFormPage(page, nav),
-        "patient_detail": PatientDetailPage(page, nav),
-    }
+    for name, (module_name, class_name) in PAGES.items():
+        nav.register_page(name=name, factory=page_factory(page, nav, module_name, class_name))
 
-    for name, flet_page in pages.items():
-        nav.add_page(name=name, page=flet_page)
+    # -------------------------------
+    # Live updates (one backend stream shared by all sessions; subscribed before the first fetch)
+    # -------------------------------
+    unsubscribe = change_feed.subscribe(nav.apply_change)
+    # on_close (not on_disconnect): a briefly disconnected browser resumes the same session
+    page.on_close = lambda e: unsubscribe()
 
     # -------------------------------
     # Set initial page
     # -------------------------------
-    nav.navigate_to(page_name="home")
+    with startup.phase("first render"):
+        nav.navigate_to(page_name="home")
 
     # -------------------------------
     # Add Navigation to Page
     # -------------------------------
     page.add(nav.get_content())
 
+    global _startup_reported
+    if not _startup_reported:
+        _startup_reported = True
+        startup.write_report()
+
 def run_app() -> None:
     """Run the Patient Management System frontend application."""
+    parser = argparse.ArgumentParser(description="Patient Management System frontend")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print an import-time breakdown of the frontend before starting")
+    args = parser.parse_args()
+
     try:
+        if args.profile_startup:
+            dump_import_breakdown("src.frontend.client")
         logger.info("Starting the Patient Management System frontend application!")
+        tracing.configure("frontend")
         logger.info(f"Frontend will connect to backend at: {BASE_URL}")
         app(
             target=main, 
@@ -1,11 +1,23 @@
+import threading
 import flet as ft
-from typing import Optional
+from collections import OrderedDict
+from utils import tracing
+from typing import Any, Callable, Dict, Optional
+from src.frontend.frontend_utils.constants import PAGE_CACHE_SIZE, SCROLL_EVENT_INTERVAL_MS
 
 class Navigation:
     def __init__(self, page: ft.Page) -> None:
         self.page = page
         self.pages = {}
+        self.page_factories: dict[str, Callable[[], Any]] = {}
         self.current_page = ""
+        # Built pages with their content by (page name, arguments), least recently shown first.
+        # Change events keep them current, so revisiting one re-shows it without refetching
+        self.page_cache: OrderedDict[tuple, tuple[Any, ft.Control]] = OrderedDict()
+        self.current_key: Optional[tuple] = None
+        self.current_target: Optional[Any] = None
+        # Navigation (UI threads) and change events (feed thread) both touch page state
+        self.lock = threading.RLock()
 
         # ✅ Set AppBar directly on the page (not inside layout)
         self.page.appbar = ft.AppBar(
@@ -48,7 +60,12 @@ class Navigation:
             controls=[ft.Text("Loading...")],
             expand=True,
             scroll=ft.ScrollMode.AUTO,
+            on_scroll=self.forward_scroll,
+            on_scroll_interval=SCROLL_EVENT_INTERVAL_MS,
         )
+        # Whichever of the page and the content column ends up scrolling reports to the current page
+        self.page.on_scroll = self.forward_scroll
+        self.page.on_scroll_interval = SCROLL_EVENT_INTERVAL_MS
 
         # Simple layout without nested containers
         self.layout = ft.Row(
@@ -67,10 +84,49 @@ class Navigation:
     def add_page(self, name: str, page: ft.Page) -> None:
         self.pages[name] = page
 
+    def register_page(self, name: str, factory: Callable[[], Any]) -> None:
+        """Register a page that is only built (and its module imported) on first navigation."""
+        self.page_factories[name] = factory
+
+    def get_page(self, name: str) -> Optional[Any]:
+        """A new page object for a registered page (an added page is shared)."""
+        if name in self.page_factories:
+            return self.page_factories[name]()
+        return self.pages.get(name)
+
+    def page_content(self, page_name: str, **kwargs: Any) -> Optional[tuple[Any, ft.Control]]:
+        """Cached page and content for these arguments, building (and caching) them on a miss."""
+        key = (page_name, *sorted(kwargs.items()))
+        cached = self.page_cache.get(key)
+        if cached is not None:
+            self.page_cache.move_to_end(key)
+            self.current_key = key
+            return cached
+
+        target = self.get_page(page_name)
+        if target is None:
+            return None
+        built = (target, target.get_content(**kwargs))
+        self.current_key = None
+        # Pages like forms opt out: they should open fresh every time
+        if getattr(target, "cache_content", True):
+            self.page_cache[key] = built
+            self.current_key = key
+            while len(self.page_cache) > PAGE_CACHE_SIZE:
+                self.page_cache.popitem(last=False)
+        return built
+
     def navigate_to(self, page_name: str, patient_id: str = "", **kwargs: Optional[dict]) -> None:
-        if page_name in self.pages:
+        with self.lock, tracing.span(f"navigate {page_name}", patient_id=patient_id or None):
+            self._navigate_to(page_name, patient_id=patient_id, **kwargs)
+
+    def _navigate_to(self, page_name: str, patient_id: str = "", **kwargs: Optional[dict]) -> None:
+        if patient_id:
+            kwargs["patient_id"] = patient_id
+        built = self.page_content(page_name, **kwargs)
+        if built is not None:
             self.current_page = page_name
-            page_content = self.pages[page_name].get_content(**kwargs)
+            self.current_target, page_content = built
             self.content.controls = [page_content]
 
             # Update navigation rail selection
@@ -85,6 +141,29 @@ class Navigation:
 
             self.page.update()
 
+    def apply_change(self, event: Dict[str, Any]) -> None:
+        """
+        Apply a change feed event to the current page and every cached one. Cached pages that cannot
+        apply deltas are dropped (rebuilt on the next visit), as are all hidden pages on a reset.
+        """
+        with self.lock:
+            for key, (target, _) in list(self.page_cache.items()):
+                if key == self.current_key:
+                    continue
+                if event["op"] == "reset" or not hasattr(target, "apply_change"):
+                    del self.page_cache[key]
+                else:
+                    target.apply_change(event)
+            if self.current_target is not None and hasattr(self.current_target, "apply_change"):
+                self.current_target.apply_change(event)
+                self.page.update()
+
+    def forward_scroll(self, e: ft.OnScrollEvent) -> None:
+        """Pass scroll events to the current page (e.g. to prefetch the rows coming into view)."""
+        with self.lock:
+            if self.current_target is not None and hasattr(self.current_target, "on_scroll"):
+                self.current_target.on_scroll(e)
+
     def navigate_rail(self, e: ft.ControlEvent) -> None:
         index = e.control.selected_index
         if index == 0:
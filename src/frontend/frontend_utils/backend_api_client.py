@@ -1,16 +1,40 @@
 import requests
+from urllib.parse import urlsplit
+from urllib3.util import make_headers
+from utils import tracing
 from utils.customlogger import CustomLogger
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence
 from src.frontend.frontend_utils.constants import BASE_URL
 
 # Setting up custom logger
 logger = CustomLogger(name="BackendAPIClientLogger", log_file="backend_api_client.log").get_logger()
 
+class TracingSession(requests.Session):
+    """Session that records each request as a span and sends its traceparent, so backend spans join the trace."""
 
-def get_patients() -> Dict[str, Dict[str, Any]]:
-    """Fetch all patients from the backend API."""
+    def request(self, method: str, url: str, *args: Any, **kwargs: Any) -> requests.Response:
+        with tracing.span(f"HTTP {method.upper()} {urlsplit(url).path}") as attributes:
+            # A None header value is dropped by requests (tracing disabled)
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), "traceparent": tracing.traceparent()}
+            response = super().request(method, url, *args, **kwargs)
+            attributes["status"] = response.status_code
+            return response
+
+
+# Shared session: keeps the connection alive and advertises every encoding urllib3 can decode (zstd when available)
+session = TracingSession()
+session.headers.update(make_headers(accept_encoding=True))
+
+
+def projection_params(fields: Optional[Sequence[str]]) -> Dict[str, str]:
+    """`fields` query parameter for list endpoints (empty = every field)."""
+    return {"fields": ",".join(fields)} if fields is not None else {}
+
+
+def get_patients(fields: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Fetch all patients from the backend API (only `fields` of each, when given)."""
     try:
-        r = requests.get(f"{BASE_URL}/view")
+        r = session.get(f"{BASE_URL}/view", params=projection_params(fields))
         r.raise_for_status()
         logger.info(f"Fetched {len(r.json())} patients successfully")
         return r.json()
@@ -22,7 +46,7 @@ def get_patients() -> Dict[str, Dict[str, Any]]:
 def get_patient(patient_id: str) -> Optional[Dict[str, Any]]:
     """Fetch single patient by ID."""
     try:
-        r = requests.get(f"{BASE_URL}/patient/{patient_id}")
+        r = session.get(f"{BASE_URL}/patient/{patient_id}")
         if r.status_code == 200:
             logger.info(f"Fetched patient {patient_id} successfully")
             return r.json()
@@ -36,7 +60,7 @@ def get_patient(patient_id: str) -> Optional[Dict[str, Any]]:
 def create_patient(payload: Dict[str, Any]) -> bool:
     """Create a new patient."""
     try:
-        r = requests.post(f"{BASE_URL}/create", json=payload)
+        r = session.post(f"{BASE_URL}/create", json=payload)
         if r.status_code == 201:
             logger.info(f"Created patient {payload.get('patient_id')} successfully")
             return True
@@ -47,13 +71,34 @@ def create_patient(payload: Dict[str, Any]) -> bool:
         return False
 
 
-def update_patient(patient_id: str, payload: Dict[str, Any]) -> bool:
-    """Update an existing patient."""
+# Shown when a write is rejected with 409 because the patient changed since it was loaded
+CONFLICT_MESSAGE = "Someone else changed this patient after you opened it; reopen it to see their changes"
+
+
+def response_detail(r: requests.Response) -> str:
+    """Error message of a failed request: the backend's `detail` when there is one, otherwise the status."""
+    try:
+        detail = r.json().get("detail")
+    except ValueError:
+        detail = None
+    return str(detail) if detail else f"status {r.status_code}"
+
+
+def version_headers(version: Optional[int]) -> Dict[str, str]:
+    """If-Match header for optimistic concurrency (empty when the version is unknown)."""
+    return {"If-Match": f'"{version}"'} if version is not None else {}
+
+
+def update_patient(patient_id: str, payload: Dict[str, Any], version: Optional[int] = None) -> bool:
+    """Update an existing patient (only if it is still at `version`, when given)."""
     try:
-        r = requests.put(f"{BASE_URL}/edit/{patient_id}", json=payload)
+        r = session.put(f"{BASE_URL}/edit/{patient_id}", json=payload, headers=version_headers(version))
         if r.status_code == 200:
             logger.info(f"Updated patient {patient_id} successfully")
             return True
+        if r.status_code == 409:
+            logger.warning(f"Patient {patient_id} was modified by someone else, update rejected")
+            return False
         logger.warning(f"Failed to update patient {patient_id} (status {r.status_code})")
         return False
     except Exception as e:
@@ -61,13 +106,16 @@ def update_patient(patient_id: str, payload: Dict[str, Any]) -> bool:
         return False
 
 
-def delete_patient(patient_id: str) -> bool:
-    """Delete a patient by ID."""
+def delete_patient(patient_id: str, version: Optional[int] = None) -> bool:
+    """Delete a patient by ID (only if it is still at `version`, when given)."""
     try:
-        r = requests.delete(f"{BASE_URL}/delete/{patient_id}")
+        r = session.delete(f"{BASE_URL}/delete/{patient_id}", headers=version_headers(version))
         if r.status_code == 200:
             logger.info(f"Deleted patient {patient_id} successfully")
             return True
+        if r.status_code == 409:
+            logger.warning(f"Patient {patient_id} was modified by someone else, delete rejected")
+            return False
         logger.warning(f"Failed to delete patient {patient_id} (status {r.status_code})")
         return False
     except Exception as e:
@@ -75,10 +123,10 @@ def delete_patient(patient_id: str) -> bool:
         return False
 
 
-def sort_patients(sort_by: str, order: str = "asc") -> Dict[str, Dict[str, Any]]:
-    """Sort patients by a given field (age, height, weight, bmi)."""
+def sort_patients(sort_by: str, order: str = "asc", fields: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Sort patients by a given field (age, height, weight, bmi), returning only `fields` when given."""
     try:
-        r = requests.get(f"{BASE_URL}/sort", params={"sort_by": sort_by, "order": order})
+        r = session.get(f"{BASE_URL}/sort", params={"sort_by": sort_by, "order": order, **projection_params(fields)})
         r.raise_for_status()
         logger.info(f"Sorted patients by '{sort_by}' in {order} order successfully")
         return r.json()
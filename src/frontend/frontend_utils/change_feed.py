@@ -0,0 +1,93 @@
+import json
+import time
+import threading
+import requests
+from typing import Any, Callable, Dict, Iterator, Optional
+from utils.customlogger import CustomLogger
+from src.frontend.frontend_utils.constants import BASE_URL
+
+# Setting up custom logger
+logger = CustomLogger(name="ChangeFeedClientLogger", log_file="change_feed_client.log").get_logger()
+
+# A change event from /events: {"seq", "op": "upsert" | "delete" | "reset", "patient_id", "patient", "at"}
+ChangeListener = Callable[[Dict[str, Any]], None]
+
+# Reconnect delays (seconds): doubled after each failed attempt, up to the maximum
+RECONNECT_MIN_S: float = 1.0
+RECONNECT_MAX_S: float = 30.0
+
+# Read timeout of the stream; the backend sends a keepalive every 15 s, so this only trips on a dead connection
+STREAM_READ_TIMEOUT_S: float = 45.0
+
+
+class ChangeFeedSubscriber:
+    """One /events subscription per frontend process, shared by every browser session."""
+
+    def __init__(self, base_url: str = BASE_URL) -> None:
+        self.url = f"{base_url}/events"
+        # Last sequence number seen, so a reconnect resumes where the stream stopped
+        self.last_seq: Optional[int] = None
+        self._listeners: list[ChangeListener] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, listener: ChangeListener) -> Callable[[], None]:
+        """Register a listener (starting the stream on first use); returns a function that removes it."""
+        with self._lock:
+            self._listeners.append(listener)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+                self._thread.start()
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+        return unsubscribe
+
+    def _dispatch(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Change listener failed on event {event.get('seq')}: {e}")
+
+    # ---- Stream ----
+    def _run(self) -> None:
+        delay = RECONNECT_MIN_S
+        while True:
+            try:
+                for event in self._read_stream():
+                    delay = RECONNECT_MIN_S
+                    self.last_seq = event["seq"]
+                    self._dispatch(event)
+                logger.info("Change feed stream ended, reconnecting")
+            except Exception as e:
+                logger.warning(f"Change feed connection failed ({e}), retrying in {delay:.0f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_S)
+
+    def _read_stream(self) -> Iterator[Dict[str, Any]]:
+        """Parse the server-sent events of one connection (resuming after last_seq)."""
+        headers = {"Accept": "text/event-stream"}
+        if self.last_seq is not None:
+            headers["Last-Event-ID"] = str(self.last_seq)
+        with requests.get(self.url, headers=headers, stream=True, timeout=(5, STREAM_READ_TIMEOUT_S)) as r:
+            r.raise_for_status()
+            logger.info(f"Subscribed to change feed (after seq {self.last_seq})")
+            data: list[str] = []
+            for line in r.iter_lines(decode_unicode=True):
+                if line:
+                    if line.startswith("data:"):
+                        data.append(line[5:].strip())
+                    # id/event/retry lines are redundant with the JSON payload; ":" lines are keepalives
+                    continue
+                if data:
+                    yield json.loads("\n".join(data))
+                    data = []
+
+
+# Shared by every session of this frontend process
+change_feed = ChangeFeedSubscriber()
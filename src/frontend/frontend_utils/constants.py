@@ -1,2 +1,16 @@
 
-BASE_URL: str = "http://127.0.0.1:8000"  # FastAPI backend URL
\ No newline at end of file
+BASE_URL: str = "http://127.0.0.1:8000"  # FastAPI backend URL
+
+# Fields each page renders; list requests ask the backend for only these (version is needed for If-Match)
+PATIENTS_TABLE_FIELDS: tuple[str, ...] = ("name", "age", "gender", "city", "bmi", "verdict", "version")
+DASHBOARD_FIELDS: tuple[str, ...] = ("verdict",)
+
+# Pages (by name and arguments) whose built content Navigation keeps for instant revisits
+PAGE_CACHE_SIZE: int = 16
+
+# Background prefetch of patient details for the rows of the patients list that are visible or hovered
+PREFETCH_WORKERS: int = 4
+PREFETCH_MAX_PENDING: int = 32
+PREFETCH_CACHE_SIZE: int = 500
+# Throttle of scroll events sent to the current page
+SCROLL_EVENT_INTERVAL_MS: int = 100
@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional
+from utils.customlogger import CustomLogger
+from src.frontend.frontend_utils.backend_api_client import get_patient
+from src.frontend.frontend_utils.change_feed import change_feed
+from src.frontend.frontend_utils.constants import PREFETCH_WORKERS, PREFETCH_MAX_PENDING, PREFETCH_CACHE_SIZE
+
+# Setting up custom logger
+logger = CustomLogger(name="PrefetchLogger", log_file="prefetch.log").get_logger()
+
+
+class DetailPrefetcher:
+    """Background fetches of the full records of patients-list rows a user is likely to open."""
+
+    def __init__(self, workers: int = PREFETCH_WORKERS, max_pending: int = PREFETCH_MAX_PENDING,
+                 max_records: int = PREFETCH_CACHE_SIZE) -> None:
+        self.max_pending = max_pending
+        self.max_records = max_records
+        # LRU shared by every session of this process, kept current by the change feed
+        self._records: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        # In-flight fetches that a change event (or a reset, for all of them) overtook are discarded;
+        # only patients with a fetch in flight are tracked, so this stays within max_pending
+        self._stale: set[str] = set()
+        self._resets: int = 0
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._workers = workers
+
+        # Stats
+        self.hits: int = 0
+        self.misses: int = 0
+        self.cancelled: int = 0
+
+    # ---- Lookups ----
+    def get(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        """The prefetched record, or None when it is not (yet) available."""
+        with self._lock:
+            record = self._records.get(patient_id)
+            if record is None:
+                self.misses += 1
+                return None
+            self._records.move_to_end(patient_id)
+            self.hits += 1
+            return record
+
+    # ---- Prefetching ----
+    def prefetch(self, patient_ids: Iterable[str], keep: Iterable[str] = ()) -> None:
+        """
+        Fetch records of patient_ids that are neither cached nor in flight, and cancel queued fetches
+        of every other patient (except those in keep, e.g. a hovered row).
+        """
+        wanted = list(dict.fromkeys(patient_ids))
+        retained = set(wanted).union(keep)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="prefetch")
+                # Events keep prefetched records current (and drop deleted ones)
+                change_feed.subscribe(self.apply_change)
+            cancelled = [patient_id for patient_id, future in self._pending.items()
+                         if patient_id not in retained and future.cancel()]
+            for patient_id in cancelled:
+                del self._pending[patient_id]
+                self._stale.discard(patient_id)
+            self.cancelled += len(cancelled)
+            for patient_id in wanted:
+                if len(self._pending) >= self.max_pending:
+                    break
+                if patient_id in self._records or patient_id in self._pending:
+                    continue
+                self._pending[patient_id] = self._pool.submit(self._fetch, patient_id, self._resets)
+        if cancelled:
+            logger.debug(f"Cancelled {len(cancelled)} queued prefetches for rows out of view")
+
+    def _fetch(self, patient_id: str, resets: int) -> None:
+        record = None
+        try:
+            record = get_patient(patient_id)
+        finally:
+            with self._lock:
+                self._pending.pop(patient_id, None)
+                stale = patient_id in self._stale or self._resets != resets
+                self._stale.discard(patient_id)
+                if record is not None and not stale:
+                    self._store(patient_id, record)
+
+    def _store(self, patient_id: str, record: Dict[str, Any]) -> None:
+        """Insert or refresh a record (caller holds the lock)."""
+        self._records[patient_id] = record
+        self._records.move_to_end(patient_id)
+        while len(self._records) > self.max_records:
+            self._records.popitem(last=False)
+
+    # ---- Change events ----
+    def apply_change(self, event: Dict[str, Any]) -> None:
+        """Refresh (upsert) or drop (delete) a prefetched record; a reset drops them all."""
+        with self._lock:
+            if event["op"] == "reset":
+                self._records.clear()
+                self._stale.clear()
+                self._resets += 1
+                return
+            patient_id = event["patient_id"]
+            if patient_id in self._pending:
+                self._stale.add(patient_id)
+            if event["patient"] is not None and patient_id in self._records:
+                self._store(patient_id, event["patient"])
+            else:
+                self._records.pop(patient_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"records": len(self._records), "pending": len(self._pending),
+                "hits": self.hits, "misses": self.misses, "cancelled": self.cancelled}
+
+
+# Shared by every session of this frontend process
+prefetcher = DetailPrefetcher()
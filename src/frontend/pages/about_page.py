@@ -77,6 +77,9 @@ Last Updated: {datetime.now().strftime('%Y-%m-%d')}
             expand=True,
         )
     
+    def apply_change(self, event: dict) -> None:
+        """No patient data on this page: change events leave it as is."""
+
     def contact_support(self, e: ft.ControlEvent) -> None:
         self.page.open(ft.SnackBar(ft.Text("Contact Support: rohan@accurkardia.com")))
         self.page.update()
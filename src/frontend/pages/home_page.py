@@ -3,6 +3,7 @@ import flet as ft
 from typing import Any, Dict
 from collections import Counter
 from src.frontend.components.navigation import Navigation
+from src.frontend.frontend_utils.constants import DASHBOARD_FIELDS
 from src.frontend.frontend_utils.backend_api_client import get_patients
 
 
@@ -10,6 +11,9 @@ class HomePage:
     def __init__(self, page: ft.Page, nav: Navigation) -> None:
         self.page: ft.Page = page
         self.nav: Navigation = nav
+        self.patients: Dict[str, Dict[str, Any]] = {}
+        # Stat card title -> the Text showing its value (updated in place by change events)
+        self.stat_values: Dict[str, ft.Text] = {}
 
     # -------------------------------
     # Main Page Content
@@ -17,36 +21,31 @@ class HomePage:
     def get_content(self, **kwargs: Dict[str, Any]) -> ft.Container:
         """Return the dashboard container with stats and charts."""
 
-        # Fetch patient data from backend
-        patients: Dict[str, Dict[str, Any]] = get_patients()
-
-        # Aggregate stats
-        total_patients: int = len(patients)
-        verdict_counts: Counter = Counter(p["verdict"] for p in patients.values())
-        gender_counts: Counter = Counter(p["gender"] for p in patients.values())
-        city_counts: Counter = Counter(p["city"] for p in patients.values())
+        # Fetch patient data from backend (only the fields the stats are built from)
+        self.patients = get_patients(fields=DASHBOARD_FIELDS)
+        stats = self.compute_stats()
 
         # Layout: Stats cards row
         stats_row: ft.Row = ft.Row(
             controls=[
                 self.create_stat_card(
-                    "Total Patients", str(total_patients),
+                    "Total Patients", stats["Total Patients"],
                     ft.Icons.PEOPLE, ft.Colors.BLUE
                 ),
                 self.create_stat_card(
-                    "Obese Patients", str(verdict_counts.get("Obese", 0)),
+                    "Obese Patients", stats["Obese Patients"],
                     ft.Icons.WARNING, ft.Colors.RED
                 ),
                 self.create_stat_card(
-                    "Normal Patients", str(verdict_counts.get("Normal", 0)),
+                    "Normal Patients", stats["Normal Patients"],
                     ft.Icons.CHECK_CIRCLE, ft.Colors.GREEN
                 ),
                 self.create_stat_card(
-                    "Underweight Patients", str(verdict_counts.get("Underweight", 0)),
+                    "Underweight Patients", stats["Underweight Patients"],
                     ft.Icons.FITNESS_CENTER, ft.Colors.ORANGE
                 ),
                 self.create_stat_card(
-                    "Overweight Patients", str(verdict_counts.get("Overweight", 0)),
+                    "Overweight Patients", stats["Overweight Patients"],
                     ft.Icons.FITNESS_CENTER, ft.Colors.PURPLE
                 ),
             ],
@@ -117,6 +116,30 @@ class HomePage:
             horizontal_alignment=ft.CrossAxisAlignment.CENTER,
         )
 
+    # -------------------------------
+    # Stats
+    # -------------------------------
+    def compute_stats(self) -> Dict[str, str]:
+        """Stat card values (by card title) from the loaded patients."""
+        verdict_counts: Counter = Counter(p["verdict"] for p in self.patients.values())
+        stats = {"Total Patients": str(len(self.patients))}
+        for verdict in ("Obese", "Normal", "Underweight", "Overweight"):
+            stats[f"{verdict} Patients"] = str(verdict_counts.get(verdict, 0))
+        return stats
+
+    def apply_change(self, event: Dict[str, Any]) -> None:
+        """Apply a change feed event to the loaded patients and refresh the stat cards."""
+        if event["op"] == "upsert":
+            patient = event["patient"]
+            self.patients[event["patient_id"]] = {field: patient.get(field) for field in DASHBOARD_FIELDS}
+        elif event["op"] == "delete":
+            self.patients.pop(event["patient_id"], None)
+        else:
+            self.patients = get_patients(fields=DASHBOARD_FIELDS)
+        for title, value in self.compute_stats().items():
+            if title in self.stat_values:
+                self.stat_values[title].value = value
+
     # -------------------------------
     # Helpers
     # -------------------------------
@@ -124,13 +147,14 @@ class HomePage:
         self, title: str, value: str, icon: str, color: str
     ) -> ft.Card:
         """Return a stat card with a title, value, and icon."""
+        self.stat_values[title] = ft.Text(value, size=24, weight=ft.FontWeight.BOLD)
         return ft.Card(
             content=ft.Container(
                 content=ft.Column(
                     controls=[
                         ft.ListTile(
                             leading=ft.Icon(icon, color=color, size=32),
-                            title=ft.Text(value, size=24, weight=ft.FontWeight.BOLD),
+                            title=self.stat_values[title],
                             subtitle=ft.Text(title),
                         )
                     ]
@@ -1,47 +1,89 @@
-import requests
 import flet as ft
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from utils import tracing
 from src.frontend.components.navigation import Navigation
 from src.frontend.frontend_utils.constants import BASE_URL
-from src.frontend.frontend_utils.backend_api_client import get_patients
+from src.frontend.frontend_utils.backend_api_client import (
+    CONFLICT_MESSAGE, session, get_patient, response_detail, version_headers
+)
+from src.frontend.frontend_utils.prefetch import prefetcher
 
 
 class PatientDetailPage:
     def __init__(self, page: ft.Page, nav: Navigation) -> None:
         self.page: ft.Page = page
         self.nav: Navigation = nav
+        # The displayed patient and the Texts showing its fields (updated in place by change events)
+        self.patient_id: str = ""
+        self.version: Optional[int] = None    # sent as If-Match on delete
+        self.detail_texts: list[ft.Text] = []
+        self.container: ft.Container = ft.Container()
+
+    @staticmethod
+    def detail_lines(patient: Dict[str, Any]) -> list[str]:
+        return [
+            f"Name: {patient['name']}",
+            f"Age: {patient['age']}",
+            f"Gender: {patient['gender']}",
+            f"City: {patient['city']}",
+            f"Height: {patient['height']} m",
+            f"Weight: {patient['weight']} kg",
+            f"BMI: {patient['bmi']}",
+            f"Verdict: {patient['verdict']}",
+        ]
+
+    def apply_change(self, event: Dict[str, Any]) -> None:
+        """Refresh the view when the displayed patient is edited, deleted or (re)created."""
+        if event["op"] == "reset":
+            self.show(get_patient(self.patient_id))
+        elif event["patient_id"] == self.patient_id:
+            if event["patient"] is not None and self.detail_texts:
+                for text, line in zip(self.detail_texts, self.detail_lines(event["patient"])):
+                    text.value = line
+                self.version = event["patient"].get("version")
+            else:
+                self.show(event["patient"], missing="Patient was deleted")
 
     def get_content(self, patient_id: str, **kwargs: Dict[str, Any]) -> ft.Container:
         """Show details of a single patient."""
-        patient: Dict[str, Any] = get_patients().get(patient_id, {})
+        self.patient_id = patient_id
+        self.container = ft.Container(padding=20, expand=True)
+        # Rows of the patients list are usually prefetched: no round-trip before rendering
+        self.show(prefetcher.get(patient_id) or get_patient(patient_id))
+        return self.container
 
+    def show(self, patient: Optional[Dict[str, Any]], missing: str = "Patient not found") -> None:
+        """Fill the container with the patient's details (or the `missing` notice)."""
+        patient_id = self.patient_id
         if not patient:
-            return ft.Container(
-                content=ft.Text("Patient not found", size=20, color=ft.Colors.RED),
-                padding=20,
-                expand=True,
-            )
+            self.detail_texts = []
+            self.container.content = ft.Text(missing, size=20, color=ft.Colors.RED)
+            return
+        self.version = patient.get("version")
 
         def delete_patient(e: ft.ControlEvent) -> None:
-            try:
-                requests.delete(f"{BASE_URL}/delete/{patient_id}")
-                self.page.open(ft.SnackBar(ft.Text("Patient deleted successfully")))
-                self.nav.navigate_to("patients")
-            except Exception as err:
-                self.page.open(ft.SnackBar(ft.Text(f"Error: {err}")))
-            self.page.update()
-
-        details = ft.Column(
+            with tracing.span("PatientDetailPage.delete_patient", patient_id=patient_id):
+                try:
+                    # Only if nobody changed the patient since it was shown
+                    r = session.delete(f"{BASE_URL}/delete/{patient_id}", headers=version_headers(self.version))
+                    deleted = r.status_code == 200
+                    if r.status_code == 409:
+                        message = CONFLICT_MESSAGE
+                    else:
+                        message = "Patient deleted successfully" if deleted else f"Error: {response_detail(r)}"
+                except Exception as err:
+                    deleted, message = False, f"Error: {err}"
+
+                self.page.open(ft.SnackBar(ft.Text(message)))
+                self.page.update()
+                if deleted:
+                    self.nav.navigate_to("patients")
+
+        self.detail_texts = [ft.Text(line) for line in self.detail_lines(patient)]
+        self.container.content = ft.Column(
             controls=[
                 ft.Text(f"Patient ID: {patient_id}", size=20, weight=ft.FontWeight.BOLD),
-                ft.Text(f"Name: {patient['name']}"),
-                ft.Text(f"Age: {patient['age']}"),
-                ft.Text(f"Gender: {patient['gender']}"),
-                ft.Text(f"City: {patient['city']}"),
-                ft.Text(f"Height: {patient['height']} m"),
-                ft.Text(f"Weight: {patient['weight']} kg"),
-                ft.Text(f"BMI: {patient['bmi']}"),
-                ft.Text(f"Verdict: {patient['verdict']}"),
+                *self.detail_texts,
                 ft.Row(
                     controls=[
                         ft.ElevatedButton("Edit", on_click=lambda e: self.nav.navigate_to("patient_form", patient_id=patient_id)),
@@ -51,5 +93,3 @@ class PatientDetailPage:
             ],
             spacing=10,
         )
-
-        return ft.Container(content=details, padding=20, expand=True)
@@ -1,12 +1,17 @@
-import requests
 import flet as ft
+from utils import tracing
 from typing import Dict, Any, Optional
 from src.frontend.components.navigation import Navigation
 from src.frontend.frontend_utils.constants import BASE_URL
-from src.frontend.frontend_utils.backend_api_client import get_patients
+from src.frontend.frontend_utils.backend_api_client import (
+    CONFLICT_MESSAGE, session, get_patient, get_patients, response_detail, version_headers
+)
 
 
 class PatientFormPage:
+    # Navigation does not cache the form: it opens with fresh inputs (and the current record) every time
+    cache_content: bool = False
+
     def __init__(self, page: ft.Page, nav: Navigation) -> None:
         self.page: ft.Page = page
         self.nav: Navigation = nav
@@ -15,7 +20,7 @@ class PatientFormPage:
         """Display patient form. If patient_id is provided → edit mode."""
         patient: Dict[str, Any] = {}
         if patient_id:
-            patient = get_patients().get(patient_id, {})
+            patient = get_patient(patient_id) or {}
         
         # Fixed width for form fields
         field_width = 400
@@ -35,28 +40,38 @@ class PatientFormPage:
         weight = ft.TextField(label="Weight (kg)", value=str(patient.get("weight", "")), width=field_width, border_radius=50)
 
         def save_patient(e: ft.ControlEvent) -> None:
-            payload = {
-                "patient_id": patient_id or f"P{len(get_patients())+1:03d}",
-                "name": name.value,
-                "age": int(age.value) if age.value and age.value.strip() else 0,
-                "gender": gender.value,
-                "city": city.value.title() if city.value else "",
-                "height": float(height.value) if height.value and height.value.strip() else 0.0,
-                "weight": float(weight.value) if weight.value and weight.value.strip() else 0.0,
-            }
+            # One trace per save: the request to the backend and everything it does are recorded under this span
+            with tracing.span("PatientFormPage.save_patient", patient_id=patient_id or None):
+                payload = {
+                    "patient_id": patient_id or f"P{len(get_patients(fields=()))+1:03d}",
+                    "name": name.value,
+                    "age": int(age.value) if age.value and age.value.strip() else 0,
+                    "gender": gender.value,
+                    "city": city.value.title() if city.value else "",
+                    "height": float(height.value) if height.value and height.value.strip() else 0.0,
+                    "weight": float(weight.value) if weight.value and weight.value.strip() else 0.0,
+                }
 
-            try:
-                if patient_id:  # Update
-                    requests.put(f"{BASE_URL}/edit/{patient_id}", json=payload)
-                    self.page.open(ft.SnackBar(ft.Text("Patient updated successfully")))
-                else:  # Create
-                    requests.post(f"{BASE_URL}/create", json=payload)
-                    self.page.open(ft.SnackBar(ft.Text("Patient created successfully")))
-            except Exception as err:
-                self.page.open(ft.SnackBar(ft.Text(f"Error: {err}")))
+                try:
+                    if patient_id:  # Update, only if nobody changed the patient since the form was opened
+                        r = session.put(f"{BASE_URL}/edit/{patient_id}", json=payload,
+                                        headers=version_headers(patient.get("version")))
+                        saved, message = r.status_code == 200, "Patient updated successfully"
+                    else:  # Create
+                        r = session.post(f"{BASE_URL}/create", json=payload)
+                        saved, message = r.status_code == 201, "Patient created successfully"
+                    if r.status_code == 409:
+                        message = CONFLICT_MESSAGE
+                    elif not saved:
+                        message = f"Error: {response_detail(r)}"
+                except Exception as err:
+                    saved, message = False, f"Error: {err}"
 
-            self.page.update()
-            self.nav.navigate_to("patients")
+                self.page.open(ft.SnackBar(ft.Text(message)))
+                self.page.update()
+                # On failure the form stays open, so the entered values are not lost
+                if saved:
+                    self.nav.navigate_to("patients")
 
         return ft.Container(
             content=ft.Card(
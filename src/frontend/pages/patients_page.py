@@ -1,10 +1,20 @@
 import flet as ft
-from typing import Dict, Any
+from itertools import islice
+from typing import Dict, Any, Optional
 from src.frontend.components.navigation import Navigation
+from src.frontend.frontend_utils.constants import PATIENTS_TABLE_FIELDS
+from src.frontend.frontend_utils.prefetch import prefetcher
 from src.frontend.frontend_utils.backend_api_client import (
     get_patients, update_patient, delete_patient
 )
 
+# Fixed table geometry (the Material defaults), so the rows on screen follow from the scroll offset
+ROW_HEIGHT_PX: int = 48
+HEADING_HEIGHT_PX: int = 56
+# Top of the first row: page padding + title + spacing + heading row
+ROWS_TOP_PX: int = 20 + 32 + 20 + HEADING_HEIGHT_PX
+DEFAULT_VIEWPORT_PX: int = 800
+
 
 class PatientsPage:
     def __init__(self, page: ft.Page, nav: Navigation) -> None:
@@ -12,11 +22,16 @@ class PatientsPage:
         self.nav: Navigation = nav
         self.table: ft.DataTable = ft.DataTable(rows=[], columns=[])
         self.patients: Dict[str, Dict[str, Any]] = {}
+        # Rows on screen and under the pointer: their detail records are prefetched
+        self.visible: list[str] = []
+        self.hovered: Optional[str] = None
 
     def get_content(self, **kwargs: Dict[str, Any]) -> ft.Container:
         """Display a table of all patients with edit/delete actions."""
         self.load_patients()
         self.table = self.build_table()
+        self.visible = self.visible_ids(0, getattr(self.page, "height", None) or DEFAULT_VIEWPORT_PX)
+        self.request_prefetch()
 
         return ft.Container(
             content=ft.Column(
@@ -37,9 +52,48 @@ class PatientsPage:
     # Helpers
     # -------------------------
     def load_patients(self) -> None:
-        """Fetch patients from backend."""
-        self.patients = get_patients()
+        """Fetch the table's columns of every patient from backend."""
+        self.patients = get_patients(fields=PATIENTS_TABLE_FIELDS)
+
+    def apply_change(self, event: Dict[str, Any]) -> None:
+        """Apply a change feed event to the loaded patients and redraw the rows."""
+        if event["op"] == "upsert":
+            patient = event["patient"]
+            self.patients[event["patient_id"]] = {field: patient.get(field) for field in PATIENTS_TABLE_FIELDS}
+        elif event["op"] == "delete":
+            if self.patients.pop(event["patient_id"], None) is None:
+                return
+        else:
+            self.load_patients()
+        self.table.rows = self.build_table().rows
+
+    # -------------------------
+    # Prefetch
+    # -------------------------
+    def visible_ids(self, offset: float, viewport: float) -> list[str]:
+        """Patient ids of the rows within the viewport (plus one row either side)."""
+        first = max(0, int((offset - ROWS_TOP_PX) // ROW_HEIGHT_PX) - 1)
+        last = max(0, int((offset + viewport - ROWS_TOP_PX) // ROW_HEIGHT_PX) + 1)
+        return list(islice(self.patients, first, last + 1))
 
+    def request_prefetch(self) -> None:
+        """Prefetch the hovered and visible rows' details; queued fetches for other rows are cancelled."""
+        prefetcher.prefetch([self.hovered, *self.visible] if self.hovered else self.visible)
+
+    def on_scroll(self, e: ft.OnScrollEvent) -> None:
+        self.visible = self.visible_ids(e.pixels, e.viewport_dimension)
+        self.request_prefetch()
+
+    def on_row_hover(self, patient_id: str, e: ft.ControlEvent) -> None:
+        if e.data == "true":
+            self.hovered = patient_id
+            self.request_prefetch()
+        elif self.hovered == patient_id:
+            self.hovered = None
+
+    # -------------------------
+    # Table
+    # -------------------------
     def build_table(self) -> ft.DataTable:
         """Build patients table."""
 
@@ -52,13 +106,18 @@ class PatientsPage:
         def make_delete_handler(pid: str):
             return lambda e: self.confirm_delete(pid)
 
+        def make_hover_handler(pid: str):
+            return lambda e: self.on_row_hover(pid, e)
+
         rows = []
         for pid, pdata in self.patients.items():
             rows.append(
                 ft.DataRow(
                     cells=[
-                        ft.DataCell(ft.Text(pid)),
-                        ft.DataCell(ft.Text(pdata.get("name", ""))),
+                        ft.DataCell(ft.Container(ft.Text(pid), on_hover=make_hover_handler(pid)),
+                                    on_tap=make_view_handler(pid)),
+                        ft.DataCell(ft.Container(ft.Text(pdata.get("name", "")), on_hover=make_hover_handler(pid)),
+                                    on_tap=make_view_handler(pid)),
                         ft.DataCell(ft.Text(str(pdata.get("age", "")))),
                         ft.DataCell(ft.Text(pdata.get("gender", ""))),
                         ft.DataCell(ft.Text(pdata.get("city", ""))),
@@ -92,6 +151,9 @@ class PatientsPage:
             sort_ascending=True,
             heading_row_color=ft.Colors.BLACK12,
             data_row_color={ft.ControlState.HOVERED: "0x30FF0000"},
+            data_row_min_height=ROW_HEIGHT_PX,
+            data_row_max_height=ROW_HEIGHT_PX,
+            heading_row_height=HEADING_HEIGHT_PX,
             columns=[
                 ft.DataColumn(ft.Text("ID")),
                 ft.DataColumn(ft.Text("Name")),
@@ -131,7 +193,7 @@ class PatientsPage:
                 "city": city_field.value.title() if city_field.value else "",
                 "verdict": verdict_field.value,
             }
-            success = update_patient(patient_id, payload)
+            success = update_patient(patient_id, payload, version=patient.get("version"))
             self.page.close(dialog)
 
             if success:
@@ -183,7 +245,7 @@ class PatientsPage:
 
     def perform_delete(self, dialog: ft.AlertDialog, patient_id: str) -> None:
         """Execute delete and refresh UI."""
-        success = delete_patient(patient_id)
+        success = delete_patient(patient_id, version=self.patients.get(patient_id, {}).get("version"))
         self.page.close(dialog)
 
         if success:
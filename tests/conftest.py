@@ -0,0 +1,33 @@
+import os
+
+# Spans are not exported during tests (set before utils.tracing reads it)
+os.environ.setdefault("PMS_TRACING", "0")
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.backend.api import APIClient
+
+
+def patient(patient_id: str, **overrides) -> dict:
+    """Body of a valid POST /create request."""
+    return {"patient_id": patient_id, "name": "Jane Roe", "city": "Pune", "age": 40, "gender": "female",
+            "height": 1.65, "weight": 60.0, **overrides}
+
+
+@pytest.fixture
+def make_api(tmp_path):
+    """Build an APIClient over a store in tmp_path (no SurrealDB mirror) and a TestClient for its app."""
+    clients: list[APIClient] = []
+
+    def make(storage: str = "sqlite", **kwargs) -> tuple[APIClient, TestClient]:
+        kwargs.setdefault("mirror", False)
+        app = FastAPI()
+        api = APIClient(app, data_file=str(tmp_path / "patients.json"), storage=storage,
+                        sqlite_file=str(tmp_path / "patients.db"), **kwargs)
+        clients.append(api)
+        return api, TestClient(app)
+
+    yield make
+    for api in clients:
+        api.shutdown()
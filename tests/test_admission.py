@@ -0,0 +1,64 @@
+import asyncio
+import httpx
+from starlette.responses import PlainTextResponse
+from src.backend.admission import AdmissionMiddleware, RouteClassLimit, RouteClassLimiter, route_class
+
+
+def test_route_classes():
+    assert route_class({"path": "/view", "method": "GET"}) == "read"
+    assert route_class({"path": "/create", "method": "POST"}) == "write"
+    assert route_class({"path": "/import", "method": "POST"}) == "bulk"
+    assert route_class({"path": "/ready", "method": "GET"}) is None
+
+
+def test_limiter_queues_then_sheds():
+    async def run() -> None:
+        limiter = RouteClassLimiter("write", limit=1, queue=1, queue_timeout_s=0.05)
+        assert await limiter.acquire() is None
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        # Queue full: rejected at once
+        assert await limiter.acquire() == 429
+        # The queued request gives up once its wait runs out
+        assert await queued == 503
+        assert limiter.retry_after() >= 1
+
+        limiter.release(0.01)
+        assert await limiter.acquire() is None
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release(0.01)
+        assert await queued is None
+        assert (limiter.admitted, limiter.rejected_full, limiter.rejected_timeout) == (3, 1, 1)
+
+    asyncio.run(run())
+
+
+def test_write_burst_leaves_reads_alone():
+    release = asyncio.Event()
+
+    async def app(scope, receive, send) -> None:
+        if scope["method"] == "POST":
+            await release.wait()
+        await PlainTextResponse("ok")(scope, receive, send)
+
+    limited = AdmissionMiddleware(app, queue_timeout_s=0.2, limits={
+        "read": RouteClassLimit(4, 4), "write": RouteClassLimit(2, 2), "bulk": RouteClassLimit(1, 1),
+    })
+
+    async def run() -> None:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=limited), base_url="http://test") as client:
+            writes = [asyncio.create_task(client.post("/create")) for _ in range(8)]
+            await asyncio.sleep(0.05)
+            # Writes hold every write slot and queue position; reads and probes still go through
+            assert (await client.get("/view")).status_code == 200
+            assert (await client.get("/health")).status_code == 200
+            release.set()
+            responses = await asyncio.gather(*writes)
+        statuses = [response.status_code for response in responses]
+        assert statuses.count(200) == 4
+        assert statuses.count(429) == 4
+        assert all(int(response.headers["Retry-After"]) >= 1 for response in responses if response.status_code == 429)
+
+    asyncio.run(run())
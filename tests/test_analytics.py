@@ -0,0 +1,75 @@
+import random
+import numpy as np
+import pytest
+from src.backend.analytics import AGE_BAND_LABELS, PatientColumns, group_stats
+from src.backend.columnar import PatientTable
+from src.backend.storage import create_storage_engine
+from tests.conftest import patient
+
+
+def roster(count: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    return {
+        f"P{i:04d}": {
+            "name": "Jane Roe", "city": rng.choice(["Pune", "Delhi", "Agra"]), "age": rng.randint(1, 90),
+            "gender": rng.choice(["male", "female"]), "height": round(rng.uniform(1.4, 2.0), 2),
+            "weight": round(rng.uniform(40, 120), 1), "bmi": round(rng.uniform(15, 40), 2),
+            "verdict": rng.choice(["Normal", "Obese", "Underweight"]), "version": 1,
+        }
+        for i in range(count)
+    }
+
+
+def age_band(age: int) -> str:
+    edges = (0, 18, 30, 45, 60, 75)
+    return AGE_BAND_LABELS[max(i for i, edge in enumerate(edges) if age >= edge)]
+
+
+def test_group_stats_match_a_direct_computation():
+    records = roster(500)
+    result = group_stats(PatientColumns.from_records(records), ("city", "age_band"), percentiles=(10, 50, 90))
+    assert sum(group["count"] for group in result["groups"]) == 500
+    assert [(g["city"], g["age_band"]) for g in result["groups"]] == sorted((g["city"], g["age_band"]) for g in result["groups"])
+    for group in result["groups"]:
+        members = [r for r in records.values() if r["city"] == group["city"] and age_band(r["age"]) == group["age_band"]]
+        assert group["count"] == len(members)
+        bmi = np.array([r["bmi"] for r in members])
+        assert group["bmi"]["mean"] == pytest.approx(round(bmi.mean(), 2), abs=0.011)
+        assert group["bmi"]["min"] == round(bmi.min(), 2) and group["bmi"]["max"] == round(bmi.max(), 2)
+        for q in (10, 50, 90):
+            assert group["bmi"][f"p{q}"] == pytest.approx(np.percentile(bmi, q), abs=0.011)
+        verdicts = {}
+        for r in members:
+            verdicts[r["verdict"]] = verdicts.get(r["verdict"], 0) + 1
+        assert group["verdicts"] == verdicts
+
+
+def test_table_snapshot_skips_deleted_rows():
+    records = roster(50)
+    table = PatientTable.from_records(records)
+    for patient_id in list(records)[:10]:
+        table.remove(patient_id)
+        del records[patient_id]
+    from_table = group_stats(PatientColumns.from_table(table), ("gender",))
+    assert from_table == group_stats(PatientColumns.from_records(records), ("gender",))
+
+
+@pytest.mark.parametrize("name", ["memory", "sqlite"])
+def test_engines_provide_the_same_columns(tmp_path, name):
+    records = roster(100)
+    engine = create_storage_engine(name, data_file=tmp_path / "patients.json", sqlite_file=str(tmp_path / "patients.db"))
+    engine.batch(upserts=records)
+    assert group_stats(engine.columns(), ("verdict",)) == group_stats(PatientColumns.from_records(records), ("verdict",))
+    engine.close()
+
+
+def test_analytics_endpoint(make_api):
+    _, client = make_api("memory")
+    assert client.get("/analytics").json()["groups"] == []
+    for patient_id, city in (("P1", "Pune"), ("P2", "Pune"), ("P3", "Delhi")):
+        client.post("/create", json=patient(patient_id, city=city))
+    body = client.get("/analytics", params={"by": "city,gender", "metrics": "bmi", "percentiles": "50"}).json()
+    assert [(g["city"], g["gender"], g["count"]) for g in body["groups"]] == [("Delhi", "female", 1), ("Pune", "female", 2)]
+    assert set(body["groups"][0]["bmi"]) == {"mean", "min", "max", "p50"}
+    assert client.get("/analytics", params={"by": "name"}).status_code == 400
+    assert client.get("/analytics", params={"percentiles": "150"}).status_code == 400
@@ -0,0 +1,36 @@
+from tests.conftest import patient
+
+
+def test_versions_and_etags_follow_each_write(make_api):
+    api, client = make_api()
+    created = client.post("/create", json=patient("P1"))
+    assert created.status_code == 201
+    assert created.headers["ETag"] == '"1"'
+    assert client.get("/patient/P1").headers["ETag"] == '"1"'
+
+    edited = client.put("/edit/P1", json={"age": 41}, headers={"If-Match": '"1"'})
+    assert edited.status_code == 200
+    assert edited.json()["patient"]["version"] == 2
+    assert client.get("/patient/P1").json()["age"] == 41
+
+
+def test_stale_if_match_is_rejected_with_the_current_version(make_api):
+    api, client = make_api()
+    client.post("/create", json=patient("P1"))
+    client.put("/edit/P1", json={"age": 41})
+
+    stale_edit = client.put("/edit/P1", json={"age": 50}, headers={"If-Match": '"1"'})
+    assert stale_edit.status_code == 409
+    assert stale_edit.headers["ETag"] == '"2"'
+    stale_delete = client.delete("/delete/P1", headers={"If-Match": '"1"'})
+    assert stale_delete.status_code == 409
+    assert client.get("/patient/P1").json()["age"] == 41
+
+    assert client.delete("/delete/P1", headers={"If-Match": '"2"'}).status_code == 200
+    assert client.get("/patient/P1").status_code == 404
+
+
+def test_duplicate_create_is_rejected(make_api):
+    api, client = make_api()
+    assert client.post("/create", json=patient("P1")).status_code == 201
+    assert client.post("/create", json=patient("P1")).status_code == 400
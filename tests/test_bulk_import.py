@@ -0,0 +1,97 @@
+import io
+import sys
+import json
+import subprocess
+import pytest
+from src.backend.bulk_import import BulkImporter, read_chunks, validate_chunk
+
+HEADER = "patient_id,name,city,age,gender,height,weight\n"
+
+
+def csv_roster(count: int, bad_every: int = 0) -> str:
+    lines = [HEADER]
+    for i in range(count):
+        age = -1 if bad_every and i % bad_every == 0 else 30 + i % 50
+        lines.append(f"P{i:05d},Jane Roe,Pune,{age},female,1.65,60\n")
+    return "".join(lines)
+
+
+def test_read_chunks_splits_rows_and_checks_the_header():
+    chunks = list(read_chunks(io.StringIO(csv_roster(5)), "csv", chunk_size=2))
+    assert [len(rows) for _, rows in chunks] == [2, 2, 1]
+    assert chunks[0][1][0][0] == 2    # line numbers count the header
+    with pytest.raises(ValueError, match="missing columns"):
+        list(read_chunks(io.StringIO("patient_id,name\nP1,x\n"), "csv", chunk_size=2))
+
+
+def test_validate_chunk_reports_rejected_rows_by_line():
+    rows = [
+        (1, json.dumps({"patient_id": "P1", "name": "A", "city": "Pune", "age": 40, "gender": "male",
+                        "height": 1.8, "weight": 80})),
+        (2, json.dumps({"patient_id": "P2", "name": "B", "city": "Pune", "age": 0, "gender": "male",
+                        "height": 1.8, "weight": 80})),
+        (3, "not json"),
+    ]
+    valid, errors, lines = validate_chunk(None, rows)
+    assert list(valid) == ["P1"] and valid["P1"]["bmi"] == 24.69
+    assert lines == {"P1": 1}
+    assert [(error["line"], error["patient_id"]) for error in errors] == [(2, "P2"), (3, None)]
+
+
+def test_inline_import_applies_chunks_in_file_order():
+    applied = []
+    roster = csv_roster(5, bad_every=4) + "P00001,Later Row,Pune,50,female,1.65,60\n"
+    report = BulkImporter(applied.append, workers=1, chunk_size=2).run(io.StringIO(roster), "csv")
+    assert (report.rows, report.imported, report.rejected) == (6, 4, 2)
+    merged = {patient_id: record for chunk in applied for patient_id, record in chunk.items()}
+    assert merged["P00001"]["name"] == "Later Row"
+
+
+def test_pool_import_matches_the_inline_result():
+    roster = csv_roster(400, bad_every=7)
+    inline, pooled = {}, {}
+    expected = BulkImporter(inline.update, workers=1, chunk_size=50).run(io.StringIO(roster), "csv")
+    report = BulkImporter(pooled.update, workers=2, chunk_size=50).run(io.StringIO(roster), "csv")
+    assert pooled == inline
+    assert (report.imported, report.rejected) == (expected.imported, expected.rejected)
+    assert [error["line"] for error in report.errors] == [error["line"] for error in expected.errors]
+
+
+def test_import_endpoint(make_api):
+    api, client = make_api("json")
+    response = client.post("/import", content=csv_roster(10, bad_every=5), headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    assert (response.json()["imported"], response.json()["rejected"]) == (8, 2)
+    assert client.get("/patient/P00001").json()["age"] == 31
+    assert client.post("/import?format=csv", content="id,name\n1,x\n").status_code == 400
+
+
+
+def test_reimport_overwrites_or_rejects_existing_patients(make_api):
+    api, client = make_api("json")
+    client.post("/import", content=csv_roster(4), headers={"Content-Type": "text/csv"})
+    roster = csv_roster(6)
+
+    rejected = client.post("/import?on_conflict=reject", content=roster, headers={"Content-Type": "text/csv"}).json()
+    assert (rejected["imported"], rejected["overwritten"], rejected["rejected"]) == (2, 0, 4)
+    assert [(error["line"], error["patient_id"]) for error in rejected["errors"]] == [
+        (2, "P00000"), (3, "P00001"), (4, "P00002"), (5, "P00003"),
+    ]
+    assert rejected["errors"][0]["errors"] == ["Patient ID already exists"]
+    assert client.get("/patient/P00000").json()["version"] == 1
+
+    overwritten = client.post("/import", content=roster, headers={"Content-Type": "text/csv"}).json()
+    assert (overwritten["imported"], overwritten["overwritten"], overwritten["rejected"]) == (6, 6, 0)
+    assert client.get("/patient/P00000").json()["version"] == 2
+
+    assert client.post("/import?on_conflict=skip", content=roster, headers={"Content-Type": "text/csv"}).status_code == 400
+    with pytest.raises(ValueError, match="conflict mode"):
+        BulkImporter(dict.update, on_conflict="skip")
+
+def test_cli_rejects_a_chunk_size_below_one(tmp_path):
+    roster = tmp_path / "roster.csv"
+    roster.write_text(csv_roster(3), encoding="utf-8")
+    result = subprocess.run([sys.executable, "-m", "src.backend.bulk_import", str(roster), "--chunk-size", "0"],
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 2
+    assert "--chunk-size must be at least 1" in result.stderr
@@ -0,0 +1,116 @@
+import asyncio
+import pytest
+from src.backend.changefeed import ChangeFeed
+from src.frontend.frontend_utils import change_feed as change_feed_client
+from tests.conftest import patient
+
+
+@pytest.fixture
+def feed(tmp_path):
+    feed = ChangeFeed(tmp_path / "changes.db", retention=3, poll_interval=0.05)
+    yield feed
+    feed.close()
+
+
+def test_events_are_sequenced_and_pruned(feed, tmp_path):
+    assert feed.publish({"P1": {"age": 1, "version": 1}, "P2": None}) == 2
+    assert [(e["seq"], e["op"], e["patient_id"]) for e in feed.read_since(0)] == [(1, "upsert", "P1"), (2, "delete", "P2")]
+    for i in range(3):
+        feed.publish({f"P{i}": None})
+    assert feed.oldest_seq() == 3 and feed.latest_seq() == 5
+    # The sequence survives pruning and a reopen
+    feed.publish_reset()
+    reopened = ChangeFeed(tmp_path / "changes.db")
+    assert reopened.latest_seq() == 6
+    assert reopened.publish({"P9": None}) == 7
+    reopened.close()
+
+
+def test_subscribers_resume_or_get_a_reset(feed):
+    for i in range(5):
+        feed.publish({f"P{i}": None})
+
+    async def first_events(since, count):
+        events = []
+        async for event in feed.subscribe(since):
+            events.append(event)
+            if len(events) == count:
+                return events
+
+    resumed = asyncio.run(first_events(3, 2))
+    assert [event["seq"] for event in resumed] == [4, 5]
+    # seq 1 was pruned (and seq 99 belongs to another log): start over from the latest
+    reset = asyncio.run(first_events(1, 1))[0]
+    assert (reset["op"], reset["seq"]) == ("reset", 5)
+    assert asyncio.run(first_events(99, 1))[0]["op"] == "reset"
+
+
+def test_publish_wakes_a_waiting_subscriber_and_end_streams_stops_it(feed):
+    async def run():
+        received = []
+
+        async def consume():
+            async for event in feed.subscribe():
+                received.append(event["patient_id"])
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0.02)
+        await asyncio.to_thread(feed.publish, {"P1": None})
+        for _ in range(100):
+            if received:
+                break
+            await asyncio.sleep(0.01)
+        feed.end_streams()
+        await asyncio.wait_for(consumer, 2)
+        return received
+
+    assert asyncio.run(run()) == ["P1"]
+    assert feed.subscribers == 0
+
+
+class FakeStream:
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def iter_lines(self, decode_unicode: bool = False):
+        return iter(self.body.decode().split("\n"))
+
+
+def test_frontend_parses_the_backend_event_stream(make_api, monkeypatch):
+    api, client = make_api("memory")
+    client.post("/create", json=patient("P1"))
+    client.delete("/delete/P1")
+
+    async def frames():
+        body = b""
+        async for frame in api.event_stream(0):
+            body += frame
+            if body.count(b"\n\n") == 3:
+                api.changes.end_streams()
+        return body
+
+    body = asyncio.run(frames())
+    assert body.startswith(b"retry: 2000\n\nid: 1\nevent: upsert\n")
+
+    requested = {}
+
+    def fake_get(url, headers, **kwargs):
+        requested.update(headers)
+        return FakeStream(body)
+
+    monkeypatch.setattr(change_feed_client.requests, "get", fake_get)
+    subscriber = change_feed_client.ChangeFeedSubscriber("http://backend")
+    subscriber.last_seq = 0
+    events = list(subscriber._read_stream())
+    assert requested["Last-Event-ID"] == "0"
+    assert [(e["seq"], e["op"], e["patient_id"]) for e in events] == [(1, "upsert", "P1"), (2, "delete", "P1")]
+    assert events[0]["patient"]["version"] == 1
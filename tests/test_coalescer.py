@@ -0,0 +1,135 @@
+import json
+import time
+import asyncio
+import threading
+import httpx
+from fastapi import status
+from src.backend import config
+from src.backend.coalescer import WriteCoalescer
+from tests.conftest import patient
+
+
+def test_writes_within_window_share_one_flush():
+    batches = []
+    coalescer = WriteCoalescer(lambda batch, traces: batches.append(dict(batch)), window=0.05)
+    futures = [coalescer.submit(f"P{i}", {"age": i}) for i in range(5)]
+    futures.append(coalescer.submit("P0", None))
+    for future in futures:
+        assert future.result(timeout=2) is None
+    coalescer.stop()
+    assert len(batches) == 1
+    assert batches[0] == {"P1": {"age": 1}, "P2": {"age": 2}, "P3": {"age": 3}, "P4": {"age": 4}, "P0": None}
+    assert (coalescer.submitted, coalescer.flushes) == (6, 1)
+
+
+def test_full_batch_flushes_before_the_window_closes():
+    batches = []
+    coalescer = WriteCoalescer(lambda batch, traces: batches.append(list(batch)), window=10.0, max_batch=3)
+    started = time.monotonic()
+    futures = [coalescer.submit(f"P{i}", {"age": i}) for i in range(3)]
+    for future in futures:
+        future.result(timeout=2)
+    assert time.monotonic() - started < 5
+    coalescer.stop()
+    assert batches == [["P0", "P1", "P2"]]
+
+
+def test_failed_flush_fails_every_waiter():
+    def flush(batch, traces):
+        raise OSError("disk full")
+
+    coalescer = WriteCoalescer(flush, window=0.01)
+    futures = [coalescer.submit("P1", {"age": 1}), coalescer.submit("P2", {"age": 2})]
+    for future in futures:
+        assert isinstance(future.exception(timeout=2), OSError)
+    coalescer.stop()
+
+
+def test_stop_flushes_what_is_pending():
+    batches = []
+    coalescer = WriteCoalescer(lambda batch, traces: batches.append(list(batch)), window=10.0)
+    future = coalescer.submit("P1", {"age": 1})
+    coalescer.stop()
+    assert future.result(timeout=0) is None
+    assert batches == [["P1"]]
+
+
+def test_concurrent_creates_are_durable_when_answered(make_api, tmp_path):
+    api, client = make_api("json", coalesce_window_ms=50, wait_for_durability=True)
+    start = threading.Barrier(4)
+    codes = []
+
+    def create(patient_id: str) -> None:
+        start.wait()
+        codes.append(client.post("/create", json=patient(patient_id)).status_code)
+
+    threads = [threading.Thread(target=create, args=(f"P{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert codes == [201] * 4
+    assert set(json.loads((tmp_path / "patients.json").read_text(encoding="utf-8"))) == {"P0", "P1", "P2", "P3"}
+    assert api.coalescer.flushes < api.coalescer.submitted
+
+
+def test_pending_durable_write_does_not_block_other_requests(make_api):
+    api, _ = make_api(wait_for_durability=True)
+    release = threading.Event()
+    flush = api.coalescer.flush
+
+    def slow_flush(batch, traces):
+        release.wait(5)
+        flush(batch, traces)
+
+    api.coalescer.flush = slow_flush
+
+    async def run() -> None:
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            create = asyncio.create_task(client.post("/create", json=patient("P1")))
+            await asyncio.sleep(0.05)
+            # The write is parked on the flush; the loop still answers reads
+            assert (await client.get("/health")).status_code == 200
+            assert (await client.get("/patient/P1")).status_code == 200
+            assert not create.done()
+            release.set()
+            assert (await create).status_code == 201
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_does_not_stop_the_flush_thread():
+    release = threading.Event()
+    flushed = []
+
+    def flush(batch, traces):
+        release.wait(2)
+        flushed.extend(batch)
+
+    coalescer = WriteCoalescer(flush, window=0.0)
+    abandoned = coalescer.submit("P1", {"age": 1})
+    assert abandoned.cancel()
+    release.set()
+    assert coalescer.submit("P2", {"age": 2}).result(timeout=2) is None
+    assert coalescer._thread.is_alive()
+    assert flushed == ["P1", "P2"]
+    coalescer.stop()
+
+
+def test_durability_timeout_leaves_later_writes_working(make_api, monkeypatch):
+    monkeypatch.setattr(config, "DURABILITY_TIMEOUT_S", 0.1)
+    api, client = make_api(wait_for_durability=True)
+    release = threading.Event()
+    flush = api.coalescer.flush
+
+    def slow_first_flush(batch, traces):
+        release.wait(2)
+        flush(batch, traces)
+
+    api.coalescer.flush = slow_first_flush
+    assert client.post("/create", json=patient("P1")).status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    release.set()
+    assert client.post("/create", json=patient("P2")).status_code == status.HTTP_201_CREATED
+    assert api.coalescer._thread.is_alive()
+    assert set(client.get("/view").json()) == {"P1", "P2"}
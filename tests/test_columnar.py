@@ -0,0 +1,82 @@
+import pytest
+from src.backend.columnar import PatientTable
+
+
+def record(age: int = 40, city: str = "Pune", **overrides) -> dict:
+    return {"name": "Jane Roe", "city": city, "age": age, "gender": "female", "height": 1.65, "weight": 60.0,
+            "bmi": 22.04, "verdict": "Normal", "version": 1, **overrides}
+
+
+def test_records_round_trip():
+    table = PatientTable.from_records({"P1": record(name="Åsa Ødegård"), "P2": record(age=30)})
+    assert table.get("P1") == record(name="Åsa Ødegård")
+    assert table.to_dict() == {"P1": record(name="Åsa Ødegård"), "P2": record(age=30)}
+    assert "P2" in table and "P3" not in table and table.get("P3") is None
+
+
+def test_index_grows_and_finds_every_row():
+    table = PatientTable()
+    for i in range(5000):
+        table.put(f"P{i}", record(age=i % 120))
+    assert len(table) == 5000
+    assert table._filled * 3 < len(table._slots) * 2
+    assert all(table.version_of(f"P{i}") == 1 for i in range(5000))
+    assert table.get("P4321")["age"] == 4321 % 120
+
+
+def test_delete_then_reinsert_reuses_the_slot():
+    table = PatientTable()
+    for i in range(6):
+        table.put(f"P{i}", record())
+    slots = len(table._slots)
+    assert table.remove("P3")
+    assert not table.remove("P3")
+    assert table.get("P3") is None and len(table) == 5
+    # Probing walks past the deleted marker, and the insert lands in it
+    for i in (0, 1, 2, 4, 5):
+        assert table.get(f"P{i}") is not None
+    table.put("P3", record(age=33), version=2)
+    assert table.get("P3")["age"] == 33 and table.version_of("P3") == 2
+    assert len(table._slots) == slots
+    assert list(table.to_dict()) == ["P0", "P1", "P2", "P4", "P5", "P3"]
+
+
+def test_compaction_drops_tombstones():
+    table = PatientTable()
+    for i in range(3000):
+        table.put(f"P{i}", record())
+    for i in range(2500):
+        table.remove(f"P{i}")
+    assert len(table._alive) < 3000
+    assert len(table) == 500
+    assert table.get("P2999") is not None and table.get("P0") is None
+
+
+def test_overwrite_in_place_and_rollback():
+    table = PatientTable()
+    table.put("P1", record(age=40))
+    table.put("P1", record(age=41, name="New Name"), version=2)
+    assert table.get("P1") == record(age=41, name="New Name", version=2)
+    with pytest.raises(ValueError):
+        table.put("P1", record(age=10**30))
+    assert table.get("P1")["age"] == 41
+    with pytest.raises(ValueError):
+        table.put("P2", {"name": "x"})
+    assert len(table) == 1
+
+
+def test_select_filters_and_sorts_on_columns():
+    table = PatientTable.from_records({
+        "P1": record(age=50), "P2": record(age=30, city="Delhi"), "P3": record(age=20),
+    })
+    assert list(table.select(filters={"city": "Pune"}, sort_by="age")) == ["P3", "P1"]
+    assert list(table.select(sort_by="age", order="desc", limit=2)) == ["P1", "P2"]
+    assert table.select(filters={"city": "Mumbai"}) == {}
+
+
+def test_copy_is_independent():
+    table = PatientTable.from_records({"P1": record()})
+    snapshot = table.copy()
+    table.put("P1", record(age=99), version=2)
+    table.put("P2", record())
+    assert snapshot.to_dict() == {"P1": record()}
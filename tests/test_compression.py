@@ -0,0 +1,78 @@
+import gzip
+import json
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from src.backend.compression import CompressionMiddleware, negotiate
+from tests.conftest import patient
+
+PAYLOAD = {f"P{i}": {"name": "Jane Roe", "city": "Pune"} for i in range(200)}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/big")
+    def big() -> JSONResponse:
+        return JSONResponse(PAYLOAD)
+
+    @app.get("/small")
+    def small() -> JSONResponse:
+        return JSONResponse({"ok": True})
+
+    @app.get("/stream")
+    def stream() -> StreamingResponse:
+        return StreamingResponse(iter([b"x" * 2048, b"y" * 2048]), media_type="text/plain")
+
+    return TestClient(app)
+
+
+def raw_get(client: TestClient, path: str, accept_encoding: str):
+    # Read the undecoded body so the test sees exactly what went over the wire
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_negotiate_prefers_zstd_and_honours_q_values():
+    assert negotiate("gzip, zstd") == "zstd"
+    assert negotiate("gzip") == "gzip"
+    assert negotiate("zstd;q=0, gzip;q=0.5") == "gzip"
+    assert negotiate("br") is None
+    assert negotiate("*") == "zstd"
+
+
+def test_large_json_is_compressed_with_the_accepted_encoding(client):
+    response, body = raw_get(client, "/big", "gzip")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(body)) == PAYLOAD
+
+    response, body = raw_get(client, "/big", "zstd, gzip")
+    assert response.headers["Content-Encoding"] == "zstd"
+    assert int(response.headers["Content-Length"]) == len(body)
+    assert json.loads(zstandard.ZstdDecompressor().decompress(body, max_output_size=1 << 20)) == PAYLOAD
+
+
+def test_small_unaccepted_and_streamed_bodies_pass_through(client):
+    assert "Content-Encoding" not in raw_get(client, "/small", "gzip")[0].headers
+    assert "Content-Encoding" not in raw_get(client, "/big", "identity")[0].headers
+    response, body = raw_get(client, "/stream", "gzip")
+    assert "Content-Encoding" not in response.headers
+    assert body == b"x" * 2048 + b"y" * 2048
+
+
+def test_fields_projects_list_responses(make_api):
+    _, client = make_api()
+    client.post("/create", json=patient("P1"))
+    client.post("/create", json=patient("P2", age=30))
+    assert client.get("/view", params={"fields": "name,age"}).json() == {
+        "P1": {"name": "Jane Roe", "age": 40}, "P2": {"name": "Jane Roe", "age": 30},
+    }
+    assert client.get("/sort", params={"sort_by": "age", "fields": "age"}).json() == {"P2": {"age": 30}, "P1": {"age": 40}}
+    assert client.get("/view", params={"fields": "name,ssn"}).status_code == 400
+    # The full record is still served (not a cached projection)
+    assert set(client.get("/view").json()["P1"]) >= {"name", "city", "bmi", "version"}
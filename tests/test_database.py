@@ -0,0 +1,182 @@
+import asyncio
+import pytest
+from src.backend import database as database_module
+from src.backend.database import BulkInsertError, SurrealConnectionPool, SurrealDataBase
+
+
+class QueryClient:
+    """Records the SurrealQL it is sent and answers with no rows."""
+
+    def __init__(self) -> None:
+        self.queries: list[tuple[str, dict]] = []
+
+    async def query(self, query: str, params: dict | None = None) -> list:
+        self.queries.append((query, params or {}))
+        return []
+
+
+def database(client) -> SurrealDataBase:
+    db = SurrealDataBase.__new__(SurrealDataBase)
+    db.client = client
+    return db
+
+
+def test_select_patients_pushes_filters_sort_and_limit_down():
+    client = QueryClient()
+    asyncio.run(database(client).select_patients(filters={"city": "Pune"}, sort_by="age", order="desc", limit=5))
+    query, params = client.queries[0]
+    assert query == "SELECT * OMIT id FROM patient WHERE city = $city ORDER BY age DESC LIMIT $limit;"
+    assert params == {"city": "Pune", "limit": 5}
+
+
+def test_select_patients_rejects_unknown_identifiers():
+    db = database(QueryClient())
+    with pytest.raises(ValueError):
+        asyncio.run(db.select_patients(filters={"name; DELETE patient": "x"}))
+    with pytest.raises(ValueError):
+        asyncio.run(db.select_patients(sort_by="name"))
+
+
+class FakeConnection:
+    opened: list["FakeConnection"] = []
+
+    def __init__(self, **options) -> None:
+        self.ready = False
+        self.closed = False
+        FakeConnection.opened.append(self)
+
+    async def use_connection(self) -> None:
+        self.ready = True
+
+    async def close_connection(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeConnection.opened = []
+    monkeypatch.setattr(database_module, "SurrealDataBase", FakeConnection)
+    return SurrealConnectionPool(size=2)
+
+
+def test_pool_replaces_a_connection_that_failed(pool):
+    async def run() -> None:
+        await pool.open()
+        with pytest.raises(ConnectionError):
+            async with pool.connection() as db:
+                broken = db
+                raise ConnectionError("socket closed")
+        assert broken.closed
+        assert broken not in pool._connections
+        assert len(pool._connections) == 2
+        # The replacement signs in when it is next borrowed
+        for _ in range(2):
+            async with pool.connection() as db:
+                assert db.ready
+        await pool.close()
+
+    asyncio.run(run())
+
+
+def test_pool_replaces_a_connection_cancelled_mid_query(pool):
+    async def run() -> None:
+        await pool.open()
+        borrowed = []
+
+        async def query() -> None:
+            async with pool.connection() as db:
+                borrowed.append(db)
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(query())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert borrowed[0].closed
+        assert borrowed[0] not in pool._connections
+        assert pool.status()["idle"] == 2
+        await pool.close()
+
+    asyncio.run(run())
+
+
+def test_pool_keeps_a_connection_after_a_validation_error(pool):
+    async def run() -> None:
+        await pool.open()
+        with pytest.raises(ValueError):
+            async with pool.connection() as db:
+                kept = db
+                raise ValueError("bad sort field")
+        assert not kept.closed and kept in pool._connections
+        await pool.close()
+
+    asyncio.run(run())
+
+
+class BulkClient:
+    """Async query_raw that rejects the chunk containing `reject` and tracks how many chunks are in flight."""
+
+    def __init__(self, reject: str | None = None, delay: float = 0.01) -> None:
+        self.reject = reject
+        self.delay = delay
+        self.written: list[str] = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def query_raw(self, query: str, params: dict) -> dict:
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            ids = [row["patient_id"] for row in params["rows"]]
+            if self.reject in ids:
+                return {"result": [{"status": "ERR", "result": f"invalid record {self.reject}"}]}
+            await asyncio.sleep(self.delay)
+            self.written.extend(ids)
+            return {"result": [{"status": "OK", "result": None}]}
+        finally:
+            self.in_flight -= 1
+
+
+def bulk_database(client: BulkClient) -> SurrealDataBase:
+    db = SurrealDataBase.__new__(SurrealDataBase)
+    db.client = client
+    return db
+
+
+def roster(count: int) -> dict:
+    return {f"P{i:04d}": {"name": "n", "age": 30, "version": 2 if i == 0 else 1} for i in range(count)}
+
+
+def test_import_sends_bounded_concurrent_chunks():
+    client = BulkClient()
+    asyncio.run(bulk_database(client).import_patients(roster(250), chunk_size=100, concurrency=2))
+    assert sorted(client.written) == sorted(roster(250))
+    assert client.peak == 2
+
+
+@pytest.mark.parametrize("chunk_size", [0, -5])
+def test_import_rejects_a_chunk_size_below_one(chunk_size):
+    client = BulkClient()
+    with pytest.raises(ValueError, match="chunk_size must be at least 1"):
+        asyncio.run(bulk_database(client).import_patients(roster(10), chunk_size=chunk_size))
+    assert client.written == []
+
+
+def test_failed_chunk_cancels_the_rest_and_reports_what_landed():
+    client = BulkClient(reject="P0250", delay=0.05)
+
+    async def run() -> tuple[BulkInsertError, list[str]]:
+        with pytest.raises(BulkInsertError) as failure:
+            await bulk_database(client).import_patients(roster(1000), chunk_size=50, concurrency=4)
+        written = list(client.written)
+        # Nothing keeps writing in the background once the error is raised
+        await asyncio.sleep(0.2)
+        assert client.written == written
+        return failure.value, written
+
+    error, written = asyncio.run(run())
+    assert sorted(written) == sorted(error.committed)
+    assert "P0250" in error.not_written
+    assert set(error.committed) | set(error.not_written) | set(error.uncertain) == set(roster(1000))
+    assert len(error.committed) < 1000 - 50
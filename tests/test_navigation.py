@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+from src.frontend.components.navigation import Navigation
+from src.frontend.frontend_utils.constants import PAGE_CACHE_SIZE
+
+
+class FakePage:
+    """Counts builds and records the change events it is given."""
+
+    builds = 0
+
+    def __init__(self, live: bool = True, cache_content: bool = True) -> None:
+        self.events = []
+        self.cache_content = cache_content
+        if live:
+            self.apply_change = self.events.append
+
+    def get_content(self, **kwargs):
+        FakePage.builds += 1
+        return f"content {sorted(kwargs.items())}"
+
+
+def navigation(**pages) -> Navigation:
+    FakePage.builds = 0
+    nav = Navigation(SimpleNamespace(appbar=None, update=lambda: None))
+    for name, factory in pages.items():
+        nav.register_page(name, factory)
+    return nav
+
+
+def test_revisited_pages_are_not_rebuilt():
+    nav = navigation(home=FakePage, patient_detail=FakePage)
+    nav.navigate_to("home")
+    nav.navigate_to("patient_detail", patient_id="P1")
+    nav.navigate_to("patient_detail", patient_id="P2")
+    nav.navigate_to("home")
+    nav.navigate_to("patient_detail", patient_id="P1")
+    assert FakePage.builds == 3
+    assert nav.content.controls == ["content [('patient_id', 'P1')]"]
+
+
+def test_cache_is_bounded_and_forms_are_never_cached():
+    nav = navigation(patient_detail=FakePage, patient_form=lambda: FakePage(cache_content=False))
+    for i in range(PAGE_CACHE_SIZE + 1):
+        nav.navigate_to("patient_detail", patient_id=f"P{i}")
+    assert len(nav.page_cache) == PAGE_CACHE_SIZE
+    assert ("patient_detail", ("patient_id", "P0")) not in nav.page_cache
+    nav.navigate_to("patient_form")
+    nav.navigate_to("patient_form")
+    assert FakePage.builds == PAGE_CACHE_SIZE + 3
+
+
+def test_change_events_update_live_pages_and_drop_the_rest():
+    nav = navigation(home=FakePage, about=lambda: FakePage(live=False), patient_detail=FakePage)
+    nav.navigate_to("home")
+    nav.navigate_to("about")
+    nav.navigate_to("patient_detail", patient_id="P1")
+    home = nav.page_cache[("home",)][0]
+    event = {"seq": 1, "op": "upsert", "patient_id": "P1", "patient": {"version": 2}}
+    nav.apply_change(event)
+    assert ("about",) not in nav.page_cache
+    assert home.events == [event]
+    assert nav.current_target.events == [event]
+
+    reset = {"seq": 2, "op": "reset", "patient_id": None, "patient": None}
+    nav.apply_change(reset)
+    # Hidden pages go; the page on screen handles the reset itself
+    assert list(nav.page_cache) == [("patient_detail", ("patient_id", "P1"))]
+    assert nav.current_target.events == [event, reset]
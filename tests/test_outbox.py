@@ -0,0 +1,188 @@
+import time
+import sqlite3
+import asyncio
+import threading
+import pytest
+from src.backend.outbox import SyncOutbox, OutboxFullError
+
+
+class FakeSurrealDB:
+    """
+    Stands in for SurrealDataBase: records applied batches, fails the first `failures` of them,
+    rejects patients listed in `rejected` and refuses the first `connect_failures` connections.
+    """
+
+    def __init__(self, applied: list, failures: list = None, rejected: set = frozenset(),
+                 connect_failures: list = None) -> None:
+        self.applied = applied
+        self.failures = failures if failures is not None else [0]
+        self.rejected = rejected
+        self.connect_failures = connect_failures if connect_failures is not None else [0]
+
+    async def use_connection(self) -> None:
+        if self.connect_failures[0] > 0:
+            self.connect_failures[0] -= 1
+            raise ConnectionRefusedError("SurrealDB is down")
+
+    async def apply_mutations(self, mutations: list[dict]) -> None:
+        if self.failures[0] > 0:
+            self.failures[0] -= 1
+            raise ConnectionResetError("SurrealDB went away")
+        for mutation in mutations:
+            if mutation["patient_id"] in self.rejected:
+                raise Exception(f"Transaction failed: invalid record {mutation['patient_id']}")
+        self.applied.append([(mutation["op"], mutation["patient_id"]) for mutation in mutations])
+
+    async def close_connection(self) -> None:
+        pass
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def make_outbox(tmp_path, **kwargs) -> SyncOutbox:
+    kwargs.setdefault("base_delay", 0.001)
+    kwargs.setdefault("poll_interval", 0.01)
+    return SyncOutbox(tmp_path / "sync_outbox.db", **kwargs)
+
+
+def test_mutations_are_applied_in_order_and_acknowledged(tmp_path):
+    applied = []
+    outbox = make_outbox(tmp_path, db_factory=lambda: FakeSurrealDB(applied))
+    outbox.enqueue_many([("upsert", "P1", {"age": 1}), ("upsert", "P2", {"age": 2}), ("delete", "P1", None)])
+    outbox.start()
+    wait_until(lambda: outbox.depth == 0)
+    outbox.stop()
+    # Collapsed to the latest mutation per patient, in order of that mutation
+    assert applied == [[("upsert", "P2"), ("delete", "P1")]]
+
+
+def test_failed_batches_are_retried(tmp_path):
+    applied = []
+    failures = [3]
+    outbox = make_outbox(tmp_path, db_factory=lambda: FakeSurrealDB(applied, failures))
+    outbox.enqueue("upsert", "P1", {"age": 1})
+    outbox.start()
+    wait_until(lambda: outbox.depth == 0)
+    outbox.stop()
+    assert failures == [0]
+    assert applied == [[("upsert", "P1")]]
+
+
+def test_pending_mutations_survive_a_restart(tmp_path):
+    outbox = make_outbox(tmp_path)
+    assert outbox.created
+    outbox.enqueue("upsert", "P1", {"age": 1})
+    outbox.stop()
+
+    applied = []
+    reopened = make_outbox(tmp_path, db_factory=lambda: FakeSurrealDB(applied))
+    assert not reopened.created
+    assert reopened.depth == 1
+    reopened.start()
+    wait_until(lambda: reopened.depth == 0)
+    reopened.stop()
+    assert applied == [[("upsert", "P1")]]
+
+
+def test_rejected_entry_is_dead_lettered_and_the_queue_moves_on(tmp_path):
+    applied = []
+    outbox = make_outbox(tmp_path, db_factory=lambda: FakeSurrealDB(applied, rejected={"BAD"}),
+                         isolate_after=2, max_attempts=4)
+    outbox.enqueue_many([("upsert", "BAD", {"age": 1}), ("upsert", "P1", {"age": 2}), ("upsert", "P2", {"age": 3})])
+    outbox.start()
+    wait_until(lambda: outbox.depth == 0)
+    status = outbox.status()
+    outbox.stop()
+
+    assert [patient for batch in applied for _, patient in batch] == ["P1", "P2"]
+    assert status["dead_letters"] == 1
+    with sqlite3.connect(tmp_path / "sync_outbox.db") as conn:
+        patient_id, attempts, error = conn.execute("SELECT patient_id, attempts, last_error FROM outbox_dead").fetchone()
+    assert (patient_id, attempts) == ("BAD", 4)
+    assert "invalid record BAD" in error
+
+
+def test_outage_does_not_dead_letter(tmp_path):
+    applied = []
+    connect_failures = [6]
+    outbox = make_outbox(tmp_path, db_factory=lambda: FakeSurrealDB(applied, connect_failures=connect_failures),
+                         isolate_after=1, max_attempts=2)
+    outbox.enqueue("upsert", "P1", {"age": 1})
+    outbox.start()
+    wait_until(lambda: outbox.depth == 0)
+    status = outbox.status()
+    outbox.stop()
+    assert connect_failures == [0]
+    assert applied == [[("upsert", "P1")]]
+    assert status["dead_letters"] == 0
+
+
+def test_full_outbox_rejects_writes_after_the_backpressure_timeout(tmp_path):
+    outbox = make_outbox(tmp_path, max_depth=2, backpressure_timeout=0.1)
+    outbox.enqueue_many([("upsert", "P1", {"age": 1}), ("upsert", "P2", {"age": 2})])
+    with pytest.raises(OutboxFullError) as rejected:
+        outbox.wait_for_capacity()
+    assert rejected.value.depth == 2
+    outbox.stop()
+
+
+def test_only_the_leader_dispatches_a_shared_outbox(tmp_path):
+    applied_by_first, applied_by_second = [], []
+    first = make_outbox(tmp_path, db_factory=lambda: FakeSurrealDB(applied_by_first))
+    second = make_outbox(tmp_path, db_factory=lambda: FakeSurrealDB(applied_by_second))
+    first.start()
+    wait_until(lambda: first._leader_lock.held)
+    second.start()
+    second.enqueue("upsert", "P1", {"age": 1})
+    # Depth is read from the file, so both workers see the other's entries
+    wait_until(lambda: first.depth == 0 and second.depth == 0)
+    assert applied_by_first == [[("upsert", "P1")]] and applied_by_second == []
+
+    # The follower takes over once the leader exits
+    first.stop()
+    second.enqueue("upsert", "P2", {"age": 2})
+    wait_until(lambda: second.depth == 0)
+    second.stop()
+    assert applied_by_second == [[("upsert", "P2")]]
+
+
+def test_dispatcher_runs_as_a_task_on_a_given_loop(tmp_path):
+    applied = []
+    outbox = make_outbox(tmp_path, db_factory=lambda: FakeSurrealDB(applied))
+    loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    loop_thread.start()
+    outbox.start(loop)
+    outbox.enqueue("upsert", "P1", {"age": 1})
+    wait_until(lambda: outbox.depth == 0)
+    assert outbox.status()["dispatcher"]
+    outbox.stop()
+    loop.call_soon_threadsafe(loop.stop)
+    loop_thread.join(5)
+    assert applied == [[("upsert", "P1")]]
+
+
+def test_await_capacity_times_out_without_blocking_the_loop(tmp_path):
+    outbox = make_outbox(tmp_path, max_depth=1, backpressure_timeout=0.1)
+    outbox.enqueue("upsert", "P1", {"age": 1})
+    ticks = []
+
+    async def tick() -> None:
+        while True:
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+
+    async def run() -> None:
+        ticker = asyncio.create_task(tick())
+        with pytest.raises(OutboxFullError):
+            await outbox.await_capacity()
+        ticker.cancel()
+
+    asyncio.run(run())
+    assert len(ticks) > 3
+    outbox.stop()
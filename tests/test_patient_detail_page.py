@@ -0,0 +1,36 @@
+import flet as ft
+from src.frontend.frontend_utils import backend_api_client
+from src.frontend.pages import patient_detail_page
+from src.frontend.pages.patient_detail_page import PatientDetailPage
+from tests.conftest import patient
+from tests.test_patient_form_page import FakeNav, FakePage
+
+
+def open_detail(patient_id: str) -> tuple[FakePage, FakeNav, PatientDetailPage, ft.ElevatedButton]:
+    page, nav = FakePage(), FakeNav()
+    detail = PatientDetailPage(page, nav)
+    content = detail.get_content(patient_id)
+    buttons = content.content.controls[-1].controls
+    return page, nav, detail, next(button for button in buttons if button.text == "Delete")
+
+
+def test_delete_of_a_patient_changed_meanwhile_is_rejected(make_api, monkeypatch):
+    api, client = make_api()
+    monkeypatch.setattr(backend_api_client, "session", client)
+    monkeypatch.setattr(patient_detail_page, "session", client)
+    assert client.post("/create", json=patient("P1")).status_code == 201
+
+    page, nav, detail, delete = open_detail("P1")
+    # Someone else saves the patient while it is shown
+    assert client.put("/edit/P1", json={"city": "Delhi"}).status_code == 200
+    delete.on_click(None)
+    assert page.messages[-1] == backend_api_client.CONFLICT_MESSAGE
+    assert nav.visited == []
+    assert client.get("/patient/P1").status_code == 200
+
+    # A live change event brings the shown version up to date
+    detail.apply_change({"op": "upsert", "patient_id": "P1", "patient": client.get("/patient/P1").json()})
+    delete.on_click(None)
+    assert page.messages[-1] == "Patient deleted successfully"
+    assert nav.visited == ["patients"]
+    assert client.get("/patient/P1").status_code == 404
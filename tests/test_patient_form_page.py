@@ -0,0 +1,59 @@
+import flet as ft
+from src.frontend.frontend_utils import backend_api_client
+from src.frontend.pages import patient_form_page
+from src.frontend.pages.patient_form_page import PatientFormPage
+from tests.conftest import patient
+
+
+class FakePage:
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+
+    def open(self, control: ft.SnackBar) -> None:
+        self.messages.append(control.content.value)
+
+    def update(self) -> None:
+        pass
+
+
+class FakeNav:
+    def __init__(self) -> None:
+        self.visited: list[str] = []
+
+    def navigate_to(self, route: str, **kwargs) -> None:
+        self.visited.append(route)
+
+
+def open_form(patient_id: str) -> tuple[FakePage, FakeNav, list[ft.Control]]:
+    page, nav = FakePage(), FakeNav()
+    content = PatientFormPage(page, nav).get_content(patient_id)
+    return page, nav, content.content.content.controls
+
+
+def click_save(controls: list[ft.Control]) -> None:
+    save = next(control for control in controls if isinstance(control, ft.ElevatedButton))
+    save.on_click(None)
+
+
+def test_edit_of_a_patient_changed_meanwhile_is_rejected(make_api, monkeypatch):
+    api, client = make_api()
+    monkeypatch.setattr(backend_api_client, "session", client)
+    monkeypatch.setattr(patient_form_page, "session", client)
+    assert client.post("/create", json=patient("P1", name="Original")).status_code == 201
+
+    page, nav, controls = open_form("P1")
+    # Someone else saves the patient while the form is open
+    assert client.put("/edit/P1", json={"city": "Delhi"}).status_code == 200
+    controls[1].value = "Edited"
+    click_save(controls)
+
+    assert "Someone else changed this patient" in page.messages[-1]
+    assert nav.visited == []
+    assert client.get("/patient/P1").json()["name"] == "Original"
+
+    page, nav, controls = open_form("P1")
+    controls[1].value = "Edited"
+    click_save(controls)
+    assert page.messages[-1] == "Patient updated successfully"
+    assert nav.visited == ["patients"]
+    assert client.get("/patient/P1").json()["name"] == "Edited"
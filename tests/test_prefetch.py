@@ -0,0 +1,108 @@
+import time
+import threading
+from types import SimpleNamespace
+import pytest
+from src.frontend.frontend_utils import prefetch
+from src.frontend.frontend_utils.prefetch import DetailPrefetcher
+
+
+class FakeBackend:
+    """get_patient stand-in; fetches of ids in `blocked` wait until release() is called."""
+
+    def __init__(self) -> None:
+        self.fetched: list[str] = []
+        self.blocked: set[str] = set()
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def get_patient(self, patient_id: str) -> dict:
+        self.fetched.append(patient_id)
+        if patient_id in self.blocked:
+            self.started.set()
+            self.gate.wait(5)
+        return {"name": f"name of {patient_id}", "version": 1}
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = FakeBackend()
+    monkeypatch.setattr(prefetch, "get_patient", backend.get_patient)
+    monkeypatch.setattr(prefetch, "change_feed", SimpleNamespace(subscribe=lambda listener: None))
+    return backend
+
+
+def settle(prefetcher: DetailPrefetcher, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while prefetcher.stats()["pending"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_prefetched_records_are_served_from_memory(backend):
+    prefetcher = DetailPrefetcher(workers=2)
+    assert prefetcher.get("P1") is None
+    prefetcher.prefetch(["P1", "P2", "P1"])
+    settle(prefetcher)
+    assert prefetcher.get("P1")["name"] == "name of P1"
+    prefetcher.prefetch(["P1"])
+    settle(prefetcher)
+    assert sorted(backend.fetched) == ["P1", "P2"]
+    assert (prefetcher.hits, prefetcher.misses) == (1, 1)
+
+
+def test_queued_fetches_for_rows_out_of_view_are_cancelled(backend):
+    backend.blocked = {"P0"}
+    prefetcher = DetailPrefetcher(workers=1)
+    prefetcher.prefetch(["P0", "P1", "P2"])
+    backend.started.wait(5)
+    prefetcher.prefetch(["P9"], keep=["P2"])
+    backend.gate.set()
+    settle(prefetcher)
+    assert prefetcher.cancelled == 1
+    assert "P1" not in backend.fetched
+    assert prefetcher.get("P2") is not None and prefetcher.get("P9") is not None
+
+
+def test_fetch_overlapping_a_change_is_discarded(backend):
+    backend.blocked = {"P1"}
+    prefetcher = DetailPrefetcher(workers=1)
+    prefetcher.prefetch(["P1"])
+    backend.started.wait(5)
+    prefetcher.apply_change({"op": "upsert", "patient_id": "P1", "patient": {"name": "new", "version": 2}})
+    backend.gate.set()
+    settle(prefetcher)
+    assert prefetcher.get("P1") is None
+
+
+def test_change_events_refresh_drop_and_reset(backend):
+    prefetcher = DetailPrefetcher(workers=1, max_records=2)
+    prefetcher.prefetch(["P1", "P2"])
+    settle(prefetcher)
+    prefetcher.apply_change({"op": "upsert", "patient_id": "P1", "patient": {"name": "new", "version": 2}})
+    assert prefetcher.get("P1")["version"] == 2
+    prefetcher.apply_change({"op": "delete", "patient_id": "P2", "patient": None})
+    assert prefetcher.get("P2") is None
+    prefetcher.prefetch(["P3", "P4"])
+    settle(prefetcher)
+    assert prefetcher.stats()["records"] == 2
+    prefetcher.apply_change({"op": "reset", "patient_id": None, "patient": None})
+    assert prefetcher.stats()["records"] == 0
+
+
+def test_change_events_for_patients_not_in_flight_are_not_tracked(backend):
+    prefetcher = DetailPrefetcher(workers=1)
+    for i in range(1000):
+        prefetcher.apply_change({"op": "upsert", "patient_id": f"P{i}", "patient": {"name": "x", "version": 2}})
+    assert len(prefetcher._stale) == 0
+
+    backend.blocked = {"P1"}
+    prefetcher.prefetch(["P1"])
+    backend.started.wait(5)
+    prefetcher.apply_change({"op": "delete", "patient_id": "P1", "patient": None})
+    backend.gate.set()
+    settle(prefetcher)
+    assert prefetcher.get("P1") is None and len(prefetcher._stale) == 0
+    # The next fetch is not affected by the old change
+    prefetcher.prefetch(["P1"])
+    settle(prefetcher)
+    assert prefetcher.get("P1") is not None
@@ -0,0 +1,44 @@
+import time
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from src.backend.profiling import ProfilingMiddleware
+
+
+def spin(seconds: float) -> int:
+    deadline, total = time.perf_counter() + seconds, 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def profiled_client(tmp_path, **options) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, profiles_dir=tmp_path, interval_ms=1.0, **options)
+
+    @app.get("/busy")
+    def busy() -> JSONResponse:
+        return JSONResponse({"loops": spin(0.1)})
+
+    return TestClient(app)
+
+
+def test_only_requests_with_the_token_are_profiled(tmp_path):
+    client = profiled_client(tmp_path, token="secret")
+    assert "X-Profile-File" not in client.get("/busy").headers
+    assert "X-Profile-File" not in client.get("/busy", headers={"X-Profile": "guess"}).headers
+
+    response = client.get("/busy", headers={"X-Profile": "secret"})
+    profile = (tmp_path / response.headers["X-Profile-File"]).read_text(encoding="utf-8")
+    assert profile.startswith("# GET /busy\nstatus 200")
+    assert "## Top functions by self samples" in profile
+    # The handler runs on a worker thread and still shows up in the samples
+    assert ":spin:" in profile.split("## Folded stacks")[1]
+
+    assert "X-Profile-File" in client.get("/busy?profile=secret").headers
+
+
+def test_sampled_profiles_are_capped_to_the_newest(tmp_path):
+    client = profiled_client(tmp_path, sample_rate=1.0, keep=2)
+    names = [client.get("/busy").headers["X-Profile-File"] for _ in range(3)]
+    assert sorted(path.name for path in tmp_path.glob("*.txt")) == sorted(names[1:])
@@ -0,0 +1,50 @@
+import time
+import main
+from tests.conftest import patient
+
+
+def test_health_and_ready_report_the_store(make_api):
+    api, client = make_api()
+    client.post("/create", json=patient("P1"))
+    assert client.get("/health").status_code == 200
+    ready = client.get("/ready")
+    assert ready.status_code == 200
+    report = ready.json()
+    assert report["status"] == "ready" and report["reasons"] == []
+    assert report["patients"] == 1
+    assert report["storage"]["engine"] == api.engine.name
+
+
+def test_sync_lag_makes_the_instance_unready(make_api):
+    # Mirror on, no SurrealDB listening: the write stays in the outbox and its lag grows
+    api, client = make_api(storage="json", mirror=True, max_sync_lag_s=0.05)
+    assert client.post("/create", json=patient("P1")).status_code == 201
+    time.sleep(0.2)
+    lagging = client.get("/ready")
+    assert lagging.status_code == 503
+    assert lagging.json()["sync"]["depth"] >= 1
+    assert any("sync lag" in reason for reason in lagging.json()["reasons"])
+    assert client.get("/ready?sync_lag=false").status_code == 200
+
+
+def test_shutting_down_instance_is_not_ready(make_api):
+    api, client = make_api()
+    api.accepting = False
+    not_ready = client.get("/ready")
+    assert not_ready.status_code == 503
+    assert not_ready.json()["reasons"] == ["shutting down"]
+    assert client.get("/health").status_code == 200
+
+
+def test_supervisor_ignores_sync_lag_while_surrealdb_is_down(monkeypatch):
+    answers = {f"{main.BACKEND_URL}/ready": False, f"{main.BACKEND_URL}/ready?sync_lag=false": True}
+    surrealdb = {"up": False}
+
+    def fake_probe(url, **_):
+        return lambda: surrealdb["up"] if url == f"{main.SURREALDB_URL}/health" else answers[url]
+
+    monkeypatch.setattr(main, "http_probe", fake_probe)
+    probe = main.backend_probe()
+    assert probe()
+    surrealdb["up"] = True
+    assert not probe()
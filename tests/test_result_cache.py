@@ -0,0 +1,63 @@
+import pytest
+from src.backend.result_cache import ResultCache
+from tests.conftest import patient
+
+
+def test_entries_are_valid_for_one_data_version():
+    cache = ResultCache()
+    assert cache.get(("view",), 1) is None
+    cache.put(("view",), 1, b"body")
+    assert cache.get(("view",), 1) == b"body"
+    assert cache.get(("view",), 2) is None
+    # Built from data read at version 1, stored after the version moved: dropped
+    cache.put(("view",), 1, b"old")
+    assert cache.get(("view",), 2) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_unknown_version_and_disabled_cache_store_nothing():
+    cache = ResultCache()
+    cache.put(("view",), None, b"body")
+    assert cache.get(("view",), None) is None
+    disabled = ResultCache(max_entries=0)
+    disabled.get(("view",), 1)
+    disabled.put(("view",), 1, b"body")
+    assert disabled.get(("view",), 1) is None
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResultCache(max_entries=2, max_bytes=10)
+    cache.get("a", 1)
+    cache.put("a", 1, b"aaaa")
+    cache.put("b", 1, b"bbbb")
+    cache.get("a", 1)
+    cache.put("c", 1, b"cccc")
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == b"aaaa"
+    # Over the byte bound
+    cache.put("d", 1, b"dddddddd")
+    assert len(cache) == 1
+    assert cache.stats()["evictions"] == 3
+
+
+@pytest.mark.parametrize("storage", ["memory", "sqlite"])
+def test_list_responses_are_cached_until_a_write(make_api, storage):
+    api, client = make_api(storage)
+    client.post("/create", json=patient("P1"))
+    first = client.get("/sort?sort_by=age")
+    # The version is read on whichever worker thread is free: it must not depend on the thread
+    for _ in range(5):
+        assert client.get("/sort?sort_by=age").content == first.content
+    assert api.results.hits == 5
+
+    client.put("/edit/P1", json={"age": 60})
+    assert client.get("/sort?sort_by=age").json()["P1"]["age"] == 60
+
+
+def test_sqlite_write_by_another_worker_invalidates(make_api):
+    api, client = make_api("sqlite")
+    other, other_client = make_api("sqlite")
+    client.post("/create", json=patient("P1"))
+    assert client.get("/sort?sort_by=age").json()["P1"]["age"] == 40
+    assert other_client.put("/edit/P1", json={"age": 60}).status_code == 200
+    assert client.get("/sort?sort_by=age").json()["P1"]["age"] == 60
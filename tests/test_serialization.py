@@ -0,0 +1,69 @@
+import json
+import numpy as np
+from src.backend.serialization import FastJSONResponse, FragmentCache, dumps
+from tests.conftest import patient
+
+
+def test_dumps_is_compact_and_unboxes_numpy_scalars():
+    assert dumps({"age": np.int64(40), "bmi": np.float64(22.5), "city": "Pune"}) == b'{"age":40,"bmi":22.5,"city":"Pune"}'
+    assert FastJSONResponse(content=b'{"P1":{}}').body == b'{"P1":{}}'
+
+
+def test_fragments_follow_record_versions():
+    cache = FragmentCache()
+    first = cache.encode({"P1": {"name": "A", "version": 1}})
+    assert cache.encode({"P1": {"name": "A", "version": 1}}) == first
+    assert cache.hits == 1
+    assert cache.encode({"P1": {"name": "B", "version": 2}}) == b'{"P1":{"name":"B","version":2}}'
+
+
+def test_invalidate_and_bound():
+    cache = FragmentCache(max_entries=2)
+    cache.encode({"P1": {"version": 1}, "P2": {"version": 1}})
+    cache.invalidate(["P1"])
+    assert len(cache) == 1
+    cache.encode({"P1": {"version": 1}, "P3": {"version": 1}})
+    assert len(cache) <= 2
+
+
+def test_view_body_matches_the_records(make_api):
+    api, client = make_api()
+    for patient_id in ("P1", "P2"):
+        client.post("/create", json=patient(patient_id))
+    client.put("/edit/P1", json={"age": 41})
+    body = client.get("/view").json()
+    assert body["P1"]["age"] == 41 and body["P1"]["version"] == 2
+    sorted_body = json.loads(client.get("/sort", params={"sort_by": "age"}).content)
+    assert list(sorted_body) == ["P2", "P1"]
+    assert sorted_body == body
+
+
+def test_projected_fragments_are_cached_per_projection():
+    cache = FragmentCache()
+    record = {"name": "A", "age": 40, "version": 1}
+    assert cache.encode({"P1": record}, ("name",)) == b'{"P1":{"name":"A"}}'
+    assert cache.encode({"P1": record}) == b'{"P1":{"name":"A","age":40,"version":1}}'
+    assert cache.encode({"P1": record}, ("name",)) == b'{"P1":{"name":"A"}}'
+    assert cache.hits == 1
+
+
+def test_recreated_record_is_not_served_from_an_old_data_version():
+    cache = FragmentCache()
+    cache.encode({"P1": {"name": "A", "version": 1}}, data_version=(1, 100))
+    # Deleted and recreated by another worker: same version, new content, new store version
+    assert cache.encode({"P1": {"name": "B", "version": 1}}, data_version=(1, 101)) == b'{"P1":{"name":"B","version":1}}'
+    # An unknown store version caches nothing
+    cache.encode({"P1": {"name": "C", "version": 1}}, data_version=None)
+    assert len(cache) == 0
+
+
+def test_write_by_another_worker_is_visible(make_api):
+    worker, client = make_api(storage="json", shared=True)
+    other, other_client = make_api(storage="json", shared=True)
+    assert client.post("/create", json=patient("P1", name="First")).status_code == 201
+    assert client.get("/view").json()["P1"]["name"] == "First"
+
+    assert other_client.delete("/delete/P1").status_code == 200
+    assert other_client.post("/create", json=patient("P1", name="Second")).status_code == 201
+    assert other.engine.get("P1")["version"] == 1
+    assert client.get("/view").json()["P1"]["name"] == "Second"
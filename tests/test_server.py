@@ -0,0 +1,15 @@
+import functools
+from fastapi.testclient import TestClient
+from src.backend import server
+from src.backend.api import APIClient
+from tests.conftest import patient
+
+
+def test_app_starts_under_a_test_client(tmp_path, monkeypatch):
+    # The test client runs the lifespan off the main thread, where signal handlers cannot be installed
+    monkeypatch.setattr(server, "APIClient", functools.partial(
+        APIClient, data_file=str(tmp_path / "patients.json"), storage="memory", mirror=False, shared=False,
+    ))
+    with TestClient(server.app) as client:
+        assert client.get("/health").status_code == 200
+        assert client.post("/create", json=patient("P1")).status_code == 201
@@ -0,0 +1,91 @@
+import pytest
+from src.backend import shards
+from src.backend.shards import ShardLayout, load_tables, shard_dir_of, shard_file
+from src.backend.storage import ShardedJSONFileEngine, read_json_file, write_json_file
+from tests.test_storage import record
+
+
+def roster(count: int) -> dict:
+    return {f"P{i:03d}": record(age=20 + i % 50) for i in range(count)}
+
+
+def test_layouts():
+    hashed = ShardLayout.from_config(4)
+    assert hashed.scheme == "hash" and hashed.count == 4
+    assert hashed.shard_of("P001") == ShardLayout.from_config(4).shard_of("P001")
+    ranged = ShardLayout.from_config(1, ["P100", "P200"])
+    assert [ranged.shard_of(pid) for pid in ("P050", "P100", "P150", "P250")] == [0, 1, 1, 2]
+    assert ShardLayout.from_manifest(ranged.to_manifest()) == ranged
+    with pytest.raises(ValueError):
+        ShardLayout.from_config(1, ["P200", "P100"])
+    with pytest.raises(ValueError):
+        ShardLayout.from_config(0)
+
+
+def test_data_file_is_split_and_kept_aside(tmp_path):
+    data_file = tmp_path / "patients.json"
+    write_json_file(data_file, roster(40))
+    engine = ShardedJSONFileEngine(data_file, ShardLayout.from_config(4))
+    assert engine.scan().keys() == roster(40).keys()
+    assert not data_file.exists() and (tmp_path / "patients.json.pre-shard").exists()
+    on_disk = {}
+    for shard in range(4):
+        part = read_json_file(shard_file(shard_dir_of(data_file), shard))
+        assert all(engine.layout.shard_of(pid) == shard for pid in part)
+        on_disk.update(part)
+    assert on_disk.keys() == roster(40).keys()
+    engine.close()
+
+
+def test_flush_rewrites_only_touched_shards(tmp_path):
+    data_file = tmp_path / "patients.json"
+    write_json_file(data_file, roster(40))
+    engine = ShardedJSONFileEngine(data_file, ShardLayout.from_config(4), write_through=False)
+    before = [path.stat().st_mtime_ns for path in engine.shard_files]
+    engine.upsert("P007", record(age=99))
+    engine.flush()
+    after = [path.stat().st_mtime_ns for path in engine.shard_files]
+    changed = [shard for shard in range(4) if before[shard] != after[shard]]
+    assert changed == [engine.layout.shard_of("P007")]
+    engine.close()
+
+
+def test_changing_the_layout_reshards(tmp_path):
+    data_file = tmp_path / "patients.json"
+    write_json_file(data_file, roster(40))
+    ShardedJSONFileEngine(data_file, ShardLayout.from_config(4)).close()
+    engine = ShardedJSONFileEngine(data_file, ShardLayout.from_config(1, ["P020"]))
+    assert engine.scan().keys() == roster(40).keys()
+    assert set(read_json_file(engine.shard_files[0])) == {f"P{i:03d}" for i in range(20)}
+    assert len(list(shard_dir_of(data_file).glob("shard-*.json"))) == 2
+    engine.close()
+
+
+def test_other_workers_shard_writes_are_reloaded(tmp_path):
+    data_file = tmp_path / "patients.json"
+    write_json_file(data_file, roster(40))
+    first = ShardedJSONFileEngine(data_file, ShardLayout.from_config(4), shared=True)
+    second = ShardedJSONFileEngine(data_file, ShardLayout.from_config(4), shared=True)
+    second.upsert("P007", record(age=99))
+    second.delete("P008")
+    assert first.get("P007")["age"] == 99
+    assert first.get("P008") is None
+    assert first.count() == 39
+    first.close()
+    second.close()
+
+
+def test_parallel_load_matches_sequential(tmp_path, monkeypatch):
+    layout = ShardLayout.from_config(3)
+    parts = [{} for _ in range(3)]
+    for pid, value in roster(60).items():
+        parts[layout.shard_of(pid)][pid] = value
+    paths = [shard_file(tmp_path, shard) for shard in range(3)]
+    for path, part in zip(paths, parts):
+        write_json_file(path, part)
+
+    sequential = load_tables(paths, workers=1)
+    monkeypatch.setattr(shards, "PARALLEL_LOAD_MIN_BYTES", 0)
+    parallel = load_tables(paths, workers=2)
+    assert dict(parallel.items()) == dict(sequential.items())
+    assert sorted(dict(parallel.items())) == sorted(roster(60))
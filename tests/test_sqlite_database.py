@@ -0,0 +1,124 @@
+import json
+import sqlite3
+import threading
+import pytest
+from src.backend.sqlite_database import SQLiteDataBase
+
+
+def row(name: str, city: str = "Pune", age: int = 40, bmi: float = 22.0, verdict: str = "Normal") -> dict:
+    return {"name": name, "city": city, "age": age, "gender": "female", "height": 1.65, "weight": 60.0,
+            "bmi": bmi, "verdict": verdict}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SQLiteDataBase(str(tmp_path / "patients.db"))
+    yield db
+    db.close_connections()
+
+
+def test_upsert_get_and_delete(db):
+    db.upsert_patient("P001", row("Ann"))
+    db.upsert_patient("P001", row("Ann", age=41))
+    assert db.get_patient("P001")["age"] == 41
+    assert db.count_patients() == 1
+    assert db.delete_patient("P001") is True
+    assert db.delete_patient("P001") is False
+    assert db.get_patient("P001") is None
+
+
+def test_get_patients_filters_sorts_and_limits(db):
+    db.upsert_patients({
+        "P001": row("Ann", city="Pune", age=50),
+        "P002": row("Bob", city="Delhi", age=30),
+        "P003": row("Cid", city="Pune", age=20),
+    })
+    assert list(db.get_patients(filters={"city": "Pune"})) == ["P001", "P003"]
+    assert list(db.get_patients(sort_by="age", order="desc")) == ["P001", "P002", "P003"]
+    assert list(db.get_patients(sort_by="age", limit=2)) == ["P003", "P002"]
+    with pytest.raises(ValueError):
+        db.get_patients(filters={"name": "Ann"})
+    with pytest.raises(ValueError):
+        db.get_patients(sort_by="name")
+
+
+def test_batch_upsert_rolls_back_on_error(db):
+    db.upsert_patient("P001", row("Ann"))
+    with pytest.raises(sqlite3.IntegrityError):
+        db.upsert_patients({"P002": row("Bob"), "P003": {**row("Cid"), "name": None}})
+    assert list(db.get_patients()) == ["P001"]
+
+
+def test_uses_wal_journal(db):
+    assert db.get_connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_import_from_json(db, tmp_path):
+    source = tmp_path / "patients.json"
+    source.write_text(json.dumps({"P001": row("Ann"), "P002": row("Bob")}), encoding="utf-8")
+    assert db.import_from_json(source) == 2
+    assert db.get_patient("P002")["name"] == "Bob"
+
+
+def test_each_thread_gets_its_own_connection(db):
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(db.get_connection()))
+    worker.start()
+    worker.join()
+    assert seen[0] is not db.get_connection()
+
+
+def test_connections_of_other_threads_are_closed(db):
+    opened = []
+
+    def use() -> None:
+        opened.append(db.get_connection())
+        db.get_connection().execute("SELECT 1")
+
+    workers = [threading.Thread(target=use) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert db.connection_count() == 1 + len(opened)
+    db.close_connections()
+    assert db.connection_count() == 0
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+            conn.execute("SELECT 1")
+
+
+def test_api_seeds_sqlite_from_json(make_api, tmp_path):
+    (tmp_path / "patients.json").write_text(json.dumps({"P001": row("Ann"), "P002": row("Bob", age=30)}),
+                                            encoding="utf-8")
+    _, client = make_api("sqlite")
+    assert client.get("/patient/P002").json()["name"] == "Bob"
+    assert client.get("/patient/P404").status_code == 404
+    assert list(client.get("/sort", params={"sort_by": "age"}).json()) == ["P002", "P001"]
+
+
+def test_view_and_sort_take_filters_and_a_limit(make_api, tmp_path):
+    (tmp_path / "patients.json").write_text(json.dumps({
+        "P001": row("Ann", city="Pune", age=50),
+        "P002": row("Bob", city="Delhi", age=30),
+        "P003": row("Cid", city="Pune", age=20),
+    }), encoding="utf-8")
+    _, client = make_api("sqlite")
+    assert list(client.get("/view", params={"city": "Pune"}).json()) == ["P001", "P003"]
+    assert list(client.get("/sort", params={"sort_by": "age", "city": "Pune", "limit": 1}).json()) == ["P003"]
+    assert client.get("/view", params={"limit": 0}).status_code == 422
+
+
+def test_databases_without_versions_are_migrated(tmp_path):
+    path = tmp_path / "patients.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE patients (patient_id TEXT PRIMARY KEY, name TEXT NOT NULL, city TEXT NOT NULL, "
+                     "age INTEGER NOT NULL, gender TEXT NOT NULL, height REAL NOT NULL, weight REAL NOT NULL, "
+                     "bmi REAL NOT NULL, verdict TEXT NOT NULL)")
+        conn.execute("INSERT INTO patients VALUES ('P001', 'Ann', 'Pune', 40, 'female', 1.65, 60.0, 22.0, 'Normal')")
+    conn.close()
+    db = SQLiteDataBase(str(path))
+    assert db.get_patient("P001")["version"] == 1
+    assert db.compare_and_set("P001", 1, row("Ann", age=41)) == 2
+    db.close_connections()
@@ -0,0 +1,44 @@
+import sys
+import subprocess
+from types import SimpleNamespace
+from src.frontend.components.navigation import Navigation
+from utils.startup import StartupProfiler
+
+
+def test_importing_the_api_does_not_load_the_surrealdb_sdk():
+    probe = "import sys, src.backend.api; print('surrealdb' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_profiler_accumulates_phases():
+    profiler = StartupProfiler("test")
+    with profiler.phase("imports"):
+        pass
+    with profiler.phase("imports"):
+        pass
+    report = profiler.report()
+    assert set(report) == {"imports", "total"}
+    assert report["total"] >= report["imports"]
+
+
+def test_api_reports_its_startup_phases(make_api):
+    api, _ = make_api()
+    assert {"data load", "route registration"} <= set(api.startup.phases)
+
+
+def test_pages_are_built_on_first_navigation():
+    page = SimpleNamespace(appbar=None, update=lambda: None)
+    nav = Navigation(page)
+    built = []
+
+    def factory():
+        built.append(1)
+        return SimpleNamespace(get_content=lambda **kwargs: "about page")
+
+    nav.register_page("about", factory)
+    assert built == []
+    nav.navigate_to("about")
+    nav.navigate_to("about")
+    assert built == [1]
+    assert nav.content.controls == ["about page"]
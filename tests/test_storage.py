@@ -0,0 +1,219 @@
+import json
+import sqlite3
+import asyncio
+import threading
+import pytest
+from src.backend.storage import VersionConflictError, create_storage_engine
+
+
+def record(age: int = 40, city: str = "Pune", **overrides) -> dict:
+    return {"name": "Jane Roe", "city": city, "age": age, "gender": "female", "height": 1.65, "weight": 60.0,
+            "bmi": 22.04, "verdict": "Normal", **overrides}
+
+
+@pytest.fixture(params=["memory", "json", "json-sharded", "sqlite"])
+def engine(request, tmp_path):
+    name = request.param
+    engine = create_storage_engine(name.split("-")[0], data_file=tmp_path / "patients.json",
+                                   sqlite_file=str(tmp_path / "patients.db"), shards=4 if name == "json-sharded" else 1)
+    yield engine
+    engine.close()
+
+
+def test_point_writes_and_reads(engine):
+    engine.upsert("P1", record(age=30))
+    engine.upsert("P2", record(age=50))
+    assert engine.get("P1")["age"] == 30
+    assert set(engine.scan()) == {"P1", "P2"}
+    assert engine.delete("P1")
+    assert not engine.delete("P1")
+    assert engine.get("P1") is None
+    assert engine.count() == 1
+
+
+def test_sorted_scan(engine):
+    engine.batch(upserts={"P1": record(age=30), "P2": record(age=50), "P3": record(age=40)})
+    assert list(engine.sorted_scan("age", "desc")) == ["P2", "P3", "P1"]
+    assert list(engine.sorted_scan("age", limit=2)) == ["P1", "P3"]
+
+
+def test_batch_applies_upserts_and_deletes(engine):
+    engine.batch(upserts={"P1": record(), "P2": record()})
+    engine.batch(upserts={"P3": record()}, deletes=["P1"])
+    assert set(engine.scan()) == {"P2", "P3"}
+
+
+def test_returned_records_are_copies(engine):
+    engine.upsert("P1", record(age=30))
+    engine.get("P1")["age"] = 99
+    assert engine.get("P1")["age"] == 30
+
+
+@pytest.mark.parametrize("name", ["memory", "sqlite"])
+def test_empty_engines_are_seeded_from_the_json_file(tmp_path, name):
+    data_file = tmp_path / "patients.json"
+    data_file.write_text(json.dumps({"P1": record()}), encoding="utf-8")
+    engine = create_storage_engine(name, data_file=data_file, sqlite_file=str(tmp_path / "patients.db"))
+    assert engine.get("P1")["city"] == "Pune"
+    engine.close()
+
+
+def test_json_engine_rewrites_the_file(tmp_path):
+    data_file = tmp_path / "patients.json"
+    engine = create_storage_engine("json", data_file=data_file)
+    engine.upsert("P1", record(age=33))
+    assert json.loads(data_file.read_text(encoding="utf-8"))["P1"]["age"] == 33
+    assert create_storage_engine("json", data_file=data_file).get("P1")["age"] == 33
+
+
+def test_unknown_engine_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        create_storage_engine("csv", data_file=tmp_path / "patients.json")
+
+
+def test_query_filters_sorts_and_limits(engine):
+    engine.batch(upserts={"P1": record(age=30, city="Pune"), "P2": record(age=50, city="Pune"),
+                          "P3": record(age=40, city="Delhi")})
+    assert list(engine.query(sort_by="age", order="desc")) == ["P2", "P3", "P1"]
+    assert list(engine.query(filters={"city": "Pune"}, sort_by="age")) == ["P1", "P2"]
+    assert list(engine.query(filters={"city": "Delhi"}, limit=1)) == ["P3"]
+    with pytest.raises(ValueError):
+        engine.query(filters={"name": "Jane Roe"})
+
+
+def test_deferred_json_writes_reach_the_file_on_flush(tmp_path):
+    data_file = tmp_path / "patients.json"
+    engine = create_storage_engine("json", data_file=data_file, write_through=False)
+    engine.upsert("P1", record(age=33))
+    assert engine.get("P1")["age"] == 33
+    assert not data_file.exists()
+    engine.flush()
+    assert json.loads(data_file.read_text(encoding="utf-8"))["P1"]["age"] == 33
+
+
+def test_compare_and_set_rejects_stale_versions(engine):
+    assert engine.compare_and_set("P1", 0, record()) == 1
+    with pytest.raises(VersionConflictError) as conflict:
+        engine.compare_and_set("P1", 0, record())
+    assert conflict.value.current_version == 1
+    assert engine.compare_and_set("P1", 1, record(age=41)) == 2
+    with pytest.raises(VersionConflictError):
+        engine.compare_and_set("P1", 1, record(age=42))
+    with pytest.raises(VersionConflictError):
+        engine.compare_and_delete("P1", 1)
+    engine.compare_and_delete("P1", 2)
+    assert engine.get("P1") is None
+
+
+def test_concurrent_compare_and_set_has_one_winner(engine):
+    engine.compare_and_set("P1", 0, record())
+    winners, losers = [], []
+    start = threading.Barrier(8)
+
+    def edit(age: int) -> None:
+        start.wait()
+        try:
+            engine.compare_and_set("P1", 1, record(age=age))
+            winners.append(age)
+        except VersionConflictError:
+            losers.append(age)
+
+    threads = [threading.Thread(target=edit, args=(20 + i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(winners) == 1 and len(losers) == 7
+    assert engine.get("P1")["age"] == winners[0]
+    assert engine.get("P1")["version"] == 2
+
+
+def test_shared_json_engines_see_each_others_writes(tmp_path):
+    data_file = tmp_path / "patients.json"
+    first = create_storage_engine("json", data_file=data_file, shared=True)
+    second = create_storage_engine("json", data_file=data_file, shared=True)
+    first.compare_and_set("P1", 0, record(age=30))
+    assert second.get("P1")["age"] == 30
+    # The second worker's stale view is refreshed under the lock before it checks the version
+    with pytest.raises(VersionConflictError):
+        second.compare_and_set("P1", 0, record(age=31))
+    second.compare_and_set("P1", 1, record(age=31))
+    assert first.get("P1")["age"] == 31
+    assert first.count() == 1
+
+
+def test_memory_engine_cannot_be_shared(tmp_path):
+    with pytest.raises(ValueError):
+        create_storage_engine("memory", data_file=tmp_path / "patients.json", shared=True)
+
+
+def test_status_reports_size_without_a_scan(engine):
+    engine.upsert("P1", record())
+    status = engine.status()
+    assert status["ready"] is True
+    assert status["patients"] == 1
+
+
+def test_async_api_matches_the_sync_one(engine):
+    async def run() -> None:
+        await engine.aopen()
+        assert await engine.acompare_and_set("P1", 0, record(age=30)) == 1
+        await engine.acompare_and_set("P2", 0, record(age=20, city="Delhi"))
+        assert (await engine.aget("P1"))["age"] == 30
+        assert set(await engine.ascan()) == {"P1", "P2"}
+        assert list(await engine.aquery(sort_by="age")) == ["P2", "P1"]
+        with pytest.raises(VersionConflictError):
+            await engine.acompare_and_delete("P1", 5)
+        await engine.acompare_and_delete("P1", 1)
+        assert await engine.aget("P1") is None
+
+    asyncio.run(run())
+
+
+def test_data_version_moves_on_writes(engine):
+    before = engine.data_version()
+    engine.upsert("P1", record())
+    assert engine.data_version() != before
+
+
+def test_data_version_is_the_same_from_every_thread(engine):
+    engine.upsert("P1", record())
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(engine.data_version()))
+    worker.start()
+    worker.join()
+    assert seen == [engine.data_version()]
+    assert asyncio.run(engine.adata_version()) == seen[0]
+
+
+def test_sqlite_data_version_sees_other_processes_commits(tmp_path):
+    engine = create_storage_engine("sqlite", data_file=tmp_path / "patients.json", sqlite_file=str(tmp_path / "patients.db"))
+    engine.upsert("P1", record())
+    before = engine.data_version()
+    # Another process's connection commits
+    with sqlite3.connect(tmp_path / "patients.db") as conn:
+        conn.execute("UPDATE patients SET age = 60")
+    assert engine.data_version() != before
+    engine.close()
+
+def test_rejected_writes_leave_the_data_version_alone(engine):
+    engine.compare_and_set("P1", 0, record())
+    before = engine.data_version()
+    with pytest.raises(VersionConflictError):
+        engine.compare_and_set("P1", 0, record(age=50))
+    with pytest.raises(VersionConflictError):
+        engine.compare_and_delete("P1", 7)
+    assert not engine.delete("P404")
+    assert engine.data_version() == before
+
+
+@pytest.mark.parametrize("name", ["json", "sqlite"])
+def test_flushed_writes_survive_a_reopen(tmp_path, name):
+    options = dict(data_file=tmp_path / "patients.json", sqlite_file=str(tmp_path / "patients.db"))
+    engine = create_storage_engine(name, write_through=False, **options)
+    engine.compare_and_set("P1", 0, record(age=33))
+    engine.flush()
+    engine.close()
+    reopened = create_storage_engine(name, **options)
+    assert reopened.get("P1")["version"] == 1 and reopened.get("P1")["age"] == 33
+    reopened.close()
@@ -0,0 +1,78 @@
+import sys
+import signal
+import threading
+import pytest
+from utils.supervisor import ManagedProcess, Supervisor
+
+# Touches argv[1], optionally checks that argv[2] already exists, then lives for a while (or exits)
+CHILD = (
+    "import pathlib, sys, time\n"
+    "if len(sys.argv) > 3 and not pathlib.Path(sys.argv[3]).exists(): sys.exit(3)\n"
+    "with open(sys.argv[1], 'a') as f: f.write('started\\n')\n"
+    "time.sleep(float(sys.argv[2]))\n"
+)
+
+
+def child(name: str, marker, lifetime: float = 60.0, after=None, **kwargs) -> ManagedProcess:
+    command = [sys.executable, "-c", CHILD, str(marker), str(lifetime)] + ([str(after)] if after else [])
+    return ManagedProcess(name, command, probe=marker.exists, ready_timeout=10.0, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def restore_signal_handlers():
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGINT, signal.SIGTERM)}
+    yield
+    for sig, handler in handlers.items():
+        signal.signal(sig, handler)
+
+
+def stop_when(supervisor: Supervisor, condition) -> threading.Thread:
+    def watch() -> None:
+        while not condition():
+            threading.Event().wait(0.02)
+        supervisor.request_stop()
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    return watcher
+
+
+def test_children_start_in_order_and_are_stopped(tmp_path):
+    first = child("first", tmp_path / "first")
+    second = child("second", tmp_path / "second", after=tmp_path / "first")
+    supervisor = Supervisor([first, second], poll_interval=0.05)
+    stop_when(supervisor, (tmp_path / "second").exists)
+    assert supervisor.run() == 0
+    assert first.process.returncode is not None and second.process.returncode is not None
+    assert second.process.returncode != 3
+
+
+def test_crashed_child_is_restarted_until_the_budget_runs_out(tmp_path):
+    marker = tmp_path / "crashy"
+    crashy = child("crashy", marker, lifetime=0.05)
+    supervisor = Supervisor([crashy], max_restarts=2, poll_interval=0.05)
+    assert supervisor.run() == 1
+    assert marker.read_text().count("started") == 3
+
+
+def test_missing_optional_child_is_skipped(tmp_path):
+    optional = ManagedProcess("surrealdb", ["pms-no-such-command"], probe=lambda: False, required=False)
+    backend = child("backend", tmp_path / "backend")
+    supervisor = Supervisor([optional, backend], poll_interval=0.05)
+    stop_when(supervisor, (tmp_path / "backend").exists)
+    assert supervisor.run() == 0
+    assert optional.process is None
+
+
+def test_missing_required_child_fails_the_run(tmp_path):
+    required = ManagedProcess("backend", ["pms-no-such-command"], probe=lambda: False)
+    assert Supervisor([required]).run() == 1
+
+
+def test_service_that_is_already_ready_is_reused(tmp_path):
+    running = ManagedProcess("surrealdb", ["pms-no-such-command"], probe=lambda: True)
+    backend = child("backend", tmp_path / "backend")
+    supervisor = Supervisor([running, backend], poll_interval=0.05)
+    stop_when(supervisor, (tmp_path / "backend").exists)
+    assert supervisor.run() == 0
+    assert running.process is None
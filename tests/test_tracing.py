@@ -0,0 +1,106 @@
+import pytest
+import requests
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.backend.tracing import TracingMiddleware
+from src.frontend.frontend_utils.backend_api_client import TracingSession
+from tests.conftest import patient
+from utils import tracing
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def exporter(tmp_path, monkeypatch):
+    """Enable tracing for the test with spans written under tmp_path."""
+    exporter = tracing.SpanExporter(tmp_path / "spans.jsonl")
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+    monkeypatch.setattr(tracing, "exporter", exporter)
+    return exporter
+
+
+def test_parse_traceparent():
+    assert tracing.parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == tracing.SpanContext(TRACE_ID, PARENT_ID)
+    for value in (None, "", "garbage", f"00-{TRACE_ID}-{PARENT_ID}", f"00-{TRACE_ID[:-1]}x-{PARENT_ID}-01"):
+        assert tracing.parse_traceparent(value) is None
+
+
+def test_nested_spans_share_the_trace(exporter):
+    with tracing.span("outer") as attributes:
+        attributes["status"] = 200
+        with tracing.span("inner"):
+            inner_traceparent = tracing.traceparent()
+    inner, outer = exporter.recent
+    assert (inner["name"], outer["name"]) == ("inner", "outer")
+    assert inner["trace_id"] == outer["trace_id"] and inner["parent_id"] == outer["span_id"]
+    assert outer["parent_id"] is None and outer["attributes"] == {"status": 200}
+    assert inner_traceparent == f"00-{inner['trace_id']}-{inner['span_id']}-01"
+    assert tracing.current() == ()
+
+
+def test_span_with_several_parents_is_recorded_once_per_trace(exporter):
+    parents = [tracing.SpanContext("a" * 32, "1" * 16), tracing.SpanContext("b" * 32, "2" * 16)]
+    with pytest.raises(ValueError):
+        with tracing.span("batch", parents=parents):
+            raise ValueError("boom")
+    assert [(span["trace_id"], span["parent_id"]) for span in exporter.recent] == [("a" * 32, "1" * 16), ("b" * 32, "2" * 16)]
+    assert all(span["error"] == "ValueError: boom" for span in exporter.recent)
+
+
+def test_critical_path_follows_the_child_that_ends_last():
+    spans = [
+        {"span_id": "root", "parent_id": None, "start": 0.0, "duration_ms": 100.0},
+        {"span_id": "fast", "parent_id": "root", "start": 0.0, "duration_ms": 10.0},
+        {"span_id": "slow", "parent_id": "root", "start": 0.01, "duration_ms": 80.0},
+        {"span_id": "leaf", "parent_id": "slow", "start": 0.02, "duration_ms": 5.0},
+    ]
+    assert tracing.critical_path(spans) == {"root", "slow", "leaf"}
+
+
+def test_middleware_continues_the_callers_trace(exporter):
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/work")
+    def work() -> dict:
+        with tracing.span("handler"):
+            return {"ok": True}
+
+    response = TestClient(app).get("/work", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    assert response.headers["X-Trace-Id"] == TRACE_ID
+    spans = {span["name"]: span for span in exporter.find(TRACE_ID)}
+    assert spans["GET /work"]["parent_id"] == PARENT_ID
+    assert spans["GET /work"]["attributes"]["status"] == 200
+    assert spans["handler"]["parent_id"] == spans["GET /work"]["span_id"]
+
+    # Without a header the request starts a new trace
+    assert TestClient(app).get("/work").headers["X-Trace-Id"] != TRACE_ID
+
+
+def test_coalesced_flush_joins_the_writing_request(exporter, make_api):
+    api, client = make_api(wait_for_durability=True)
+    api.app.add_middleware(TracingMiddleware)
+    response = client.post("/create", json=patient("P1"), headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    assert response.status_code == 201
+    spans = {span["name"]: span for span in exporter.find(TRACE_ID)}
+    assert {"POST /create", "storage.write", "coalesce", "coalescer.flush", "storage.flush"} <= set(spans)
+    assert spans["coalescer.flush"]["parent_id"] == spans["coalesce"]["span_id"]
+    assert spans["storage.flush"]["parent_id"] == spans["coalescer.flush"]["span_id"]
+
+
+def test_frontend_session_sends_the_traceparent(exporter, monkeypatch):
+    sent = {}
+
+    def fake_request(self, method, url, *args, **kwargs):
+        sent.update(kwargs["headers"])
+        return SimpleNamespace(status_code=204)
+
+    monkeypatch.setattr(requests.Session, "request", fake_request)
+    with tracing.span("click"):
+        TracingSession().request("get", "http://backend/view?limit=5")
+    http, click = exporter.recent
+    assert http["name"] == "HTTP GET /view" and http["attributes"] == {"status": 204}
+    assert http["parent_id"] == click["span_id"]
+    assert sent["traceparent"] == f"00-{http['trace_id']}-{http['span_id']}-01"
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import subprocess
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from utils.customlogger import CustomLogger
+
+# Setting up custom logger (the startup report is written here)
+logger = CustomLogger(name="StartupLogger", log_file="startup.log").get_logger()
+
+
+class StartupProfiler:
+    """Times named startup phases of one component and logs them as a startup report."""
+
+    def __init__(self, component: str, started_at: Optional[float] = None) -> None:
+        self.component = component
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    def record(self, name: str, since: float) -> None:
+        """Record a phase that began at `since` (a perf_counter value) and ends now."""
+        self.phases[name] = self.phases.get(name, 0.0) + (time.perf_counter() - since) * 1000
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the body of a with-block as one phase."""
+        since = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, since)
+
+    def report(self) -> dict[str, float]:
+        """Phase durations in ms plus the total since started_at."""
+        return {**{name: round(ms, 1) for name, ms in self.phases.items()},
+                "total": round((time.perf_counter() - self.started_at) * 1000, 1)}
+
+    def write_report(self) -> dict[str, float]:
+        """Log the report to logs/startup.log and return it."""
+        report = self.report()
+        summary = ", ".join(f"{name} {ms:.1f} ms" for name, ms in report.items())
+        logger.info(f"{self.component} startup (pid {os.getpid()}): {summary}")
+        return report
+
+
+def import_time_breakdown(module: str, top: int = 25) -> list[tuple[str, float, float]]:
+    """
+    Import `module` in a fresh interpreter with -X importtime and return the `top` entries by
+    cumulative time as (module, self ms, cumulative ms).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.getcwd(),
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|", 2))
+            entries.append((name, int(self_us) / 1000, int(cumulative_us) / 1000))
+        except ValueError:
+            continue  # header line
+    entries.sort(key=lambda entry: entry[2], reverse=True)
+    return entries[:top]
+
+
+def dump_import_breakdown(module: str, top: int = 25) -> None:
+    """Print the import-time breakdown of `module` and log it to the startup report."""
+    entries = import_time_breakdown(module, top)
+    lines = [f"Import-time breakdown for {module} (top {len(entries)} by cumulative time)",
+             f"{'self ms':>10}{'cumul. ms':>12}  module"]
+    lines += [f"{self_ms:>10.1f}{cumulative_ms:>12.1f}  {name}" for name, self_ms, cumulative_ms in entries]
+    print("\n".join(lines))
+    logger.info("\n".join(lines))
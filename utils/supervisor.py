@@ -0,0 +1,192 @@
+import os
+import time
+import shutil
+import signal
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from typing import Callable, Optional
+from utils.customlogger import CustomLogger
+
+# Setting up custom logger
+logger = CustomLogger(name="SupervisorLogger", log_file="supervisor.log").get_logger()
+
+
+# ---- Probes ----
+def http_probe(url: str, timeout: float = 1.0, max_status: int = 299) -> Callable[[], bool]:
+    """Readiness probe that succeeds when GET url answers with a status of at most max_status."""
+    def probe() -> bool:
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                return response.status <= max_status
+        except urllib.error.HTTPError as e:
+            return e.code <= max_status
+        except Exception:
+            return False
+    return probe
+
+
+# ---- Children ----
+class ManagedProcess:
+    """One supervised child: how to start it, how to tell it is ready, and whether it may be skipped."""
+
+    def __init__(
+        self,
+        name: str,
+        command: list[str],
+        probe: Callable[[], bool],
+        ready_timeout: float = 30.0,
+        required: bool = True,
+        env: Optional[dict[str, str]] = None,
+    ) -> None:
+        self.name = name
+        self.command = command
+        self.probe = probe
+        self.ready_timeout = ready_timeout
+        self.required = required
+        self.env = env
+        self.process: Optional[subprocess.Popen] = None
+        self.restarts: list[float] = []    # monotonic timestamps of recent restarts
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self) -> bool:
+        """Launch the child; returns False if its executable cannot be found."""
+        if shutil.which(self.command[0]) is None:
+            logger.warning(f"{self.name}: executable '{self.command[0]}' not found")
+            return False
+        env = {**os.environ, **self.env} if self.env else None
+        # Own process group: Ctrl+C reaches only the supervisor, which then stops children in order
+        if os.name == "nt":
+            self.process = subprocess.Popen(self.command, env=env, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+        else:
+            self.process = subprocess.Popen(self.command, env=env, start_new_session=True)
+        logger.info(f"{self.name}: started pid {self.process.pid}: {' '.join(self.command)}")
+        return True
+
+    def wait_ready(self, stopping: threading.Event, interval: float = 0.1) -> bool:
+        """Poll the readiness probe until it passes, the child exits, or ready_timeout runs out."""
+        started = time.monotonic()
+        deadline = started + self.ready_timeout
+        while not stopping.is_set() and time.monotonic() < deadline:
+            if self.probe():
+                logger.info(f"{self.name}: ready after {time.monotonic() - started:.2f}s")
+                return True
+            if self.process is not None and not self.running:
+                logger.error(f"{self.name}: exited with code {self.process.returncode} before becoming ready")
+                return False
+            stopping.wait(interval)
+        if not stopping.is_set():
+            logger.error(f"{self.name}: not ready after {self.ready_timeout:.0f}s")
+        return False
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Terminate the child, escalating to kill if it does not exit within timeout."""
+        if not self.running:
+            return
+        logger.info(f"{self.name}: stopping pid {self.process.pid}")
+        self.process.terminate()
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"{self.name}: did not exit within {timeout:.0f}s, killing")
+            self.process.kill()
+            self.process.wait()
+
+
+# ---- Supervisor ----
+class Supervisor:
+    """Starts children in order behind readiness probes, restarts crashed ones and stops them in reverse."""
+
+    def __init__(
+        self,
+        processes: list[ManagedProcess],
+        max_restarts: int = 5,
+        restart_window: float = 60.0,
+        poll_interval: float = 0.5,
+    ) -> None:
+        self.processes = processes
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.poll_interval = poll_interval
+        self._stopping = threading.Event()
+        self._started: list[ManagedProcess] = []
+
+    def request_stop(self, *_: object) -> None:
+        """Signal handler: leave the monitor loop and shut down."""
+        logger.info("Shutdown requested")
+        self._stopping.set()
+
+    def _launch(self, child: ManagedProcess) -> bool:
+        """Start one child and wait for it to become ready (reusing an instance that is already serving)."""
+        if child.probe():
+            logger.info(f"{child.name}: already running and ready, not launching another")
+            return True
+        if not child.start():
+            return False
+        return child.wait_ready(self._stopping)
+
+    def _restart(self, child: ManagedProcess) -> bool:
+        """Restart a crashed child; returns False once it has used up its restart budget."""
+        now = time.monotonic()
+        child.restarts = [at for at in child.restarts if now - at < self.restart_window]
+        if len(child.restarts) >= self.max_restarts:
+            logger.error(f"{child.name}: crashed {len(child.restarts)} times in {self.restart_window:.0f}s, giving up")
+            return False
+        delay = min(30.0, 0.5 * 2 ** len(child.restarts))
+        child.restarts.append(now)
+        logger.warning(f"{child.name}: exited with code {child.process.returncode}, restarting in {delay:.1f}s")
+        if self._stopping.wait(delay):
+            return True
+        if not child.start():
+            return False
+        # A child that is still not ready simply crashes again and uses up more of its budget
+        child.wait_ready(self._stopping)
+        return True
+
+    def run(self) -> int:
+        """Start everything, supervise until asked to stop (or a required child is lost); returns an exit code."""
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self.request_stop)
+
+        exit_code = 0
+        try:
+            for child in self.processes:
+                if self._stopping.is_set():
+                    break
+                if self._launch(child):
+                    self._started.append(child)
+                elif self._stopping.is_set():
+                    self._started.append(child)
+                    break
+                elif child.required:
+                    logger.error(f"{child.name}: required child failed to start, shutting down")
+                    exit_code = 1
+                    self._started.append(child)
+                    return exit_code
+                else:
+                    logger.warning(f"{child.name}: optional child unavailable, continuing without it")
+                    child.stop()
+
+            while not self._stopping.wait(self.poll_interval):
+                for child in self._started:
+                    if child.running or child.process is None or self._stopping.is_set():
+                        continue
+                    if not self._restart(child):
+                        if child.required:
+                            exit_code = 1
+                            return exit_code
+                        child.process = None    # optional child given up on: stop watching it
+            return exit_code
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """Stop started children in reverse start order."""
+        for child in reversed(self._started):
+            child.stop()
+        self._started.clear()
+        logger.info("All children stopped")
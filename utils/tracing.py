@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import atexit
+import secrets
+import argparse
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Iterable, Iterator, NamedTuple, Optional
+
+# Tracing is on unless PMS_TRACING=0; spans of every process go to one JSON-lines file
+TRACING_ENABLED: bool = os.getenv("PMS_TRACING", "1") == "1"
+SPANS_FILE: Path = Path("./logs/spans.jsonl")
+
+# The file is rotated to spans.jsonl.1 past this size (one previous file is kept)
+SPANS_MAX_BYTES: int = 10 * 1024 * 1024
+
+# Buffered spans are appended to the file at this interval (and at exit)
+FLUSH_INTERVAL_S: float = 0.5
+
+
+class SpanContext(NamedTuple):
+    trace_id: str
+    span_id: str
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent header value."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+# Spans opened by this task/thread; usually one, several while one operation serves many traces
+# (a coalesced flush or a sync batch), in which case each nested span is recorded once per trace
+_current: ContextVar[tuple[SpanContext, ...]] = ContextVar("trace_context", default=())
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """SpanContext from a traceparent header (None when absent or malformed)."""
+    parts = (value or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return SpanContext(parts[1], parts[2])
+
+
+def current() -> tuple[SpanContext, ...]:
+    return _current.get()
+
+
+def traceparent() -> Optional[str]:
+    """traceparent of the innermost open span (for outgoing requests and queued work)."""
+    contexts = _current.get()
+    return contexts[0].traceparent if contexts else None
+
+
+class SpanExporter:
+    """Keeps recent spans in memory and appends every span to a JSON-lines file from a background thread."""
+
+    def __init__(self, path: Path = SPANS_FILE, max_bytes: int = SPANS_MAX_BYTES, keep_in_memory: int = 4096) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.recent: deque[dict[str, Any]] = deque(maxlen=keep_in_memory)
+        self.component = "app"
+        self._buffer: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, span: dict[str, Any]) -> None:
+        with self._lock:
+            self.recent.append(span)
+            self._buffer.append(span)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(FLUSH_INTERVAL_S)
+            self.flush()
+
+    def flush(self) -> None:
+        """Append buffered spans to the file (rotating it when it is full)."""
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+        if not spans:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_size > self.max_bytes:
+                os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(span, separators=(",", ":"), default=str) + "\n" for span in spans))
+        except OSError:
+            # Tracing must never break the traced code; the spans stay queryable in memory
+            pass
+
+    def find(self, trace_id: str) -> list[dict[str, Any]]:
+        """Every recorded span of a trace, from all processes writing to the file, oldest first."""
+        self.flush()
+        spans: dict[str, dict[str, Any]] = {}
+        for path in (self.path.with_name(self.path.name + ".1"), self.path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        if trace_id in line:
+                            span = json.loads(line)
+                            if span["trace_id"] == trace_id:
+                                spans[span["span_id"]] = span
+            except (OSError, ValueError):
+                continue
+        for span in self.recent:
+            if span["trace_id"] == trace_id:
+                spans.setdefault(span["span_id"], span)
+        return sorted(spans.values(), key=lambda span: span["start"])
+
+
+exporter = SpanExporter()
+
+
+def configure(component: str) -> None:
+    """Name the process in its spans (e.g. "backend", "frontend")."""
+    exporter.component = component
+
+
+@contextmanager
+def span(name: str, parents: Optional[Iterable[SpanContext]] = None, **attributes: Any) -> Iterator[dict[str, Any]]:
+    """Time the body of a with-block as a child span; yields its attribute dict (e.g. to add a status code)."""
+    if not TRACING_ENABLED:
+        yield attributes
+        return
+    # A child of the innermost open span, or one copy per trace in `parents`; a new trace when there is none
+    parent_contexts: tuple[Optional[SpanContext], ...] = tuple(parents) if parents is not None else _current.get()
+    if not parent_contexts:
+        parent_contexts = (None,)
+    contexts = tuple(
+        SpanContext(parent.trace_id if parent else secrets.token_hex(16), secrets.token_hex(8))
+        for parent in parent_contexts
+    )
+    token = _current.set(contexts)
+    start = time.time()
+    started = time.perf_counter()
+    error: Optional[str] = None
+    try:
+        yield attributes
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        _current.reset(token)
+        for parent, context in zip(parent_contexts, contexts):
+            exporter.export({
+                "trace_id": context.trace_id, "span_id": context.span_id,
+                "parent_id": parent.span_id if parent else None, "name": name,
+                "component": exporter.component, "pid": os.getpid(), "thread": threading.current_thread().name,
+                "start": start, "duration_ms": duration_ms, "attributes": attributes, "error": error,
+            })
+
+
+# ---- Reading traces ----
+def critical_path(spans: list[dict[str, Any]]) -> set[str]:
+    """Span ids on the critical path: from each root, repeatedly the child that ends last."""
+    children: dict[Optional[str], list[dict[str, Any]]] = {}
+    ids = {span["span_id"] for span in spans}
+    for span in spans:
+        children.setdefault(span["parent_id"] if span["parent_id"] in ids else None, []).append(span)
+    path: set[str] = set()
+    frontier = children.get(None, [])
+    while frontier:
+        last = max(frontier, key=lambda span: span["start"] + span["duration_ms"] / 1000)
+        path.add(last["span_id"])
+        frontier = children.get(last["span_id"], [])
+    return path
+
+
+def format_trace(spans: list[dict[str, Any]]) -> str:
+    """Indented span tree with start offsets and durations; * marks the critical path."""
+    if not spans:
+        return "No spans recorded for this trace"
+    ids = {span["span_id"] for span in spans}
+    children: dict[Optional[str], list[dict[str, Any]]] = {}
+    for span in spans:
+        children.setdefault(span["parent_id"] if span["parent_id"] in ids else None, []).append(span)
+    on_path = critical_path(spans)
+    origin = spans[0]["start"]
+    lines = [f"trace {spans[0]['trace_id']} ({len(spans)} spans)"]
+
+    def walk(parent_id: Optional[str], depth: int) -> None:
+        for span in sorted(children.get(parent_id, []), key=lambda span: span["start"]):
+            attributes = " ".join(f"{key}={value}" for key, value in span["attributes"].items())
+            lines.append(
+                f"{'*' if span['span_id'] in on_path else ' '} {(span['start'] - origin) * 1000:9.1f} ms "
+                f"{span['duration_ms']:9.1f} ms  {'  ' * depth}{span['name']} [{span['component']}]"
+                f"{' ' + attributes if attributes else ''}{' ERROR ' + span['error'] if span['error'] else ''}"
+            )
+            walk(span["span_id"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Print a recorded trace as a span tree")
+    parser.add_argument("trace_id", help="32-hex trace id (X-Trace-Id response header)")
+    args = parser.parse_args()
+    print(format_trace(exporter.find(args.trace_id)))
+
+
+if __name__ == "__main__":
+    main()